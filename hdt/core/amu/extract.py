@@ -1,14 +1,29 @@
 from __future__ import annotations
-from typing import List
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import re
+
+import regex
+
 from .schema import AMU
+from ..trusted import gc_paused
+from ..segment.engine import DEFAULT_ABBREVIATIONS, guide_fingerprint, trie_pattern
 from ..segment.spans import Statement
+from ..segment.table import StatementTable
+
+DEFAULT_CLAUSE_RULES: Dict[str, Any] = {
+    "hard_separators": [".", "?", "!"],
+    "soft_separators": [" — ", " – ", ";"],
+    "and_but_split_min_len": 120,
+    "abbreviations": list(DEFAULT_ABBREVIATIONS),
+}
 
 def _amu_id(stmt_id: str, start: int, end: int) -> str:
     return f"{stmt_id}@{start}-{end}"
 
 def extract_amus(statements: List[Statement]) -> List[AMU]:
     """
-    v1: one AMU per statement (fully extractive). Later we can refine to intra-sentence clauses.
+    v1: one AMU per statement (fully extractive). See extract_clause_amus for intra-sentence clauses.
     """
     amus: List[AMU] = []
     for st in statements:
@@ -23,3 +38,145 @@ def extract_amus(statements: List[Statement]) -> List[AMU]:
             Topic_Confidence=0.0,
         ))
     return amus
+
+class ClauseRules:
+    """
+    amu_rules.json compiled for batch-wide scans: hard separators followed by
+    whitespace (listed abbreviations excepted) and soft separators both end a
+    clause and stay on its left side; "and" / "but" as words start a new
+    clause, only inside clauses of at least and_but_split_min_len chars.
+    """
+    def __init__(self, guide: Optional[Dict[str, Any]] = None):
+        rules = dict(DEFAULT_CLAUSE_RULES)
+        rules.update({k: v for k, v in (guide or {}).items() if v is not None})
+        self.fingerprint = guide_fingerprint(guide)
+        self.and_but_min_len = int(rules["and_but_split_min_len"])
+        hard = sorted({d for d in rules["hard_separators"] if d}, key=len, reverse=True)
+        soft = sorted({d for d in rules["soft_separators"] if d.strip()}, key=len, reverse=True)
+        stems = [a[:-1] for a in rules["abbreviations"] if len(a) > 1 and a.endswith(".")]
+        # Abbreviations are checked per hard-separator hit: "<stem>." ending where the separator ends.
+        self._abbr = regex.compile(rf"(?<!\w)(?:{trie_pattern(stems)})\.\Z") if stems else None
+        self._abbr_len = max(map(len, stems)) + 1 if stems else 0
+        # A soft separator matches as its stripped core, with its spaces as lookarounds, so
+        # every cut is a non-space match ending where the left clause ends.
+        cores = [rf"(?<={re.escape(d[:len(d) - len(d.lstrip())])}){re.escape(d.strip())}"
+                 rf"(?={re.escape(d[len(d.rstrip()):])})" for d in soft]
+        seps = [rf"(?P<h>{'|'.join(map(re.escape, hard))})[\"')\]]*(?=\s)"] if hard else []
+        seps.extend(cores)
+        first = "".join(sorted({d[0] for d in hard} | {d.strip()[0] for d in soft}))
+        self._seps = re.compile(rf"(?=[{re.escape(first)}])(?:{'|'.join(seps)})") if seps else None
+        self._conj = re.compile(r"\s(?i:and|but)\b")
+
+    def marks(self, text: str) -> Tuple[List[int], List[int]]:
+        """Separator match ends and conjunction starts in text, each in text order."""
+        cuts: List[int] = []
+        abbr, span = self._abbr, self._abbr_len
+        pos = 0
+        while self._seps is not None:
+            for m in self._seps.finditer(text, pos):
+                if m.lastgroup == "h" and abbr is not None and abbr.search(text, max(0, m.end("h") - span), m.end("h")):
+                    # Not a cut: rescan from the next char, as a guard inside the pattern would.
+                    pos = m.start() + 1
+                    break
+                cuts.append(m.end())
+            else:
+                break
+        return cuts, [m.start() + 1 for m in self._conj.finditer(text)]
+
+def _clauses(text: str, lo: int, hi: int, cuts: Sequence[int], conj: Sequence[int],
+             min_len: int) -> List[Tuple[int, int, str]]:
+    # Trimmed (start, end, span) clauses of text[lo:hi], given the marks inside it.
+    out: List[Tuple[int, int, str]] = []
+    a = lo
+    for b in (cuts if cuts and cuts[-1] == hi else [*cuts, hi]):
+        if conj and b - a >= min_len:
+            for c in conj:
+                if a < c < b:
+                    _trimmed(text, a, c, out)
+                    a = c
+        _trimmed(text, a, b, out)
+        a = b
+    return out
+
+def _trimmed(text: str, a: int, b: int, out: List[Tuple[int, int, str]]) -> None:
+    span = text[a:b]
+    kept = span.strip()
+    if kept:
+        if len(kept) < len(span):
+            a += len(span) - len(span.lstrip())
+        out.append((a, a + len(kept), kept))
+
+_CLAUSE_RULES: Dict[str, ClauseRules] = {}
+_CLAUSE_RULES_MAX = 64
+
+def compile_clause_rules(guide: Optional[Dict[str, Any]] = None) -> ClauseRules:
+    """Compiled clause rules for an amu_rules guide, shared across calls with the same fingerprint."""
+    fp = guide_fingerprint(guide)
+    rules = _CLAUSE_RULES.get(fp)
+    if rules is None:
+        if len(_CLAUSE_RULES) >= _CLAUSE_RULES_MAX:
+            _CLAUSE_RULES.pop(next(iter(_CLAUSE_RULES)))
+        rules = _CLAUSE_RULES[fp] = ClauseRules(guide)
+    return rules
+
+def clause_rules_for(controls: Any) -> ClauseRules:
+    """Clause rules for the amu_rules guide resolved from a ControlStack / registry / dict."""
+    guide = None
+    if hasattr(controls, "get_guide"):
+        guide = controls.get_guide("amu_rules")
+    if guide is None and hasattr(controls, "get"):
+        guide = controls.get("guides.amu_rules", {})
+    return compile_clause_rules(guide or {})
+
+def extract_clause_amus(statements: Union[List[Statement], StatementTable],
+                        rules: Optional[ClauseRules] = None) -> List[AMU]:
+    """
+    Clause-level AMUs for a batch of statements: one marks() pass over the
+    batch's texts joined by NULs (so an ender closing a statement is not
+    followed by whitespace and never matches), then a single walk that runs
+    the clause cutter only on statements with a separator inside, or long
+    ones with a conjunction or edge whitespace; every other statement is one
+    AMU as it stands. Each AMU is an exact slice of its parent
+    statement and keeps Parent_Statement_ID; a statement without cuts yields
+    the same AMU as extract_amus.
+    """
+    rules = rules or compile_clause_rules()
+    if isinstance(statements, StatementTable):
+        ids, starts, texts = statements.ids(), statements.starts, statements.texts()
+    else:
+        ids = [st.id for st in statements]
+        starts = [st.start for st in statements]
+        texts = [st.text for st in statements]
+    buf = "\0".join(texts)
+    cuts, conj = rules.marks(buf)
+
+    make, min_len = AMU.trusted, rules.and_but_min_len
+    amus: List[AMU] = []
+    append = amus.append
+    k, nk, c, pos = 0, len(cuts), 0, 0
+    with gc_paused():
+        for sid, start, t in zip(ids, starts, texts):
+            hi = pos + len(t)
+            if k < nk and cuts[k] <= hi:
+                j = bisect_right(cuts, hi, k)
+                ends, k = cuts[k:j], j
+            else:
+                ends = ()
+            if hi - pos >= min_len:
+                c = bisect_left(conj, pos, c)
+                j = bisect_left(conj, hi, c)
+                words, c = conj[c:j], j
+                # Uncut statements stay whole, unless long with edge whitespace to trim.
+                split = ends or words or not (t[:1].strip() and t[-1:].strip())
+            else:
+                words, split = (), ends
+            if split:
+                delta = start - pos
+                for a, b, span in _clauses(buf, pos, hi, ends, words, min_len):
+                    s, e = a + delta, b + delta
+                    append(make(f"{sid}@{s}-{e}", sid, span, s, e))
+            else:
+                e = start + len(t)
+                append(make(f"{sid}@{start}-{e}", sid, t, start, e))
+            pos = hi + 1
+    return amus
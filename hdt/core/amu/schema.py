@@ -2,6 +2,8 @@ from __future__ import annotations
 from typing import Literal, List
 from pydantic import BaseModel, Field
 
+from ..trusted import construct_trusted
+
 AMUType = Literal["d_prop", "n_prop", "attitude", "phatic"]
 
 class AMU(BaseModel):
@@ -13,3 +15,11 @@ class AMU(BaseModel):
     AMU_Type: AMUType = "d_prop"
     Topic_Candidates: List[str] = Field(default_factory=list)
     Topic_Confidence: float = 0.0
+
+    @classmethod
+    def trusted(cls, amu_id: str, parent_id: str, text: str, start: int, end: int,
+                amu_type: str = "d_prop") -> "AMU":
+        """Fast construct without validation; only for spans the extractor cut itself."""
+        return construct_trusted(cls, {"AMU_ID": amu_id, "Parent_Statement_ID": parent_id, "Text_Span": text,
+                                       "Char_Start": start, "Char_End": end, "AMU_Type": amu_type,
+                                       "Topic_Candidates": [], "Topic_Confidence": 0.0})
@@ -1,48 +1,155 @@
 from __future__ import annotations
-from typing import List, Tuple
-from ..schema_ingest import Alignment, SpanOp
+from array import array
+from bisect import bisect_right
+import codecs, re
+from typing import List, Optional, Sequence, Tuple
+from ..schema_ingest import Alignment, SpanOp, iter_raw_ops
+
+try:  # optional: vectorized byte-offset tables
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+class _Piecewise:
+    """
+    Non-decreasing int map over boundaries 0..n stored as segments:
+    value(p) = base[j] + slope[j] * (p - start[j]) for the last start[j] <= p.
+    """
+    __slots__ = ("start", "base", "slope")
+
+    def __init__(self):
+        self.start = array("q")
+        self.base = array("q")
+        self.slope = array("b")
+
+    def push(self, start: int, base: int, slope: int) -> None:
+        if self.start:
+            j = len(self.start) - 1
+            if self.start[j] == start:
+                self.base[j] = base; self.slope[j] = slope
+                return
+            # continuation of the previous segment
+            if slope == self.slope[j] and self.base[j] + slope * (start - self.start[j]) == base:
+                return
+        self.start.append(start); self.base.append(base); self.slope.append(slope)
+
+    def __call__(self, p: int) -> int:
+        j = bisect_right(self.start, p) - 1
+        return self.base[j] + self.slope[j] * (p - self.start[j])
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+def _build_piecewise(items: List[Tuple[int, int, int, bool]], n: int) -> Optional[_Piecewise]:
+    """
+    items: per op, in op order, (lo, hi, value_at_lo, linear) over boundaries lo..hi.
+    Reproduces the dense rule (later ops overwrite shared boundaries, then a
+    running max) without touching every boundary. Returns None if ops overlap
+    by more than an endpoint, in which case the caller falls back to dense.
+    """
+    pw = _Piecewise()
+    floor = 0
+    pos = 0
+    for k, (lo, hi, v0, lin) in enumerate(items):
+        if not lin:
+            lo, hi = min(lo, n), min(max(hi, lo), n)
+        nxt = items[k + 1][0] if k + 1 < len(items) else None
+        if nxt is not None and (nxt < lo or nxt < hi):
+            return None
+        end = hi if nxt is None else min(hi, nxt - 1)
+        if end < lo:
+            continue
+        if lo > pos:
+            pw.push(pos, floor, 0)
+        if not lin:
+            floor = max(v0, floor)
+            pw.push(lo, floor, 0)
+        elif v0 >= floor:
+            pw.push(lo, v0, 1)
+            floor = v0 + (end - lo)
+        else:
+            t = lo + (floor - v0)   # first boundary where the keep run reaches floor
+            pw.push(lo, floor, 0)
+            if t <= end:
+                pw.push(t, floor, 1)
+                floor = v0 + (end - lo)
+        pos = end + 1
+    if pos <= n:
+        pw.push(pos, floor, 0)
+    return pw
+
+def _dense_maps(alignment: Alignment) -> Tuple[List[int], List[int]]:
+    """Per-boundary reference tables (the original v1 construction)."""
+    orig2canon = [0] * (alignment.orig_len + 1)
+    canon2orig = [0] * (alignment.canon_len + 1)
+
+    for kind, o0, o1, c0, c1 in iter_raw_ops(alignment.ops):
+        o_len = o1 - o0
+        c_len = c1 - c0
+
+        if kind in ("keep",) and o_len == c_len:
+            for i in range(o_len + 1):
+                orig2canon[o0 + i] = c0 + i
+                canon2orig[c0 + i] = o0 + i
+        else:
+            for i in range(max(o_len, 0) + 1):
+                orig2canon[min(o0 + i, alignment.orig_len)] = c0
+            for i in range(max(c_len, 0) + 1):
+                canon2orig[min(c0 + i, alignment.canon_len)] = o0
+
+    for i in range(1, len(orig2canon)):
+        if orig2canon[i] < orig2canon[i - 1]:
+            orig2canon[i] = orig2canon[i - 1]
+    for i in range(1, len(canon2orig)):
+        if canon2orig[i] < canon2orig[i - 1]:
+            canon2orig[i] = canon2orig[i - 1]
+    return orig2canon, canon2orig
+
+def _compress(table: List[int]) -> _Piecewise:
+    pw = _Piecewise()
+    for p, v in enumerate(table):
+        slope = 1 if p and v == table[p - 1] + 1 else 0
+        pw.push(p, v, slope)
+    return pw
 
 class AlignmentIndex:
     """
     Map original decoded char boundaries ? canonical char boundaries,
     and convert canonical spans back to original byte spans.
+    Built lazily over op boundaries only: O(k) memory and O(log k) lookups for k ops.
     """
-    def __init__(self, alignment: Alignment, byte_starts: List[int]):
+    def __init__(self, alignment: Alignment, byte_starts: Sequence[int]):
         self.aln = alignment
         self.byte_starts = byte_starts
-        self._orig2canon = [0] * (alignment.orig_len + 1)
-        self._canon2orig = [0] * (alignment.canon_len + 1)
-
-        for op in alignment.ops:
-            o0, o1 = op.orig
-            c0, c1 = op.canon
-            o_len = o1 - o0
-            c_len = c1 - c0
-
-            if op.kind in ("keep",) and o_len == c_len:
-                for i in range(o_len + 1):
-                    self._orig2canon[o0 + i] = c0 + i
-                    self._canon2orig[c0 + i] = o0 + i
-            else:
-                for i in range(max(o_len, 0) + 1):
-                    self._orig2canon[min(o0 + i, self.aln.orig_len)] = c0
-                for i in range(max(c_len, 0) + 1):
-                    self._canon2orig[min(c0 + i, self.aln.canon_len)] = o0
-
-        for i in range(1, len(self._orig2canon)):
-            if self._orig2canon[i] < self._orig2canon[i - 1]:
-                self._orig2canon[i] = self._orig2canon[i - 1]
-        for i in range(1, len(self._canon2orig)):
-            if self._canon2orig[i] < self._canon2orig[i - 1]:
-                self._canon2orig[i] = self._canon2orig[i - 1]
+        self._o2c: Optional[_Piecewise] = None
+        self._c2o: Optional[_Piecewise] = None
+
+    def _build(self) -> None:
+        aln = self.aln
+        fwd: List[Tuple[int, int, int, bool]] = []
+        inv: List[Tuple[int, int, int, bool]] = []
+        for kind, o0, o1, c0, c1 in iter_raw_ops(aln.ops):
+            lin = kind == "keep" and o1 - o0 == c1 - c0
+            fwd.append((o0, o1, c0, lin))
+            inv.append((c0, c1, o0, lin))
+        o2c = _build_piecewise(fwd, aln.orig_len)
+        c2o = _build_piecewise(inv, aln.canon_len)
+        if o2c is None or c2o is None:
+            dense_o2c, dense_c2o = _dense_maps(aln)
+            o2c, c2o = _compress(dense_o2c), _compress(dense_c2o)
+        self._o2c, self._c2o = o2c, c2o
 
     def forward_char(self, orig_char_boundary: int) -> int:
+        if self._o2c is None:
+            self._build()
         oc = max(0, min(orig_char_boundary, self.aln.orig_len))
-        return self._orig2canon[oc]
+        return self._o2c(oc)
 
     def inverse_char(self, canon_char_boundary: int) -> int:
+        if self._c2o is None:
+            self._build()
         cc = max(0, min(canon_char_boundary, self.aln.canon_len))
-        return self._canon2orig[cc]
+        return self._c2o(cc)
 
     def inverse_bytes(self, canon_span: Tuple[int, int]) -> Tuple[int, int]:
         c0, c1 = canon_span
@@ -50,11 +157,152 @@ class AlignmentIndex:
         o1 = self.inverse_char(c1)
         return self.byte_starts[o0], self.byte_starts[o1]
 
-def compute_byte_starts(orig_text: str, encoding: str) -> List[int]:
-    starts = [0]
+    def inverse_chars_many(self, canon_boundaries: Sequence[int]) -> array:
+        """inverse_char for many boundaries in one merge pass (sorted input) or a sort + pass."""
+        if self._c2o is None:
+            self._build()
+        seg, m = self._c2o, self.aln.canon_len
+        n = len(canon_boundaries)
+        if n and np is not None:
+            p = np.clip(np.asarray(canon_boundaries, dtype=np.int64), 0, m)
+            st = np.frombuffer(seg.start, dtype=np.int64)
+            j = np.searchsorted(st, p, side="right") - 1
+            slope = np.frombuffer(seg.slope, dtype=np.int8)[j]
+            return _array_from_numpy(np.frombuffer(seg.base, dtype=np.int64)[j] + slope * (p - st[j]))
+        out = array("q", bytes(8 * n))
+        if all(canon_boundaries[i] <= canon_boundaries[i + 1] for i in range(n - 1)):
+            order = range(n)
+        else:
+            order = sorted(range(n), key=canon_boundaries.__getitem__)
+        starts, bases, slopes = seg.start, seg.base, seg.slope
+        j, last = 0, len(starts) - 1
+        for i in order:
+            p = max(0, min(canon_boundaries[i], m))
+            while j < last and starts[j + 1] <= p:
+                j += 1
+            out[i] = bases[j] + slopes[j] * (p - starts[j])
+        return out
+
+    def inverse_bytes_many(self, starts: Sequence[int], ends: Sequence[int]) -> Tuple[array, array]:
+        """
+        Bulk inverse_bytes for canonical spans given as parallel start/end arrays
+        (e.g. every Statement.start/end). Returns (byte_starts, byte_ends) arrays.
+        """
+        if len(starts) != len(ends):
+            raise ValueError("inverse_bytes_many: starts and ends differ in length")
+        # interleaved s0, e0, s1, e1, ... is already sorted for ordered, non-overlapping spans
+        both = array("q", bytes(16 * len(starts)))
+        both[0::2] = array("q", starts)
+        both[1::2] = array("q", ends)
+        orig = self.inverse_chars_many(both)
+        bs = self.byte_starts
+        mapped = array("q", [bs[o] for o in orig])
+        return mapped[0::2], mapped[1::2]
+
+# Codecs that prepend a BOM on every encode() call; widths come from the BOM-less form.
+_BOMLESS = {"utf-8-sig": "utf-8", "utf-16": "utf-16-le", "utf-32": "utf-32-le"}
+_MIN_WIDTH = {"utf-16-le": 2, "utf-16-be": 2, "utf-32-le": 4, "utf-32-be": 4}
+_UTF8_LEAD = re.compile(rb"[^\x80-\xbf]")
+_ASTRAL = re.compile(r"[\U00010000-\U0010ffff]")
+
+def _bomless(encoding: str) -> str:
+    name = codecs.lookup(encoding).name
+    return _BOMLESS.get(name, name)
+
+def _array_from_numpy(a) -> array:
+    out = array("q")
+    out.frombytes(a.astype(np.int64).tobytes())
+    return out
+
+def _utf8_starts(data: bytes) -> array:
+    """Byte starts = positions of non-continuation bytes, plus len(data)."""
+    if np is not None:
+        b = np.frombuffer(data, dtype=np.uint8)
+        out = _array_from_numpy(np.flatnonzero((b & 0xC0) != 0x80))
+    else:
+        out = array("q", (m.start() for m in _UTF8_LEAD.finditer(data)))
+    out.append(len(data))
+    return out
+
+def _utf16_starts(text: str) -> array:
+    """2 bytes per char, 4 for astral chars (surrogate pairs)."""
+    out = array("q")
+    acc = 0
+    i = 0
+    for m in _ASTRAL.finditer(text):
+        j = m.start()
+        out.extend(range(acc, acc + 2 * (j - i) + 1, 2))
+        acc += 2 * (j - i) + 4
+        i = j + 1
+    out.extend(range(acc, acc + 2 * (len(text) - i) + 1, 2))
+    return out
+
+class ByteOffsets:
+    """
+    Checkpointed byte-start table: stores the byte offset of every K-th char and
+    encodes at most K-1 chars to answer an exact lookup. Indexable like the full
+    table (len == n + 1), so AlignmentIndex can use it as byte_starts.
+    """
+    __slots__ = ("text", "encoding", "every", "checkpoints")
+
+    def __init__(self, text: str, encoding: str, every: int = 1024):
+        self.text = text
+        self.encoding = _bomless(encoding)
+        self.every = max(1, int(every))
+        self.checkpoints = array("q", [0])
+        acc = 0
+        for k in range(0, len(text), self.every):
+            acc += len(text[k:k + self.every].encode(self.encoding, errors="strict"))
+            self.checkpoints.append(acc)
+
+    def __len__(self) -> int:
+        return len(self.text) + 1
+
+    def __getitem__(self, i: int) -> int:
+        n = len(self.text)
+        if i < 0:
+            i += n + 1
+        if not 0 <= i <= n:
+            raise IndexError("ByteOffsets index out of range")
+        q, r = divmod(i, self.every)
+        base = self.checkpoints[q]
+        if not r:
+            return base
+        k = q * self.every
+        return base + len(self.text[k:k + r].encode(self.encoding, errors="strict"))
+
+def compute_byte_starts(orig_text: str, encoding: str, *, checkpoint: int = 0) -> Sequence[int]:
+    """
+    Byte offset of every char boundary (n + 1 entries) in `encoding`.
+      - constant width (ASCII, single-byte codecs, BMP-only UTF-16): a range
+      - UTF-8 / UTF-16: array('q') from one encode() (NumPy when available)
+      - other codecs: per-character fallback
+    checkpoint=K returns a ByteOffsets that keeps only every K-th offset.
+    BOM-writing codecs (utf-16, utf-32, utf-8-sig) count from the first char.
+    """
+    enc = _bomless(encoding)
+    if checkpoint:
+        return ByteOffsets(orig_text, enc, checkpoint)
+    n = len(orig_text)
+    if enc in ("utf-32-le", "utf-32-be"):
+        return range(0, 4 * n + 1, 4)
+    if enc == "utf-8" and orig_text.isascii():
+        return range(n + 1)
+    if enc in ("utf-16-le", "utf-16-be"):
+        if not _ASTRAL.search(orig_text):
+            return range(0, 2 * n + 1, 2)
+        return _utf16_starts(orig_text)
+    data = orig_text.encode(enc, errors="strict")
+    if len(data) == _MIN_WIDTH.get(enc, 1) * n:
+        w = _MIN_WIDTH.get(enc, 1)
+        return range(0, w * n + 1, w)
+    if enc == "utf-8":
+        return _utf8_starts(data)
+    starts = array("q", [0])
     acc = 0
+    encoder = codecs.getincrementalencoder(enc)(errors="strict")
     for ch in orig_text:
-        acc += len(ch.encode(encoding, errors="strict"))
+        acc += len(encoder.encode(ch))
         starts.append(acc)
     return starts
 
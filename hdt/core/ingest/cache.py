@@ -0,0 +1,212 @@
+from __future__ import annotations
+from array import array
+from pathlib import Path
+from typing import Optional, Tuple, Union
+import hashlib, os, struct, tempfile
+
+from .normalizer import NORMALIZER_VERSION, build_documents
+from .source import SourceBuffer, remember_digest, stat_key
+from ..schema_ingest import CompactOps, CueTable, RawDocument, CanonicalDocument
+
+_BLOCK_TYPES = ("heading", "paragraph", "list", "blockquote", "code", "table", "html", "hr",
+                "front_matter", "reference")
+_BLOCK_CODE = {t: i for i, t in enumerate(_BLOCK_TYPES)}
+
+DEFAULT_MAX_BYTES = 2 << 30
+
+_MAGIC = b"HDC4"
+# compact, bytes_len, orig_len, n_ops, n_cues (+1, 0 = no table), n_blocks, orig utf-8 len, canon utf-8 len,
+# sha1, sha256
+_HEAD = struct.Struct("<4s?QQQQQQQ40s64s")
+# size, mtime_ns, sha1, sha256 of the file a path pointer names
+_PTR = struct.Struct("<QQ40s64s")
+_COLS = ("o0", "o1", "c0", "c1")
+_CUE_COLS = ("start_ms", "end_ms", "c0", "c1")
+
+Parsed = Tuple[RawDocument, CanonicalDocument, str]
+
+def _encode(raw: RawDocument, can: CanonicalDocument, orig: str, sha1: str, sha256: str) -> bytes:
+    aln = can.alignment
+    compact = isinstance(aln.ops, CompactOps)
+    ops = aln.ops
+    if not compact:
+        ops = CompactOps(merge_keeps=False)
+        ops.extend(aln.ops)
+    ob = orig.encode("utf-8", "surrogatepass")
+    cb = can.canonical_text.encode("utf-8", "surrogatepass")
+    cues = can.cues
+    blocks = [b for b in can.blocks if b.get("type") in _BLOCK_CODE]
+    parts = [_HEAD.pack(_MAGIC, compact, raw.bytes_len, aln.orig_len, len(ops),
+                        0 if cues is None else len(cues) + 1, len(blocks), len(ob), len(cb),
+                        sha1.encode("ascii"), (sha256 or "").encode("ascii")), ob, cb, ops.kinds.tobytes()]
+    parts.extend(getattr(ops, c).tobytes() for c in _COLS)
+    if cues is not None:
+        parts.extend(getattr(cues, c).tobytes() for c in _CUE_COLS)
+    if blocks:
+        parts.append(bytes(_BLOCK_CODE[b["type"]] for b in blocks))
+        parts.append(array("q", [x for b in blocks for x in (b["start"], b["end"])]).tobytes())
+    return b"".join(parts)
+
+def _write_atomic(p: Path, blob: bytes) -> None:
+    """Replace `p` through a temp file of its own, so concurrent writers of one key never share one."""
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, p)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def _decode(blob: bytes, media_type: str, encoding: str) -> Parsed:
+    magic, compact, bytes_len, orig_len, n, nc, nb, lo, lc, sha1, _ = _HEAD.unpack_from(blob)
+    if magic != _MAGIC:
+        raise ValueError("ingest cache: bad magic")
+    mv = memoryview(blob)
+    pos = _HEAD.size
+    orig = str(mv[pos:pos + lo], "utf-8", "surrogatepass"); pos += lo
+    canon = str(mv[pos:pos + lc], "utf-8", "surrogatepass"); pos += lc
+    ops = CompactOps(merge_keeps=compact)
+    ops.kinds.frombytes(mv[pos:pos + n]); pos += n
+    for c in _COLS:
+        getattr(ops, c).frombytes(mv[pos:pos + 8 * n]); pos += 8 * n
+    raw, can = build_documents(f"doc-{sha1[:10].decode('ascii')}", media_type, encoding, bytes_len,
+                               ops if compact else list(ops), orig_len, canon)
+    if nc:
+        can.cues = CueTable()
+        for c in _CUE_COLS:
+            getattr(can.cues, c).frombytes(mv[pos:pos + 8 * (nc - 1)]); pos += 8 * (nc - 1)
+    if nb:
+        kinds = mv[pos:pos + nb]; pos += nb
+        se = array("q"); se.frombytes(mv[pos:pos + 16 * nb])
+        can.blocks = [{"start": se[2 * i], "end": se[2 * i + 1], "type": _BLOCK_TYPES[k]} for i, k in enumerate(kinds)]
+    return raw, can, orig
+
+class IngestCache:
+    """
+    Content-addressed store of normalized documents under `root`
+    (default out/.cache/ingest). Entries are keyed by the source sha1, media
+    type (which picks the parser), encoding, normalization form, alignment mode
+    and NORMALIZER_VERSION; a small path index (one pointer per realpath,
+    holding the size and mtime it was made for) lets unchanged files skip the
+    read entirely.
+    Total size is bounded by max_bytes; least recently used entries go first.
+    """
+    def __init__(self, root: Union[str, Path] = Path("out") / ".cache" / "ingest", *,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+
+    def _key(self, sha1: str, media_type: str, encoding: str, form: str, compact: bool) -> str:
+        tag = f"{sha1}|{media_type}|{encoding.lower()}|{form}|{int(compact)}|{NORMALIZER_VERSION}"
+        return hashlib.sha1(tag.encode("utf-8")).hexdigest()
+
+    def _doc_path(self, key: str) -> Path:
+        return self.root / "docs" / key[:2] / f"{key}.bin"
+
+    def _ptr_path(self, path: Union[str, Path]) -> Optional[Tuple[Path, Tuple[str, int, int]]]:
+        """Pointer file for `path` (one per realpath, so edits overwrite it) and the file's stat key."""
+        sk = stat_key(path)
+        if sk is None:
+            return None
+        return self.root / "paths" / hashlib.sha1(sk[0].encode("utf-8", "surrogatepass")).hexdigest(), sk
+
+    def _read(self, key: str, media_type: str, encoding: str) -> Optional[Parsed]:
+        p = self._doc_path(key)
+        try:
+            blob = p.read_bytes()
+            parsed = _decode(blob, media_type, encoding)
+        except (OSError, ValueError, struct.error):
+            return None
+        try:
+            os.utime(p)
+        except OSError:
+            pass
+        self.hits += 1
+        return parsed
+
+    def lookup_path(self, path: Union[str, Path], *, media_type: str, encoding: str, form: str,
+                    compact: bool) -> Optional[Parsed]:
+        """Hit by file identity alone: no read of the source when it is unchanged."""
+        found = self._ptr_path(path)
+        if found is None:
+            return None
+        ptr, sk = found
+        try:
+            size, mtime, sha1, sha256 = _PTR.unpack(ptr.read_bytes())
+        except (OSError, struct.error):
+            return None
+        if (size, mtime) != sk[1:]:
+            return None
+        sha1, sha256 = sha1.decode("ascii"), sha256.decode("ascii")
+        parsed = self._read(self._key(sha1, media_type, encoding, form, compact), media_type, encoding)
+        if parsed is not None and sha256:
+            remember_digest(sk, sha256)
+        return parsed
+
+    def lookup(self, src: SourceBuffer, *, media_type: str, encoding: str, form: str,
+               compact: bool) -> Optional[Parsed]:
+        parsed = self._read(self._key(src.sha1, media_type, encoding, form, compact), media_type, encoding)
+        if parsed is not None and src.path:
+            self._link(src)
+        return parsed
+
+    def store(self, src: SourceBuffer, parsed: Parsed, *, media_type: str, encoding: str, form: str,
+              compact: bool) -> None:
+        self.misses += 1
+        p = self._doc_path(self._key(src.sha1, media_type, encoding, form, compact))
+        blob = _encode(*parsed, src.sha1, src.sha256 or "")
+        try:
+            _write_atomic(p, blob)
+            if src.path:
+                self._link(src)
+        except OSError:
+            return
+        self._account(len(blob))
+
+    def _link(self, src: SourceBuffer) -> None:
+        found = self._ptr_path(src.path)
+        if found is None:
+            return
+        ptr, (_, size, mtime) = found
+        try:
+            _write_atomic(ptr, _PTR.pack(size, mtime, src.sha1.encode("ascii"), (src.sha256 or "").encode("ascii")))
+        except OSError:
+            pass
+
+    def _entries(self):
+        docs = self.root / "docs"
+        return [(st.st_mtime_ns, st.st_size, p) for p in docs.glob("*/*.bin") for st in (p.stat(),)]
+
+    def _account(self, added: int) -> None:
+        if self._size is None:
+            self._size = sum(sz for _, sz, _ in self._entries())
+        else:
+            self._size += added
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target: Optional[int] = None) -> int:
+        """Drop least recently used entries until the store fits in `target` (default 90% of max)."""
+        target = int(self.max_bytes * 0.9) if target is None else target
+        entries = sorted(self._entries())
+        total = sum(sz for _, sz, _ in entries)
+        removed = 0
+        for _, sz, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= sz
+            removed += 1
+        self._size = total
+        return removed
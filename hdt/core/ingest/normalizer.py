@@ -1,7 +1,11 @@
 ﻿from __future__ import annotations
-from typing import List, Tuple
-import hashlib, unicodedata
-from ..schema_ingest import RawDocument, CanonicalDocument, Alignment, SpanOp
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from functools import lru_cache
+import codecs, hashlib, re, sys, unicodedata
+from ..schema_ingest import RawDocument, CanonicalDocument, Alignment, SpanOp, CompactOps
+
+# Bump whenever canonical text or alignment output changes; part of the ingest cache key.
+NORMALIZER_VERSION = "1.1"
 
 def _doc_id_from_bytes(b: bytes) -> str:
     return f"doc-{hashlib.sha1(b).hexdigest()[:10]}"
@@ -10,19 +14,55 @@ def _is_combining(ch: str) -> bool:
     # Unicode combining marks categories start with "M" (Mn, Mc, Me)
     return unicodedata.category(ch).startswith("M")
 
-def normalize_bytes(raw_bytes: bytes, *, media_type: str = "text/plain", encoding: str = "utf-8") -> Tuple[RawDocument, CanonicalDocument, str]:
+_FORMS = ("NFC", "NFKC")
+_CR_RE = re.compile(r"\r\n?")
+
+def normalization_form(panel: Optional[Dict[str, Any]]) -> str:
+    """recovery.unicode_normalization from config/panel/global.json (NFC|NFKC; default NFC)."""
+    form = str(((panel or {}).get("recovery") or {}).get("unicode_normalization") or "NFC").upper()
+    return form if form in _FORMS else "NFC"
+
+@lru_cache(maxsize=1)
+def _edit_re() -> "re.Pattern[str]":
     """
-    v1 canonicalization:
-      - decode bytes with the given encoding (strict)
-      - Drop leading UTF-8 BOM if present
-      - CRLF/CR -> LF using replace ops
-      - NBSP (U+00A0) -> space using replace ops
-      - NFC normalization for base+combining sequences (e.g., e + ◌́ -> é)
+    CR/CRLF, NBSP, a run of BMP combining marks, or any astral code point.
+    The mark class is built from unicodedata (not regex's tables) so it agrees
+    with _is_combining; astral chars are checked one by one by the caller,
+    which keeps the character class small enough for re's bitmap matcher.
     """
-    orig = raw_bytes.decode(encoding, errors="strict")
-    n = len(orig)
+    ranges, start, prev = [], None, 0
+    for cp in range(0x10000):
+        if unicodedata.category(chr(cp))[0] == "M":
+            if start is None: start = cp
+            prev = cp
+        elif start is not None:
+            ranges.append(f"\\u{start:04x}-\\u{prev:04x}"); start = None
+    marks = "[" + "".join(ranges) + "]"
+    return re.compile(rf"\r\n?|\u00a0|{marks}+|[\U00010000-\U0010ffff]")
+
+Emit = Callable[[str, int, int, int, int], None]
 
-    ops: List[SpanOp] = []
+def _cluster(orig: str, i: int, j: int, cpos: int, form: str, emit: Emit, out: List[str], per_char: bool) -> int:
+    """Base + combining marks orig[i:j]: keep if already normalized, else one replace."""
+    cluster = orig[i:j]
+    nfc = unicodedata.normalize(form, cluster)
+    if nfc == cluster:
+        # Emit keeps per-codepoint for precise mapping
+        if per_char:
+            for k in range(i, j):
+                emit("keep", k, k + 1, cpos + k - i, cpos + k - i + 1)
+        else:
+            emit("keep", i, j, cpos, cpos + j - i)
+        out.append(cluster)
+        return cpos + j - i
+    # Cluster changed length/content; treat as a single replace
+    new_len = len(nfc)
+    emit("replace", i, j, cpos, cpos + new_len)
+    out.append(nfc)
+    return cpos + new_len
+
+def _canonicalize_slow(orig: str, form: str, emit: Emit, per_char: bool, bom: bool = True) -> str:
+    n = len(orig)
     canon_chars: List[str] = []
 
     i = 0
@@ -31,24 +71,24 @@ def normalize_bytes(raw_bytes: bytes, *, media_type: str = "text/plain", encodin
         ch = orig[i]
 
         # Drop leading BOM (U+FEFF)
-        if i == 0 and ch == "\ufeff":
-            ops.append(SpanOp(kind="delete", orig=(i, i + 1), canon=(cpos, cpos)))
+        if i == 0 and bom and ch == "\ufeff":
+            emit("delete", i, i + 1, cpos, cpos)
             i += 1
             continue
 
         # Newline normalization first
         if ch == "\r":
             if i + 1 < n and orig[i + 1] == "\n":
-                ops.append(SpanOp(kind="replace", orig=(i, i + 2), canon=(cpos, cpos + 1)))
+                emit("replace", i, i + 2, cpos, cpos + 1)
                 canon_chars.append("\n"); i += 2; cpos += 1
             else:
-                ops.append(SpanOp(kind="replace", orig=(i, i + 1), canon=(cpos, cpos + 1)))
+                emit("replace", i, i + 1, cpos, cpos + 1)
                 canon_chars.append("\n"); i += 1; cpos += 1
             continue
 
         # NBSP -> space
         if ch == "\u00A0":
-            ops.append(SpanOp(kind="replace", orig=(i, i + 1), canon=(cpos, cpos + 1)))
+            emit("replace", i, i + 1, cpos, cpos + 1)
             canon_chars.append(" "); i += 1; cpos += 1
             continue
 
@@ -57,33 +97,136 @@ def normalize_bytes(raw_bytes: bytes, *, media_type: str = "text/plain", encodin
         while j < n and _is_combining(orig[j]):
             j += 1
 
-        cluster = orig[i:j]
-        nfc = unicodedata.normalize("NFC", cluster)
+        cpos = _cluster(orig, i, j, cpos, form, emit, canon_chars, per_char)
+        i = j
+
+    return "".join(canon_chars)
 
-        if nfc == cluster:
-            # Emit keeps per-codepoint for precise mapping
-            for k in range(i, j):
-                ops.append(SpanOp(kind="keep", orig=(k, k + 1), canon=(cpos, cpos + 1)))
-                canon_chars.append(orig[k]); cpos += 1
+def _canonicalize_fast(orig: str, form: str, emit: Emit, per_char: bool, pattern: "re.Pattern[str]",
+                       bom: bool = True) -> str:
+    """
+    Same ops as _canonicalize_slow, but only visits the positions `pattern` finds;
+    everything in between is a keep run. Valid when no code point outside a
+    match can change under `form` (ASCII text, or text already in that form).
+    """
+    n = len(orig)
+    parts: List[str] = []
+    i = 0
+    cpos = 0
+    if n and bom and orig[0] == "\ufeff":
+        emit("delete", 0, 1, 0, 0)
+        i = 1
+
+    def keep_run(a: int, b: int, c: int) -> int:
+        if per_char:
+            for k in range(a, b):
+                emit("keep", k, k + 1, c + k - a, c + k - a + 1)
         else:
-            # Cluster changed length/content; treat as a single replace
-            new_len = len(nfc)
-            ops.append(SpanOp(kind="replace", orig=(i, j), canon=(cpos, cpos + new_len)))
-            canon_chars.append(nfc); cpos += new_len
+            emit("keep", a, b, c, c + b - a)
+        parts.append(orig[a:b])
+        return c + b - a
 
-        i = j
+    for m in pattern.finditer(orig, i):
+        s, e = m.span()
+        if s < i:
+            continue  # already consumed by a mark run extended below
+        ch = orig[s]
+        if ch != "\r" and ch != "\u00a0":
+            if ch > "\uffff" and not _is_combining(ch):
+                continue
+            while e < n and _is_combining(orig[e]):
+                e += 1
+            if s > i:
+                s -= 1  # marks cluster with the unmatched char before them
+        if s > i:
+            cpos = keep_run(i, s, cpos)
+        if ch == "\r":
+            emit("replace", s, e, cpos, cpos + 1)
+            parts.append("\n"); cpos += 1
+        elif ch == "\u00a0":
+            emit("replace", s, e, cpos, cpos + 1)
+            parts.append(" "); cpos += 1
+        else:
+            cpos = _cluster(orig, s, e, cpos, form, emit, parts, per_char)
+        i = e
+    if i < n:
+        keep_run(i, n, cpos)
+    return "".join(parts)
 
-    canonical_text = "".join(canon_chars)
+def canonicalize(orig: str, form: str, emit: Emit, per_char: bool, fast: bool, bom: bool = True) -> str:
+    """
+    Canonical text of decoded `orig`, reporting alignment ops to `emit` with
+    piece-local offsets (see op_sink). per_char emits one keep per code point;
+    bom=False keeps a leading U+FEFF (for pieces that do not start a document).
+    """
+    pattern = None
+    if fast:
+        if orig.isascii():
+            pattern = _CR_RE
+        else:
+            # NBSP is rewritten before normalization, so it must not veto NFKC
+            probe = orig.replace("\u00a0", " ") if form != "NFC" and "\u00a0" in orig else orig
+            if unicodedata.is_normalized(form, probe):
+                pattern = _edit_re()
+    if pattern is not None:
+        return _canonicalize_fast(orig, form, emit, per_char, pattern, bom)
+    return _canonicalize_slow(orig, form, emit, per_char, bom)
 
+def normalize_bytes(raw_bytes: Union[bytes, bytearray, memoryview], *, media_type: str = "text/plain",
+                    encoding: str = "utf-8", compact: bool = False, form: str = "NFC", fast: bool = True,
+                    doc_id: Optional[str] = None) -> Tuple[RawDocument, CanonicalDocument, str]:
+    """
+    v1 canonicalization:
+      - decode bytes with the given encoding (strict)
+      - Drop leading UTF-8 BOM if present
+      - CRLF/CR -> LF using replace ops
+      - NBSP (U+00A0) -> space using replace ops
+      - NFC (or `form`, e.g. NFKC) normalization for base+combining sequences (e.g., e + ◌́ -> é)
+    compact=True merges consecutive keeps and returns alignment.ops as CompactOps
+    (array columns); otherwise one SpanOp per kept code point, as before.
+    fast=True skips the per-character walk for ASCII / already-normalized input;
+    the output is identical either way.
+    Any buffer (memoryview, mmap) is decoded in place; pass doc_id when the
+    caller already hashed the bytes (see ingest.source.SourceBuffer).
+    """
+    orig = str(raw_bytes, encoding, "strict")
+
+    ops, emit = op_sink(compact)
+    canonical_text = canonicalize(orig, form, emit, not compact, fast)
+    return (*build_documents(doc_id or _doc_id_from_bytes(raw_bytes), media_type, encoding, memoryview(raw_bytes).nbytes,
+                             ops, len(orig), canonical_text), orig)
+
+def op_sink(compact: bool, ob: int = 0, cb: int = 0) -> Tuple[Union[CompactOps, List[SpanOp]], Emit]:
+    """
+    (ops, emit) pair for canonicalize: CompactOps when compact, else a SpanOp
+    list. emit shifts piece-local offsets by (ob, cb), the original and
+    canonical lengths already consumed.
+    """
+    if compact:
+        ops = CompactOps()
+        add = ops.append
+        if not ob and not cb:
+            return ops, add
+        def emit(kind, o0, o1, c0, c1):
+            add(kind, o0 + ob, o1 + ob, c0 + cb, c1 + cb)
+        return ops, emit
+    ops = []
+    def emit(kind, o0, o1, c0, c1):
+        ops.append(SpanOp(kind=kind, orig=(o0 + ob, o1 + ob), canon=(c0 + cb, c1 + cb)))
+    return ops, emit
+
+def build_documents(doc_id: str, media_type: str, encoding: str, bytes_len: int,
+                    ops, orig_len: int, canonical_text: str) -> Tuple[RawDocument, CanonicalDocument]:
+    """RawDocument + CanonicalDocument for a finished canonicalization (ops from op_sink)."""
     raw = RawDocument(
-        doc_id=_doc_id_from_bytes(raw_bytes),
+        doc_id=doc_id,
         media_type=media_type,
         encoding=encoding,
-        bytes_len=len(raw_bytes),
+        bytes_len=bytes_len,
     )
     aln = Alignment(
         ops=ops, encoding=encoding,
-        orig_len=len(orig), canon_len=len(canonical_text)
+        orig_len=orig_len, canon_len=len(canonical_text)
     )
     can = CanonicalDocument(
         doc_id=raw.doc_id,
@@ -91,4 +234,127 @@ def normalize_bytes(raw_bytes: bytes, *, media_type: str = "text/plain", encodin
         lang_blocks=[{"start": 0, "end": len(canonical_text), "bcp47": "und", "confidence": 0.0}],
         alignment=aln,
     )
-    return raw, can, orig
+    return raw, can
+
+class NormalizedChunk(NamedTuple):
+    orig: str       # decoded original text covered by this chunk
+    text: str       # canonical text produced from it
+    ops: Union[CompactOps, List[SpanOp]]  # alignment segment, document-global offsets
+
+def _safe_cut(text: str) -> int:
+    """
+    Longest prefix of `text` whose canonicalization cannot depend on what comes next:
+    hold back the last base char and its marks (more marks may follow) and a
+    trailing CR (may be the first half of CRLF).
+    """
+    k = len(text) - 1
+    while k >= 0 and _is_combining(text[k]):
+        k -= 1
+    if k <= 0:
+        return 0
+    if text[k] == "\n" and text[k - 1] == "\r":
+        k -= 1
+    return k
+
+class StreamNormalizer:
+    """
+    Incremental normalize_bytes: feed() byte chunks in order, then close().
+    Each call returns the canonical text and ops that became final; concatenated
+    they equal the one-shot output. Only the undecided tail (a partial UTF-8
+    sequence, a trailing CR, the last base + marks cluster) is buffered.
+    """
+    def __init__(self, *, encoding: str = "utf-8", compact: bool = True, form: str = "NFC", fast: bool = True):
+        self.encoding = encoding
+        self.compact = compact
+        self.form = form
+        self.fast = fast
+        self.bytes_len = 0
+        self.orig_len = 0
+        self.canon_len = 0
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        self._sha1 = hashlib.sha1()
+        self._pending = ""
+        self._closed = False
+
+    @property
+    def doc_id(self) -> str:
+        return f"doc-{self._sha1.hexdigest()[:10]}"
+
+    def feed(self, data: bytes) -> NormalizedChunk:
+        if self._closed:
+            raise ValueError("StreamNormalizer: feed() after close()")
+        self._sha1.update(data)
+        self.bytes_len += len(data)
+        text = self._pending + self._decoder.decode(data, False)
+        cut = _safe_cut(text)
+        self._pending = text[cut:]
+        return self._emit(text[:cut])
+
+    def close(self) -> NormalizedChunk:
+        text = self._pending + self._decoder.decode(b"", True)
+        self._pending = ""
+        self._closed = True
+        return self._emit(text)
+
+    def _emit(self, piece: str) -> NormalizedChunk:
+        ops, emit = op_sink(self.compact, self.orig_len, self.canon_len)
+        canon = canonicalize(piece, self.form, emit, not self.compact, self.fast,
+                             bom=self.orig_len == 0) if piece else ""
+        self.orig_len += len(piece)
+        self.canon_len += len(canon)
+        return NormalizedChunk(piece, canon, ops)
+
+def iter_byte_chunks(source: Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]],
+                     chunk_size: int) -> Iterator[bytes]:
+    """Byte chunks of a buffer (chunk_size each), a file object (read(chunk_size)) or an iterable (as given)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        mv = memoryview(source)
+        for i in range(0, len(mv), chunk_size):
+            yield bytes(mv[i:i + chunk_size])
+        return
+    read = getattr(source, "read", None)
+    if callable(read):
+        for chunk in iter(lambda: read(chunk_size), b""):
+            yield chunk
+        return
+    yield from source
+
+def iter_normalize(source: Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]], *,
+                   encoding: str = "utf-8", compact: bool = True, form: str = "NFC", fast: bool = True,
+                   chunk_size: int = 1 << 20, state: Optional[StreamNormalizer] = None) -> Iterator[NormalizedChunk]:
+    """
+    Stream a file object / iterable of byte chunks through the normalizer,
+    yielding non-empty NormalizedChunks. Memory stays bounded by the chunk size
+    as long as the consumer does not keep the chunks (scripts/ingest.py
+    --stream-to writes them out). Pass `state` to read doc_id / lengths once
+    the generator is exhausted.
+    """
+    sn = state or StreamNormalizer(encoding=encoding, compact=compact, form=form, fast=fast)
+    for data in iter_byte_chunks(source, chunk_size):
+        ch = sn.feed(data)
+        if ch.orig:
+            yield ch
+    ch = sn.close()
+    if ch.orig:
+        yield ch
+
+def normalize_stream(source: Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]], *,
+                     media_type: str = "text/plain", encoding: str = "utf-8", compact: bool = False,
+                     form: str = "NFC", fast: bool = True,
+                     chunk_size: int = 1 << 20) -> Tuple[RawDocument, CanonicalDocument, str]:
+    """
+    Same result as normalize_bytes, read chunk by chunk from a file object or
+    an iterable. Only the raw bytes are never held whole: the result holds the
+    full original and canonical text, so use iter_normalize when memory must
+    stay bounded.
+    """
+    sn = StreamNormalizer(encoding=encoding, compact=compact, form=form, fast=fast)
+    origs: List[str] = []
+    texts: List[str] = []
+    ops: Union[CompactOps, List[SpanOp]] = CompactOps() if compact else []
+    for ch in iter_normalize(source, chunk_size=chunk_size, state=sn):
+        origs.append(ch.orig)
+        texts.append(ch.text)
+        ops.extend(ch.ops)
+    orig = "".join(origs)
+    return (*build_documents(sn.doc_id, media_type, encoding, sn.bytes_len, ops, sn.orig_len, "".join(texts)), orig)
@@ -3,6 +3,8 @@ try:
     from .md import parse_md
 except Exception:
     parse_md = None
+from .srt import parse_srt
+from .html import parse_html
 from .auto import parse_auto
 
-__all__ = ["parse_txt", "parse_md", "parse_auto"]
+__all__ = ["parse_txt", "parse_md", "parse_srt", "parse_html", "parse_auto"]
@@ -1,30 +1,79 @@
 ﻿from __future__ import annotations
+import mmap
 from typing import Union, Optional
 from ..normalizer import normalize_bytes
+from ..source import SourceBuffer, open_source, wrap_buffer
+from ..cache import IngestCache
+from .srt import parse_srt
+from .html import parse_html
+from .md_blocks import markdown_blocks
 
-def parse_auto(source: Union[str, bytes, bytearray], *, encoding: str = "utf-8", path: Optional[str] = None):
+_SUBTITLES = ("text/srt", "text/vtt")
+
+def _media_type(ext_src: str) -> str:
+    if ext_src.endswith(".md") or ext_src.endswith(".markdown"):
+        return "text/markdown"
+    if ext_src.endswith(".srt"):
+        return "text/srt"
+    if ext_src.endswith(".vtt"):
+        return "text/vtt"
+    if ext_src.endswith(".html") or ext_src.endswith(".htm"):
+        return "text/html"
+    return "text/plain"
+
+def parse_source(src: SourceBuffer, *, encoding: str = "utf-8", media_type: Optional[str] = None,
+                 compact: bool = False, form: str = "NFC", cache: Optional[IngestCache] = None):
+    """Normalize an already-read SourceBuffer (decoded straight from its mapping)."""
+    media_type = media_type or _media_type((src.path or "").lower())
+    if cache is not None:
+        hit = cache.lookup(src, media_type=media_type, encoding=encoding, form=form, compact=compact)
+        if hit is not None:
+            return hit
+    if media_type in _SUBTITLES:
+        parsed = parse_srt(src.data, media_type=media_type, encoding=encoding, compact=compact,
+                           form=form, doc_id=src.doc_id)
+    elif media_type == "text/html":
+        parsed = parse_html(src.data, encoding=encoding, compact=compact, form=form, doc_id=src.doc_id)
+    else:
+        parsed = normalize_bytes(src.data, media_type=media_type, encoding=encoding, compact=compact,
+                                 form=form, doc_id=src.doc_id)
+        if media_type == "text/markdown":
+            parsed[1].blocks = markdown_blocks(parsed[1].canonical_text)
+    if cache is not None:
+        cache.store(src, parsed, media_type=media_type, encoding=encoding, form=form, compact=compact)
+    return parsed
+
+def parse_auto(source: Union[str, bytes, bytearray, memoryview, mmap.mmap, SourceBuffer], *,
+               encoding: str = "utf-8", path: Optional[str] = None, compact: bool = False, form: str = "NFC",
+               cache: Optional[IngestCache] = None):
     """
     Flexible parser:
-      - If `source` is a path (str), read the file.
-      - If `source` is bytes/bytearray, use that directly. Optionally pass `path` to help pick media_type.
+      - If `source` is a path (str), read it once (memory-mapped when large) and
+        hash it in the same pass; the sha256 is reused by provenance stamping.
+      - If `source` is bytes/bytearray/memoryview/mmap (or a SourceBuffer), use it
+        directly without copying. Optionally pass `path` to help pick media_type.
     Media types:
-      - .md/.markdown -> text/markdown
+      - .md/.markdown -> text/markdown (can.blocks tags top-level blocks)
+      - .srt / .vtt   -> text/srt / text/vtt (cue text only, timings in can.cues)
+      - .html / .htm  -> text/html (visible text; script/style/nav dropped)
       - otherwise     -> text/plain
+    compact=True returns run-length CompactOps alignment; form is the Unicode
+    normalization form (see normalize_bytes).
+    cache: an IngestCache consulted before normalizing; for an unchanged path
+    the source is not read at all.
     """
-    if isinstance(source, (bytes, bytearray)):
-        raw = bytes(source)
-        ext_src = (path or "").lower()
-    elif isinstance(source, str):
-        path = source
-        ext_src = path.lower()
-        with open(path, "rb") as f:
-            raw = f.read()
-    else:
-        raise TypeError("parse_auto: source must be str path or bytes")
-
-    if ext_src.endswith(".md") or ext_src.endswith(".markdown"):
-        media_type = "text/markdown"
-    else:
-        media_type = "text/plain"
-
-    return normalize_bytes(raw, media_type=media_type, encoding=encoding)
+    if isinstance(source, SourceBuffer):
+        return parse_source(source, encoding=encoding, media_type=_media_type((path or source.path or "").lower()),
+                            compact=compact, form=form, cache=cache)
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        with wrap_buffer(source, path) as src:
+            return parse_source(src, encoding=encoding, compact=compact, form=form, cache=cache)
+    if not isinstance(source, str):
+        raise TypeError("parse_auto: source must be str path or a bytes-like buffer")
+    if cache is not None:
+        hit = cache.lookup_path(source, media_type=_media_type(source.lower()), encoding=encoding,
+                                form=form, compact=compact)
+        if hit is not None:
+            return hit
+    with open_source(source) as src:
+        return parse_source(src, encoding=encoding, compact=compact, form=form, cache=cache)
@@ -0,0 +1,235 @@
+﻿from __future__ import annotations
+from html import unescape
+from typing import BinaryIO, Iterable, List, Optional, Tuple, Union
+import codecs, hashlib, re
+from ..normalizer import canonicalize, build_documents, iter_byte_chunks, op_sink
+from ...schema_ingest import RawDocument, CanonicalDocument
+
+DROP_TAGS = frozenset({"script", "style", "nav", "noscript", "template"})
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "caption", "dd", "details", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "html",
+    "li", "main", "ol", "p", "pre", "section", "summary", "table", "td", "th", "title", "tr", "ul",
+})
+_VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                        "source", "track", "wbr"})
+_RAW_TAGS = frozenset({"script", "style"})   # content is raw text up to the end tag (and dropped)
+# Quotes open an attribute value only right after "=" (and whitespace); anywhere else in a tag
+# ("alt=don't") they are ordinary characters. The "=" branch matches one way only, so a tag
+# without its ">" fails in linear time.
+_ATTRS = r"""(?:[^>=]|=\s*(?:"[^"]*"|'[^']*'|(?=[^\s"'])))*"""
+_TOKEN_RE = re.compile(r"""
+    (?P<text>[^<&]+)
+  | (?P<comment><!--.*?-->)
+  | <(?P<close>/?)(?P<tag>[A-Za-z][^\s/>]*)""" + _ATTRS + r"""(?P<selfclose>(?<=/))?>
+  | (?P<markup><[!?][^>]*>)
+  | (?P<ref>&(?:\#[0-9]{1,7}|\#[xX][0-9a-fA-F]{1,6}|[A-Za-z][A-Za-z0-9]{0,31});?)
+  | (?P<lone>[<&])
+""", re.S | re.X)
+# An unterminated tag (possibly inside a quoted attribute) running to the end of the buffer.
+_TAG_PREFIX_RE = re.compile(rf"""</?(?:[A-Za-z][^\s/>]*{_ATTRS}(?:=\s*(?:"[^"]*|'[^']*)?)?)?""")
+_WS_RE = re.compile(r"\s+")
+_COLLAPSE_RE = re.compile(r"\s{2,}|[^\S ]")
+_SEP_RANK = {"": 0, " ": 1, "\n": 2, "\n\n": 3}
+
+class _HtmlBuilder:
+    """
+    Incremental regex tokenizer -> canonical text, with exact source offsets.
+    Every source char is accounted for: kept text goes through the normal
+    canonicalizer; markup, dropped elements and collapsed whitespace become
+    delete/replace ops (a block boundary reads as a blank line, <br> as a
+    newline, inter-word whitespace as one space). A token touching the end of
+    the buffer is held until more input (or close) decides it.
+    """
+    def __init__(self, compact: bool, form: str, fast: bool):
+        self.form, self.fast, self.per_char = form, fast, not compact
+        self.ops, self._emit = op_sink(compact)
+        self.texts: List[str] = []
+        self.fed = 0
+        self.canon_len = 0
+        self._buf = ""
+        self._base = 0         # source offset of _buf[0]
+        self._raw: Optional[re.Pattern] = None   # end-tag pattern while inside <script>/<style>
+        self._drop: List[str] = []
+        self._pre = 0
+        self._gap = 0          # start of source not yet accounted for
+        self._sep = ""         # separator owed before the next kept text
+
+    # -- tokenizer ---------------------------------------------------------
+    def feed_text(self, text: str) -> None:
+        self.fed += len(text)
+        self._buf += text
+        self._scan(False)
+
+    def finish(self) -> None:
+        self._scan(True)
+        if self.fed > self._gap:
+            self._emit("delete", self._gap, self.fed, self.canon_len, self.canon_len)
+
+    def _scan(self, final: bool) -> None:
+        buf, base, pos, n = self._buf, self._base, 0, len(self._buf)
+        while pos < n:
+            if self._raw is not None:
+                m = self._raw.search(buf, pos)
+                if m is None and not final:
+                    pos = max(pos, n - 16)   # keep a possible partial end tag
+                    break
+                self._raw = None
+                pos = m.end() if m else n
+                continue
+            m = _TOKEN_RE.match(buf, pos)
+            kind = m.lastgroup
+            if not final and (m.end() == n or (kind in ("lone", "markup") and self._partial(buf, pos))):
+                if kind == "text":
+                    # Emit up to the last newline; splitting there leaves the output unchanged.
+                    k = buf.rfind("\n", pos, n)
+                    if k >= 0:
+                        self._text(base + pos, buf[pos:k + 1])
+                        pos = k + 1
+                break
+            start = base + pos
+            if kind == "text" or kind == "lone":
+                self._text(start, m.group())
+            elif kind == "ref":
+                self._ref(start, base + m.end(), m.group())
+            elif kind in ("tag", "selfclose"):
+                tag = m.group("tag").lower()
+                closing = bool(m.group("close"))
+                self._tag(tag, closing, void=bool(m.group("selfclose")))
+                if not closing and tag in _RAW_TAGS and not m.group("selfclose"):
+                    self._raw = re.compile(rf"</{tag}\s*>", re.I)
+            pos = m.end()
+        self._buf = buf[pos:]
+        self._base = base + pos
+
+    @staticmethod
+    def _partial(buf: str, pos: int) -> bool:
+        """A '<' / '&' token that more input could still turn into a comment, tag or reference."""
+        if buf[pos] == "&":
+            return len(buf) - pos < 40
+        rest = len(buf) - pos
+        if buf.startswith("<!--", pos):
+            return buf.find("-->", pos + 4) < 0
+        if rest < 4 and "<!--".startswith(buf[pos:]):
+            return True
+        if buf[pos + 1] in "!?":
+            return buf.find(">", pos) < 0
+        m = _TAG_PREFIX_RE.match(buf, pos)
+        return m is not None and m.end() == len(buf)
+
+    # -- tokens ------------------------------------------------------------
+    def _tag(self, tag: str, closing: bool, void: bool = False) -> None:
+        if self._drop:
+            if closing and tag == self._drop[-1]:
+                self._drop.pop()
+                if tag == "nav" and not self._drop:
+                    self._break("\n\n")
+            elif not closing and not void and tag in DROP_TAGS and tag not in _RAW_TAGS:
+                self._drop.append(tag)
+            return
+        if not closing and tag in DROP_TAGS:
+            if not void and tag not in _RAW_TAGS:
+                self._drop.append(tag)
+            return
+        if tag == "br":
+            self._break("\n")
+        elif tag in _BLOCK_TAGS:
+            self._break("\n\n")
+        if tag == "pre" and not void:
+            self._pre = max(0, self._pre + (-1 if closing else 1))
+
+    def _ref(self, start: int, end: int, src: str) -> None:
+        if self._drop:
+            return
+        text = unescape(src)
+        if _WS_RE.fullmatch(text):
+            self._space()
+        else:
+            self._keep(start, end, text, replace=text != src)
+
+    def _text(self, start: int, text: str) -> None:
+        if self._drop:
+            return
+        if start == 0 and text.startswith("\ufeff"):
+            start, text = 1, text[1:]
+        if self._pre:
+            self._keep(start, start + len(text), text)
+            return
+        core = text.strip()
+        if not core:
+            if text:
+                self._space()
+            return
+        lead = len(text) - len(text.lstrip())
+        if lead:
+            self._space()
+        # Single spaces inside a run are kept as-is; only other whitespace collapses.
+        pos = 0
+        for m in _COLLAPSE_RE.finditer(core):
+            self._keep(start + lead + pos, start + lead + m.start(), core[pos:m.start()])
+            self._space()
+            pos = m.end()
+        self._keep(start + lead + pos, start + lead + len(core), core[pos:])
+        if len(core) + lead < len(text):
+            self._space()
+
+    # -- output ------------------------------------------------------------
+    def _space(self) -> None:
+        self._break(" ")
+
+    def _break(self, sep: str) -> None:
+        if _SEP_RANK[sep] > _SEP_RANK[self._sep]:
+            self._sep = sep
+
+    def _keep(self, o0: int, o1: int, text: str, replace: bool = False) -> None:
+        cb = self.canon_len
+        if o0 > self._gap:
+            sep = self._sep if cb else ""
+            self._emit("replace" if sep else "delete", self._gap, o0, cb, cb + len(sep))
+            if sep:
+                self.texts.append(sep)
+                cb = self.canon_len = cb + len(sep)
+        self._sep = ""
+        if replace:
+            self._emit("replace", o0, o1, cb, cb + len(text))
+            canon = text
+        else:
+            emit = self._emit
+            def shifted(kind, a, b, c, d):
+                emit(kind, a + o0, b + o0, c + cb, d + cb)
+            canon = canonicalize(text, self.form, shifted, self.per_char, self.fast, bom=False)
+        self.texts.append(canon)
+        self.canon_len += len(canon)
+        self._gap = o1
+
+def parse_html(source: Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]], *, encoding: str = "utf-8",
+               compact: bool = False, form: str = "NFC", fast: bool = True, doc_id: Optional[str] = None,
+               chunk_size: int = 1 << 20) -> Tuple[RawDocument, CanonicalDocument, str]:
+    """
+    Streaming HTML -> canonical text. Tokenizes incrementally (no DOM), drops
+    script/style/nav/noscript/template content, collapses inter-word whitespace
+    outside <pre>, decodes entities, and separates block elements by a blank
+    line. The alignment covers every source char, so AlignmentIndex maps
+    canonical spans back to original byte offsets.
+    """
+    b = _HtmlBuilder(compact, form, fast)
+    dec = codecs.getincrementaldecoder(encoding)(errors="strict")
+    h = hashlib.sha1()
+    nbytes = 0
+    origs: List[str] = []
+    for data in iter_byte_chunks(source, chunk_size):
+        if doc_id is None:
+            h.update(data)
+        nbytes += len(data)
+        text = dec.decode(data, False)
+        if text:
+            origs.append(text)
+            b.feed_text(text)
+    text = dec.decode(b"", True)
+    if text:
+        origs.append(text)
+        b.feed_text(text)
+    b.finish()
+    raw, can = build_documents(doc_id or f"doc-{h.hexdigest()[:10]}", "text/html", encoding, nbytes,
+                               b.ops, b.fed, "".join(b.texts))
+    return raw, can, "".join(origs)
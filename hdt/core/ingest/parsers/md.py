@@ -1,8 +1,8 @@
 ﻿from __future__ import annotations
-from ..normalizer import normalize_bytes
+from ..source import open_source
+from .auto import parse_source
 
 def parse_md(path: str):
-    with open(path, "rb") as f:
-        raw = f.read()
-    # Treat markdown as text; normalization handles CR/LF, NBSP, BOM, etc.
-    return normalize_bytes(raw, media_type="text/markdown", encoding="utf-8")
+    # Markdown is normalized as text; canonical.blocks tags each top-level block.
+    with open_source(path) as src:
+        return parse_source(src, media_type="text/markdown", encoding="utf-8")
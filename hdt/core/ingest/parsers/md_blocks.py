@@ -0,0 +1,63 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, List
+import re
+from markdown_it import MarkdownIt
+
+_BLOCK_TYPES = {
+    "heading_open": "heading", "paragraph_open": "paragraph",
+    "bullet_list_open": "list", "ordered_list_open": "list", "blockquote_open": "blockquote",
+    "fence": "code", "code_block": "code", "table_open": "table", "html_block": "html", "hr": "hr",
+}
+_FRONT_MATTER_RE = re.compile(r"\A---[ \t]*\n.*?^(?:---|\.\.\.)[ \t]*(?:\n|\Z)", re.S | re.M)
+_REF_DEF_RE = re.compile(r"[ ]{0,3}\[[^\]]+\]:")
+
+@lru_cache(maxsize=1)
+def _md() -> MarkdownIt:
+    return MarkdownIt("commonmark").enable("table")
+
+def markdown_blocks(text: str) -> List[Dict[str, object]]:
+    """
+    Top-level Markdown blocks of canonical text as {"start", "end", "type"}
+    (canonical char offsets, trailing whitespace trimmed). Types: heading,
+    paragraph, list, blockquote, code, table, html, hr, front_matter, reference.
+    """
+    blocks: List[Dict[str, object]] = []
+    base = 0
+    fm = _FRONT_MATTER_RE.match(text)
+    if fm:
+        blocks.append({"start": 0, "end": len(text[:fm.end()].rstrip()), "type": "front_matter"})
+        base = fm.end()
+    body = text[base:]
+    starts = [0]
+    starts.extend(m.end() for m in re.finditer("\n", body))
+    starts.append(len(body))
+    nlines = len(starts) - 1
+
+    def add(l0: int, l1: int, kind: str) -> None:
+        s, e = starts[min(l0, nlines)], starts[min(l1, nlines)]
+        blocks.append({"start": base + s, "end": base + max(s, len(body[:e].rstrip())), "type": kind})
+
+    def refs(line: int, stop: int) -> None:
+        # Link reference definitions are consumed by the parser without a token.
+        while line < stop:
+            if _REF_DEF_RE.match(body, starts[line], starts[line + 1]):
+                end = line + 1
+                while end < stop and body[starts[end]:starts[end + 1]].strip():
+                    end += 1
+                add(line, end, "reference")
+                line = end
+            else:
+                line += 1
+
+    covered = 0
+    for tok in _md().parse(body):
+        kind = _BLOCK_TYPES.get(tok.type)
+        if kind is None or tok.level != 0 or not tok.map:
+            continue
+        l0, l1 = tok.map
+        refs(covered, l0)
+        add(l0, l1, kind)
+        covered = l1
+    refs(covered, nlines)
+    return blocks
@@ -1,8 +1,145 @@
 ﻿from __future__ import annotations
-from typing import Tuple
-from ..normalizer import normalize_bytes
-from ..schema_ingest import RawDocument, CanonicalDocument
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+import codecs, hashlib, re
+from ..normalizer import canonicalize, build_documents, iter_byte_chunks
+from ...schema_ingest import RawDocument, CanonicalDocument, CompactOps, CueTable, SpanOp
 
-def parse_srt(raw_bytes: bytes, *, encoding: str = "utf-8") -> Tuple[RawDocument, CanonicalDocument, str]:
-    return normalize_bytes(raw_bytes, media_type="text/srt", encoding=encoding)
+_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})"
+_TIMING_RE = re.compile(rf"^\s*{_TIME}\s*-->\s*{_TIME}")
+_LINE_RE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)")
 
+def _ms(h: Optional[str], m: str, s: str, f: str) -> int:
+    return ((int(h or 0) * 60 + int(m)) * 60 + int(s)) * 1000 + int(f.ljust(3, "0"))
+
+def format_ms(ms: int) -> str:
+    """HH:MM:SS.mmm"""
+    s, f = divmod(int(ms), 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}.{f:03d}"
+
+def _iter_lines(chunks: Iterable[bytes], encoding: str) -> Iterator[str]:
+    """Decoded lines with their terminators; concatenated they equal the decoded input."""
+    dec = codecs.getincrementaldecoder(encoding)(errors="strict")
+    buf = ""
+    for data in chunks:
+        buf += dec.decode(data, False)
+        pos = 0
+        for m in _LINE_RE.finditer(buf):
+            if m.end() == len(buf) and buf.endswith("\r"):
+                break  # may be the first half of CRLF
+            yield m.group()
+            pos = m.end()
+        buf = buf[pos:]
+    buf += dec.decode(b"", True)
+    pos = 0
+    for m in _LINE_RE.finditer(buf):
+        yield m.group()
+        pos = m.end()
+    if pos < len(buf):
+        yield buf[pos:]
+
+class _CueBuilder:
+    """Keeps cue text, drops numbering/timing/header lines as alignment ops."""
+    def __init__(self, compact: bool, form: str, fast: bool):
+        self.form, self.fast, self.per_char = form, fast, not compact
+        self.ops: Union[CompactOps, List[SpanOp]] = CompactOps() if compact else []
+        self.cues = CueTable()
+        self.texts: List[str] = []
+        self.origs: List[str] = []
+        self.orig_len = 0
+        self.canon_len = 0
+        self.gap_start = 0
+        self.timing: Optional[Tuple[int, int]] = None
+        self.body: List[str] = []
+        self.body_start = 0
+
+    def line(self, line: str) -> None:
+        off = self.orig_len
+        self.origs.append(line)
+        self.orig_len += len(line)
+        content = line.rstrip("\r\n")
+        if self.timing is not None:
+            if content.strip():
+                if not self.body:
+                    self.body_start = off
+                self.body.append(line)
+                return
+            self._finish_cue()
+            return
+        m = _TIMING_RE.match(content)
+        if m:
+            g = m.groups()
+            self.timing = (_ms(*g[:4]), _ms(*g[4:]))
+
+    def _finish_cue(self) -> None:
+        timing, self.timing = self.timing, None
+        if not self.body:
+            return
+        piece = "".join(self.body).rstrip("\r\n")
+        self.body = []
+        ts = self.body_start
+        if ts > self.gap_start:
+            self._gap(self.gap_start, ts)
+        cb = self.canon_len
+        canon = canonicalize(piece, self.form, self._emitter(ts, cb), self.per_char, self.fast, bom=False)
+        self.texts.append(canon)
+        self.canon_len += len(canon)
+        self.cues.append(timing[0], timing[1], cb, self.canon_len)
+        self.gap_start = ts + len(piece)
+
+    def _emitter(self, ob: int, cb: int):
+        add = self._add
+        def emit(kind, o0, o1, c0, c1):
+            add(kind, o0 + ob, o1 + ob, c0 + cb, c1 + cb)
+        return emit
+
+    def _gap(self, o0: int, o1: int) -> None:
+        # Cue separator: the skipped lines become one paragraph break between cues.
+        if self.canon_len:
+            self._add("replace", o0, o1, self.canon_len, self.canon_len + 2)
+            self.texts.append("\n\n")
+            self.canon_len += 2
+        else:
+            self._add("delete", o0, o1, 0, 0)
+
+    def _add(self, kind: str, o0: int, o1: int, c0: int, c1: int) -> None:
+        if isinstance(self.ops, CompactOps):
+            self.ops.append(kind, o0, o1, c0, c1)
+        else:
+            self.ops.append(SpanOp(kind=kind, orig=(o0, o1), canon=(c0, c1)))
+
+    def close(self) -> None:
+        if self.timing is not None:
+            self._finish_cue()
+        if self.orig_len > self.gap_start:
+            self._add("delete", self.gap_start, self.orig_len, self.canon_len, self.canon_len)
+
+def parse_srt(source: Union[bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]], *, encoding: str = "utf-8",
+              media_type: str = "text/srt", compact: bool = False, form: str = "NFC", fast: bool = True,
+              doc_id: Optional[str] = None, chunk_size: int = 1 << 20) -> Tuple[RawDocument, CanonicalDocument, str]:
+    """
+    Streaming SRT / WebVTT parser. Canonical text holds only cue text (normalized
+    as in normalize_bytes), cues separated by a blank line; cue numbers, timing
+    lines and WEBVTT/NOTE/STYLE blocks are delete/replace ops in the alignment.
+    can.cues maps each cue's [start_ms, end_ms) to its canonical span.
+    """
+    b = _CueBuilder(compact, form, fast)
+    h = hashlib.sha1()
+    nbytes = 0
+
+    def chunks() -> Iterator[bytes]:
+        nonlocal nbytes
+        for data in iter_byte_chunks(source, chunk_size):
+            if doc_id is None:
+                h.update(data)
+            nbytes += len(data)
+            yield data
+
+    for line in _iter_lines(chunks(), encoding):
+        b.line(line)
+    b.close()
+    raw, can = build_documents(doc_id or f"doc-{h.hexdigest()[:10]}", media_type, encoding, nbytes,
+                               b.ops, b.orig_len, "".join(b.texts))
+    can.cues = b.cues
+    return raw, can, "".join(b.origs)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import hashlib, mmap, os
+
+MMAP_THRESHOLD = 1 << 20
+_HASH_SLICE = 1 << 20
+_DIGEST_CACHE_MAX = 4096
+
+# (realpath, size, mtime_ns) -> sha256 hex, filled whenever a file is read here.
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+def stat_key(path: Union[str, Path]) -> Optional[Tuple[str, int, int]]:
+    """(realpath, size, mtime_ns) identity of `path`, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+
+def cached_sha256(path: Union[str, Path]) -> Optional[str]:
+    """SHA-256 recorded when `path` was last read through open_source (None if unknown/stale)."""
+    key = stat_key(path)
+    return _DIGESTS.get(key) if key else None
+
+def remember_digest(key: Optional[Tuple[str, int, int]], digest: str) -> None:
+    """Record `digest` as the SHA-256 for a stat_key (no-op for None); read back by cached_sha256."""
+    if key is None:
+        return
+    if len(_DIGESTS) >= _DIGEST_CACHE_MAX:
+        _DIGESTS.pop(next(iter(_DIGESTS)))
+    _DIGESTS[key] = digest
+
+class SourceBuffer:
+    """
+    One read of an input file: `data` is a memoryview over the bytes (an mmap for
+    files >= MMAP_THRESHOLD), hashed once for doc_id (sha1) and provenance (sha256).
+    Use as a context manager; decode before close() since the mapping goes away.
+    """
+    __slots__ = ("path", "data", "sha1", "sha256", "_mm")
+
+    def __init__(self, path: Optional[str], data: memoryview, sha1: str, sha256: Optional[str], mm: Optional[mmap.mmap] = None):
+        self.path = path
+        self.data = data
+        self.sha1 = sha1
+        self.sha256 = sha256
+        self._mm = mm
+
+    @property
+    def doc_id(self) -> str:
+        return f"doc-{self.sha1[:10]}"
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def close(self) -> None:
+        self.data.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self) -> "SourceBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _digests(mv: memoryview, provenance: bool = True) -> Tuple[str, Optional[str]]:
+    h1 = hashlib.sha1()
+    h256 = hashlib.sha256() if provenance else None
+    for i in range(0, len(mv), _HASH_SLICE):
+        piece = mv[i:i + _HASH_SLICE]
+        h1.update(piece)
+        if h256 is not None:
+            h256.update(piece)
+    return h1.hexdigest(), (h256.hexdigest() if h256 is not None else None)
+
+def wrap_buffer(data, path: Optional[str] = None) -> SourceBuffer:
+    """SourceBuffer over in-memory bytes / bytearray / memoryview / mmap (no copy, sha1 only)."""
+    mv = memoryview(data).cast("B")
+    sha1, _ = _digests(mv, provenance=False)
+    return SourceBuffer(path, mv, sha1, None)
+
+def open_source(path: Union[str, Path], *, mmap_threshold: int = MMAP_THRESHOLD) -> SourceBuffer:
+    """Read `path` exactly once (memory-mapped when large) and hash it in the same pass."""
+    key = stat_key(path)
+    mm = None
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and size >= mmap_threshold:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mv = memoryview(mm)
+        else:
+            mv = memoryview(f.read())
+    sha1, sha256 = _digests(mv)
+    remember_digest(key, sha256)
+    return SourceBuffer(str(path), mv, sha1, sha256, mm)
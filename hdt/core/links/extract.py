@@ -12,8 +12,8 @@ _OPPOSE_STRONG = ("however", "nevertheless", "nonetheless", "in contrast")
 _OPPOSE_MODERATE = ("but ", "though ", "although", "yet ")
 _REFERENCE = ("see", "as noted", "according to", "as per", "per ", "refer", "reference", "cf.")
 
-def _match_any(text: str, keys: Tuple[str, ...]) -> List[str]:
-    t = text.lower()
+def _match_any(t: str, keys: Tuple[str, ...]) -> List[str]:
+    # t is already lowercased (once per statement)
     hits = [k.strip() for k in keys if k in t]
     return list(dict.fromkeys(hits))  # unique & preserve order
 
@@ -38,7 +38,8 @@ def extract_links(statements: List[Statement], threads: List[ThreadRow]) -> List
         refs: List[str] = []
         strength = "moderate"
 
-        text = st.text
+        # StatementRow serves a slice of the table's once-lowercased buffer
+        text = getattr(st, "lower", None) or st.text.lower()
         # Detect cues first
         s_strong = _match_any(text, _SUPPORT_STRONG)
         s_mod   = _match_any(text, _SUPPORT_MODERATE) if not s_strong else []
@@ -1,9 +1,12 @@
 ﻿from __future__ import annotations
-from typing import List, Dict, Any, Iterable
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
-import json, glob
+from contextlib import contextmanager
+import json, glob, tarfile, zipfile
 
 from .run import run_all_for_path
+from ..ingest.cache import IngestCache
+from .incremental import ResultStore, result_stamp, update_result
 
 def _asdict(x):
     return x.model_dump() if hasattr(x, "model_dump") else x
@@ -37,18 +40,63 @@ def write_outputs_per_doc(out_dir: Path, res: Dict[str, Any]) -> None:
         ("modal", "is_time_modality.jsonl"),
         ("evidential", "is_evidential.jsonl"),
         ("causal", "is_causal.jsonl"),
+        ("byte_spans", "byte_spans.jsonl"),
     ]:
         if key in res:
             _write_jsonl(out_dir / fname, res[key])
 
+_INPUT_EXTS = (".txt", ".md")
+_ARCHIVE_EXTS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.zst", ".tzst")
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(_ARCHIVE_EXTS)
+
+@contextmanager
+def _open_tar(path: str):
+    """Sequential (non-seeking) tar reader; .tar.zst needs the optional 'zstandard' package."""
+    if not path.lower().endswith((".tar.zst", ".tzst")):
+        with tarfile.open(path, mode="r|*") as tf:
+            yield tf
+        return
+    try:
+        import zstandard
+    except Exception as e:
+        raise RuntimeError(f"{path}: .tar.zst input needs the 'zstandard' package") from e
+    with open(path, "rb") as fh, zstandard.ZstdDecompressor().stream_reader(fh) as reader:
+        with tarfile.open(fileobj=reader, mode="r|") as tf:
+            yield tf
+
+def _iter_archive(path: str) -> Iterator[Tuple[str, bytes]]:
+    """Stream (member name, bytes) for archive members with an input extension, in archive order."""
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(_INPUT_EXTS):
+                    yield info.filename, zf.read(info)
+        return
+    with _open_tar(path) as tf:
+        for m in tf:
+            if m.isfile() and m.name.lower().endswith(_INPUT_EXTS):
+                f = tf.extractfile(m)
+                yield m.name, f.read()
+
+def _iter_sources(files: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """(input id, data): plain files yield (path, None); archives yield ("archive!member", bytes)."""
+    for f in files:
+        if is_archive(f):
+            for name, data in _iter_archive(f):
+                yield f"{f}!{name}", data
+        else:
+            yield f, None
+
 def _expand_inputs(inputs: List[str]) -> List[str]:
-    """Expand directories and globs into concrete file paths (.txt, .md)."""
+    """Expand directories and globs into concrete file paths (.txt, .md); archives are kept as-is."""
     paths: List[str] = []
     for a in inputs:
         p = Path(a)
         if p.is_dir():
-            paths.extend([str(x) for x in p.glob("*.txt")])
-            paths.extend([str(x) for x in p.glob("*.md")])
+            for ext in _INPUT_EXTS:
+                paths.extend([str(x) for x in p.glob(f"*{ext}")])
         elif any(ch in a for ch in "*?[]"):
             paths.extend(glob.glob(a))
         else:
@@ -61,18 +109,39 @@ def _expand_inputs(inputs: List[str]) -> List[str]:
             seen.add(x); uniq.append(x)
     return uniq
 
-def run_many(inputs: List[str], out_dir: str = "out") -> List[Dict[str, Any]]:
+def run_many(inputs: List[str], out_dir: str = "out", *, byte_offsets: bool = False,
+             ingest_cache: bool = True, prose_only: bool = False, incremental: bool = False,
+             segment_workers: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Process many inputs (files, dirs, or globs) and write per-document outputs to out/<doc_id>/.
+    Process many inputs (files, dirs, globs, or .zip/.tar/.tar.gz/.tar.zst archives)
+    and write per-document outputs to out/<doc_id>/. Archive members are streamed
+    straight into the parser and indexed as "archive!member".
     Returns an index list and writes out/index.json.
+    byte_offsets=True also writes byte_spans.jsonl (original byte span per statement).
+    ingest_cache=True reuses normalized documents from out/.cache/ingest across runs.
+    prose_only=True skips non-prose Markdown blocks (see run_all_for_path).
+    incremental=True diffs each input against its last result (out/.cache/incremental)
+    and reprocesses only the edited region (see incremental.update_result); a
+    normalizer or segmentation-rules change since that result forces a full run.
+    segment_workers: segment each very large input in a process pool (see
+    run_all_for_path); incremental runs use it for their full runs only.
     """
     files = _expand_inputs(inputs)
     root = Path(out_dir)
     root.mkdir(parents=True, exist_ok=True)
+    cache = IngestCache(root / ".cache" / "ingest") if ingest_cache else None
+    store = ResultStore(root / ".cache" / "incremental") if incremental else None
+    stamp = result_stamp() if incremental else None
 
     index: List[Dict[str, Any]] = []
-    for inp in files:
-        res = run_all_for_path(inp)
+    for inp, data in _iter_sources(files):
+        if store is not None:
+            res = update_result(store.load(inp, stamp), inp, data=data, byte_offsets=byte_offsets, cache=cache,
+                                prose_only=prose_only, segment_workers=segment_workers)
+            store.save(inp, res, stamp)
+        else:
+            res = run_all_for_path(inp, data=data, byte_offsets=byte_offsets, cache=cache, prose_only=prose_only,
+                                   segment_workers=segment_workers)
         doc_id = _doc_id_from_result(res)
         od = root / doc_id
         write_outputs_per_doc(od, res)
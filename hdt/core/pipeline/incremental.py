@@ -0,0 +1,306 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import hashlib, os, pickle
+
+from .run import _byte_spans, run_all_for_path
+from ..ingest.parsers.auto import parse_auto
+from ..ingest.cache import IngestCache
+from ..ingest.normalizer import NORMALIZER_VERSION
+from ..segment.engine import SegmentationEngine, compile_rules
+from ..segment.rules import _statement_id
+from ..segment.spans import Statement
+from ..amu.extract import ClauseRules, _amu_id, extract_amus, extract_clause_amus
+from ..topic.assign import assign_topics
+from ..topic.discover import TopicDiscovery
+from ..topic.memo import ScoreMemo
+from ..threads.build import _thread_id, build_threads
+from ..links.extract import extract_links
+from ..is_analysis.time_modality import analyze_time_modality
+from ..is_analysis.evidential import classify_evidence
+from ..is_analysis.causal import causal_from_links
+from ..trusted import construct_trusted, gc_paused
+
+_CHUNK = 1 << 12
+_RESYNC = 32   # chars past the edit before a re-found statement may resynchronize with the old list
+
+def common_affixes(a: str, b: str) -> Tuple[int, int]:
+    """(p, s) with a[:p] == b[:p], equal last s chars, and p + s <= min(len(a), len(b))."""
+    n = min(len(a), len(b))
+    p = 0
+    while p < n and a[p:p + _CHUNK] == b[p:p + _CHUNK]:
+        p += _CHUNK
+    p = min(p, n)
+    while p < n and a[p] == b[p]:
+        p += 1
+    m, la, lb, s = n - p, len(a), len(b), 0
+    while s < m:
+        w = min(_CHUNK, m - s)
+        if a[la - s - w:la - s] != b[lb - s - w:lb - s]:
+            break
+        s += w
+    while s < m and a[la - s - 1] == b[lb - s - 1]:
+        s += 1
+    return p, s
+
+def _patch(row, **fields) -> None:
+    # Field update on a row we own, without pydantic's per-attribute __setattr__ (values are already valid).
+    row.__dict__.update(fields)
+
+def _thread_index(thread_id: str) -> int:
+    return int(thread_id.rsplit("_T", 1)[1]) - 1
+
+def _run_start(rows, i: int) -> int:
+    tid = rows[i].Thread_ID
+    while i > 0 and rows[i - 1].Thread_ID == tid:
+        i -= 1
+    return i
+
+def _run_end(rows, i: int) -> int:
+    tid = rows[i].Thread_ID
+    while i < len(rows) and rows[i].Thread_ID == tid:
+        i += 1
+    return i
+
+def update_result(prev: Optional[Dict[str, Any]], path: str, *, data: Optional[bytes] = None,
+                  encoding: str = "utf-8", form: str = "NFC", cache: Optional[IngestCache] = None,
+                  rules: Optional[SegmentationEngine] = None, byte_offsets: bool = False,
+                  prose_only: bool = False, amu_rules: Optional[ClauseRules] = None,
+                  topic_memo: Optional[ScoreMemo] = None,
+                  topic_discovery: Optional[TopicDiscovery] = None,
+                  segment_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    run_all_for_path for an edited document, reusing `prev`: the result for the
+    previous version, or its ResultStore baseline, segmented with the same
+    rules. The canonical texts are diffed by common prefix/suffix; only
+    statements around the edit are re-segmented, and AMU/topic/IS rows are
+    recomputed for those alone. Threads are rebuilt over the topic runs
+    touching the edit, links over those runs plus the next statement.
+    Everything else is shifted to the new offsets and re-keyed to the new
+    doc_id. prev's rows are reused in place: do not use prev afterwards.
+    The new document is normalized with compact alignment. Falls back to a
+    full run without prev, with prose_only, or when prev holds a columnar
+    StatementTable; segment_workers applies to that full run only.
+    topic_discovery relabels the new AMUs only, with the model trained
+    further on them.
+    """
+    if prev is None or prose_only or not isinstance(prev["statements"], list):
+        return run_all_for_path(path, encoding=encoding, form=form, byte_offsets=byte_offsets, cache=cache,
+                                prose_only=prose_only, data=data, rules=rules, amu_rules=amu_rules,
+                                topic_memo=topic_memo, topic_discovery=topic_discovery, compact=True,
+                                segment_workers=segment_workers)
+    if data is not None:
+        raw, can, orig = parse_auto(data, path=path, encoding=encoding, form=form, cache=cache, compact=True)
+    else:
+        raw, can, orig = parse_auto(path, encoding=encoding, form=form, cache=cache, compact=True)
+    rules = rules or compile_rules()
+    t1 = prev["canonical_text"] if "canonical_text" in prev else prev["canonical"].canonical_text
+    t2 = can.canonical_text
+    doc_id = can.doc_id
+    p, s = common_affixes(t1, t2)
+    delta, q2 = len(t2) - len(t1), len(t2) - s
+    stmts1: List[Statement] = prev["statements"]
+    n1 = len(stmts1)
+
+    # Statements ending before the edit stand; the last of them is a sentence-end cursor
+    # unless it is the unterminated tail of the text.
+    k = bisect_left([st.end for st in stmts1], p)
+    if k == n1 and k:
+        k -= 1
+    lo = stmts1[k - 1].end if k else 0
+    starts1 = [st.start for st in stmts1]
+    fresh: List[Tuple[int, int]] = []
+    j = n1
+    for a, b in rules.sentences(t2, lo):
+        if a >= q2 + _RESYNC:
+            i = bisect_left(starts1, a - delta, k)
+            if i < n1 and starts1[i] == a - delta and stmts1[i].end == b - delta:
+                j = i
+                break
+        fresh.append((a, b))
+
+    # Old row ranges: AMUs/topics follow statement order; one thread/link/IS row per statement.
+    amus1, topics1 = prev["amus"], prev["topics"]
+    prefix_ids = {st.id for st in stmts1[:k]}
+    suffix_ids = {st.id for st in stmts1[j:]}
+    ak = 0
+    while ak < len(amus1) and amus1[ak].Parent_Statement_ID in prefix_ids:
+        ak += 1
+    aj = len(amus1)
+    while aj > ak and amus1[aj - 1].Parent_Statement_ID in suffix_ids:
+        aj -= 1
+    threads1, links1 = prev["threads"], prev["links"]
+    a_old = _run_start(threads1, k - 1) if k else 0
+    b_old = _run_end(threads1, j) if j < n1 else n1
+
+    # Statements: re-key the prefix, shift the suffix, build the middle.
+    id_map: Dict[str, str] = {}
+    for st in stmts1[:k]:
+        id_map[st.id] = new = _statement_id(doc_id, st.start, st.end)
+        _patch(st, id=new)
+    for st in stmts1[j:]:
+        a, b = st.start + delta, st.end + delta
+        id_map[st.id] = new = _statement_id(doc_id, a, b)
+        _patch(st, id=new, start=a, end=b)
+    mid = [Statement.trusted(_statement_id(doc_id, a, b), a, b, t2[a:b]) for a, b in fresh]
+    stmts = stmts1[:k] + mid + stmts1[j:]
+    shift = k + len(mid) - j   # new index = old index + shift, for suffix statements
+
+    amu_map: Dict[str, str] = {}
+    for i, a in enumerate(amus1[:ak] + amus1[aj:]):
+        d = delta if i >= ak else 0
+        parent, c0, c1 = id_map[a.Parent_Statement_ID], a.Char_Start + d, a.Char_End + d
+        amu_map[a.AMU_ID] = new = _amu_id(parent, c0, c1)
+        _patch(a, AMU_ID=new, Parent_Statement_ID=parent, Char_Start=c0, Char_End=c1)
+    for t in topics1[:ak] + topics1[aj:]:
+        _patch(t, AMU_ID=amu_map[t.AMU_ID])
+    mid_amus = extract_clause_amus(mid, amu_rules) if amu_rules is not None else extract_amus(mid)
+    amus = amus1[:ak] + mid_amus + amus1[aj:]
+    mid_topics = assign_topics(mid_amus, memo=topic_memo)
+    if topic_discovery is not None:
+        mid_topics = topic_discovery.relabel(mid_amus, mid_topics)
+    topics = topics1[:ak] + mid_topics + topics1[aj:]
+
+    # Threads: rebuild the runs touching the edit, renumber the rest.
+    a0, b0 = a_old, b_old + shift
+    first = _thread_index(threads1[a_old].Thread_ID) if a_old < n1 else 0
+    region = stmts[a0:b0]
+    amu_starts = [x.Char_Start for x in amus]
+    r_lo = bisect_left(amu_starts, region[0].start) if region else 0
+    r_hi = bisect_left(amu_starts, region[-1].end) if region else 0
+    mid_rows = build_threads(region, amus[r_lo:r_hi], topics[r_lo:r_hi], start_index=first)
+    old_count = (_thread_index(threads1[b_old - 1].Thread_ID) + 1 - first) if b_old > a_old else 0
+    new_count = len({r.Thread_ID for r in mid_rows})
+    for i, r in enumerate(threads1[:a_old] + threads1[b_old:]):
+        idx = _thread_index(r.Thread_ID) + (new_count - old_count if i >= a_old else 0)
+        _patch(r, Statement_Text_ID=id_map[r.Statement_Text_ID], Thread_ID=_thread_id(doc_id, idx))
+    threads = threads1[:a_old] + mid_rows + threads1[b_old:]
+
+    # Links: same runs plus the statement right after them (its global predecessor changed).
+    l_hi = min(b0 + 1, len(stmts))
+    ctx = 1 if a0 else 0
+    mid_links = extract_links(stmts[a0 - ctx:l_hi], threads[a0 - ctx:l_hi])[ctx:]
+    kept_links = links1[:a_old] + links1[min(b_old + 1, n1):]
+    for r in kept_links:
+        _patch(r, Statement_Text_ID=id_map[r.Statement_Text_ID],
+               Supports_IDs=[id_map.get(x, x) for x in r.Supports_IDs],
+               Opposes_IDs=[id_map.get(x, x) for x in r.Opposes_IDs],
+               References_IDs=[id_map.get(x, x) for x in r.References_IDs])
+    links = links1[:a_old] + mid_links + links1[min(b_old + 1, n1):]
+
+    # Causal rows are one per link row, numbered by position.
+    causal1 = prev["causal"]
+    causal = causal1[:a_old] + causal_from_links(mid_links) + causal1[min(b_old + 1, n1):]
+    for i in range(a_old, len(causal)):
+        causal[i]["SCM_Node_ID"] = f"N{i + 1}"
+
+    def is_rows(rows1, fresh_rows):
+        kept = rows1[:k] + rows1[j:]
+        for r in kept:
+            r["statement_id"] = id_map[r["statement_id"]]
+        return rows1[:k] + fresh_rows + rows1[j:]
+
+    res = {
+        "raw": raw,
+        "canonical": can,
+        "statements": stmts,
+        "amus": amus,
+        "topics": topics,
+        "threads": threads,
+        "links": links,
+        "modal": is_rows(prev["modal"], analyze_time_modality(mid)),
+        "evidential": is_rows(prev["evidential"], classify_evidence(mid)),
+        "causal": causal,
+        "incremental": {"dirty": [p, q2], "reused": k + n1 - j, "resegmented": len(mid),
+                        "threads_rebuilt": len(region), "links_rebuilt": len(mid_links)},
+    }
+    if topic_memo is not None:
+        res["topic_memo"] = topic_memo.stats()
+    if byte_offsets:
+        res["byte_spans"] = _byte_spans(raw, can, orig, stmts)
+    return res
+
+def result_stamp(form: str = "NFC", rules: Optional[SegmentationEngine] = None,
+                 amu_rules: Optional[ClauseRules] = None) -> str:
+    """What a stored result depends on besides its text: normalizer version, form and rule fingerprints."""
+    rules = rules or compile_rules()
+    return f"{NORMALIZER_VERSION}|{form}|{rules.fingerprint}|{amu_rules.fingerprint if amu_rules else '-'}"
+
+def _to_columns(rows: List[Any]) -> Optional[Tuple[Any, Tuple[str, ...], List[List[Any]]]]:
+    """(row type, field names, one list per field) for model or dict rows of one shape."""
+    if not rows:
+        return None
+    first = rows[0]
+    if isinstance(first, dict):
+        names = tuple(first)
+        if any(tuple(r) != names for r in rows):
+            return None, (), [list(rows)]
+        return dict, names, [[r[k] for r in rows] for k in names]
+    names = tuple(type(first).model_fields)
+    return type(first), names, [[r.__dict__[k] for r in rows] for k in names]
+
+def _from_columns(packed: Optional[Tuple[Any, Tuple[str, ...], List[List[Any]]]]) -> List[Any]:
+    if packed is None:
+        return []
+    cls, names, cols = packed
+    if cls is None:
+        return cols[0]
+    if cls is dict:
+        return [dict(zip(names, vals)) for vals in zip(*cols)]
+    with gc_paused():
+        return [construct_trusted(cls, dict(zip(names, vals))) for vals in zip(*cols)]
+
+_ROW_KEYS = ("amus", "topics", "threads", "links", "modal", "evidential", "causal")
+
+class ResultStore:
+    """
+    Baseline for update_result per input id, pickled under `root`: the
+    canonical text, statement offsets and every row list as columns (no raw
+    document or alignment). Entries are stamped (result_stamp); load() with a
+    different stamp misses, so a normalizer or rules change forces a full run.
+    """
+    def __init__(self, root: Union[str, Path] = Path("out") / ".cache" / "incremental"):
+        self.root = Path(root)
+
+    def _path(self, input_id: str) -> Path:
+        return self.root / f"{hashlib.sha1(input_id.encode('utf-8')).hexdigest()}.pkl"
+
+    def load(self, input_id: str, stamp: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._path(input_id).open("rb") as f:
+                snap = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if not isinstance(snap, dict) or snap.get("stamp") != stamp:
+            return None
+        text, doc_id = snap["text"], snap["doc_id"]
+        with gc_paused():
+            stmts = [Statement.trusted(_statement_id(doc_id, a, b), a, b, text[a:b])
+                     for a, b in zip(snap["starts"], snap["ends"])]
+        prev: Dict[str, Any] = {"canonical_text": text, "statements": stmts}
+        for key in _ROW_KEYS:
+            prev[key] = _from_columns(snap[key])
+        return prev
+
+    def save(self, input_id: str, res: Dict[str, Any], stamp: str) -> None:
+        can, stmts = res["canonical"], res["statements"]
+        snap: Dict[str, Any] = {
+            "stamp": stamp,
+            "doc_id": can.doc_id,
+            "text": can.canonical_text,
+            "starts": array("q", [st.start for st in stmts]),
+            "ends": array("q", [st.end for st in stmts]),
+        }
+        for key in _ROW_KEYS:
+            snap[key] = _to_columns(res[key])
+        p = self._path(input_id)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(".tmp")
+            with tmp.open("wb") as f:
+                pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, p)
+        except OSError:
+            pass
@@ -1,29 +1,67 @@
 ﻿from __future__ import annotations
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..ingest.parsers.auto import parse_auto
-from ..segment.rules import segment_document
-from ..amu.extract import extract_amus
+from ..ingest.alignment import AlignmentIndex, compute_byte_starts
+from ..ingest.cache import IngestCache
+from ..schema_ingest import NON_PROSE_BLOCKS
+from ..segment.engine import SegmentationEngine
+from ..segment.rules import segment_document, segment_table
+from ..amu.extract import ClauseRules, extract_amus, extract_clause_amus
 from ..topic.assign import assign_topics
+from ..topic.discover import TopicDiscovery
+from ..topic.memo import ScoreMemo
 from ..threads.build import build_threads
 from ..links.extract import extract_links
 from ..is_analysis.time_modality import analyze_time_modality
 from ..is_analysis.evidential import classify_evidence
 from ..is_analysis.causal import causal_from_links
 
-def run_all_for_path(path: str, *, encoding: str = "utf-8") -> Dict[str, Any]:
-    data = open(path, "rb").read()
-    raw, can, _orig = parse_auto(data, encoding=encoding, path=path)
-    stmts = segment_document(can)
-    amus = extract_amus(stmts)
-    topics = assign_topics(amus)
+def _byte_spans(raw, can, orig: str, stmts) -> List[Dict[str, Any]]:
+    """Original byte offsets for every statement, resolved in one bulk pass."""
+    idx = AlignmentIndex(can.alignment, compute_byte_starts(orig, raw.encoding))
+    b0, b1 = idx.inverse_bytes_many([s.start for s in stmts], [s.end for s in stmts])
+    return [{"Statement_Text_ID": s.id, "Byte_Start": a, "Byte_End": b} for s, a, b in zip(stmts, b0, b1)]
+
+def run_all_for_path(path: str, *, encoding: str = "utf-8", form: str = "NFC",
+                     byte_offsets: bool = False, cache: Optional[IngestCache] = None,
+                     prose_only: bool = False, data: Optional[bytes] = None,
+                     rules: Optional[SegmentationEngine] = None,
+                     segment_workers: Optional[int] = None, columnar: bool = False,
+                     amu_rules: Optional[ClauseRules] = None,
+                     topic_memo: Optional[ScoreMemo] = None,
+                     topic_discovery: Optional[TopicDiscovery] = None,
+                     compact: bool = False) -> Dict[str, Any]:
+    """
+    prose_only=True drops non-prose blocks (code, tables, front matter, ...) before segmentation.
+    data: the input bytes when they do not live at `path` (e.g. an archive member);
+    `path` then only names the input and picks the media type.
+    rules: compiled segmentation_rules guide (segment.engine.engine_for); defaults otherwise.
+    segment_workers: segment very large documents in a process pool (see segment_document).
+    columnar=True returns statements as a StatementTable (one text buffer, array columns).
+    amu_rules: compiled amu_rules guide (amu.extract.clause_rules_for); clause-level AMUs
+    when given, one AMU per statement otherwise.
+    topic_memo: a ScoreMemo shared across runs; its hit/miss counts go to res["topic_memo"].
+    topic_discovery: moves AMUs left in "general" to discovered topics before threading.
+    compact=True keeps the canonical alignment as run-length CompactOps (see parse_auto).
+    """
+    if data is not None:
+        raw, can, orig = parse_auto(data, path=path, encoding=encoding, form=form, cache=cache, compact=compact)
+    else:
+        raw, can, orig = parse_auto(path, encoding=encoding, form=form, cache=cache, compact=compact)
+    segment = segment_table if columnar else segment_document
+    stmts = segment(can, exclude=NON_PROSE_BLOCKS if prose_only else None, rules=rules, workers=segment_workers)
+    amus = extract_clause_amus(stmts, amu_rules) if amu_rules is not None else extract_amus(stmts)
+    topics = assign_topics(amus, memo=topic_memo)
+    if topic_discovery is not None:
+        topics = topic_discovery.relabel(amus, topics)
     threads = build_threads(stmts, amus, topics)
     links = extract_links(stmts, threads)
     modal = analyze_time_modality(stmts)
     evid = classify_evidence(stmts)
     causal = causal_from_links(links)
 
-    return {
+    res = {
         "raw": raw,
         "canonical": can,
         "statements": stmts,
@@ -35,3 +73,8 @@ def run_all_for_path(path: str, *, encoding: str = "utf-8") -> Dict[str, Any]:
         "evidential": evid,
         "causal": causal,
     }
+    if topic_memo is not None:
+        res["topic_memo"] = topic_memo.stats()
+    if byte_offsets:
+        res["byte_spans"] = _byte_spans(raw, can, orig, stmts)
+    return res
@@ -1,6 +1,7 @@
 ﻿from __future__ import annotations
 from pathlib import Path
 import hashlib, datetime as dt
+from .ingest.source import cached_sha256
 
 def _to_dict(x):
     if isinstance(x, dict): return x
@@ -24,6 +25,9 @@ def _round01(x, nd=2):
 
 def file_sha256(p: str|Path) -> str:
     p = Path(p)
+    cached = cached_sha256(p)
+    if cached:
+        return cached
     h = hashlib.sha256()
     with open(p, "rb") as f:
         for chunk in iter(lambda: f.read(65536), b""):
@@ -45,7 +49,7 @@ def stamp_rows(rows, panel: dict, source_path: str|Path, step_name: str, step_ve
     sv              = str(provd.get("Schema_Version", "1.1"))
     src = Path(source_path)
     ts  = dt.datetime.now(dt.timezone.utc).isoformat()
-    sha = file_sha256(source_path) if Path(source_path).exists() else ""
+    sha = file_sha256(src) if src.exists() else ""
     steps = [{"name": step_name, "version": step_version}]
     out = []
     for r in rows:
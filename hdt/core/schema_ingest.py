@@ -1,19 +1,193 @@
 from __future__ import annotations
-from typing import List, Optional, Literal, Dict
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Iterator, List, Optional, Literal, Dict, Sequence, Tuple, Union
 from pydantic import BaseModel, Field
+from pydantic_core import core_schema
 
 SpanKind = Literal["keep", "delete", "insert", "replace"]
 
+_KINDS: Tuple[str, ...] = ("keep", "delete", "insert", "replace")
+_KIND_CODE: Dict[str, int] = {k: i for i, k in enumerate(_KINDS)}
+
 class SpanOp(BaseModel):
     """A delta from original-decoded text (char indices) to canonical text (char indices)."""
     kind: SpanKind
     orig: tuple[int, int]        # [start,end) in original *decoded* text (char indices)
     canon: tuple[int, int]       # [start,end) in canonical text (char indices)
 
+class CompactOps:
+    """
+    Array-backed op list: one kind code plus four int columns per op.
+    With merge_keeps=True, adjacent keeps collapse into a single run, so size
+    grows with the number of edits rather than the length of the text.
+    Indexing/iteration yields SpanOp for callers written against List[SpanOp].
+    """
+    __slots__ = ("kinds", "o0", "o1", "c0", "c1", "merge_keeps")
+
+    def __init__(self, merge_keeps: bool = True):
+        self.kinds = array("b")
+        self.o0 = array("q"); self.o1 = array("q")
+        self.c0 = array("q"); self.c1 = array("q")
+        self.merge_keeps = merge_keeps
+
+    def append(self, kind: str, o0: int, o1: int, c0: int, c1: int) -> None:
+        code = _KIND_CODE[kind]
+        if (code == 0 and self.merge_keeps and self.kinds and self.kinds[-1] == 0
+                and self.o1[-1] == o0 and self.c1[-1] == c0):
+            self.o1[-1] = o1
+            self.c1[-1] = c1
+            return
+        self.kinds.append(code)
+        self.o0.append(o0); self.o1.append(o1)
+        self.c0.append(c0); self.c1.append(c1)
+
+    def extend(self, ops) -> None:
+        for kind, o0, o1, c0, c1 in iter_raw_ops(ops):
+            self.append(kind, o0, o1, c0, c1)
+
+    def iter_raw(self) -> Iterator[Tuple[str, int, int, int, int]]:
+        """Yield (kind, o0, o1, c0, c1) tuples without building models."""
+        for k, a, b, c, d in zip(self.kinds, self.o0, self.o1, self.c0, self.c1):
+            yield _KINDS[k], a, b, c, d
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, i: int) -> SpanOp:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return SpanOp.model_construct(
+            kind=_KINDS[self.kinds[i]],
+            orig=(self.o0[i], self.o1[i]),
+            canon=(self.c0[i], self.c1[i]),
+        )
+
+    def __iter__(self) -> Iterator[SpanOp]:
+        for kind, a, b, c, d in self.iter_raw():
+            yield SpanOp.model_construct(kind=kind, orig=(a, b), canon=(c, d))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactOps):
+            return list(self.iter_raw()) == list(other.iter_raw())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompactOps(n={len(self)})"
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Same shape as [op.model_dump() for op in ops]."""
+        return [{"kind": k, "orig": (a, b), "canon": (c, d)} for k, a, b, c, d in self.iter_raw()]
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any):
+        def _check(v: Any) -> "CompactOps":
+            if isinstance(v, cls):
+                return v
+            raise ValueError("expected CompactOps")
+        return core_schema.no_info_plain_validator_function(
+            _check,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda v: v.to_list()),
+        )
+
+def iter_raw_ops(ops) -> Iterator[Tuple[str, int, int, int, int]]:
+    """Uniform (kind, o0, o1, c0, c1) view over CompactOps or a list of SpanOp."""
+    if isinstance(ops, CompactOps):
+        yield from ops.iter_raw()
+        return
+    for op in ops:
+        yield op.kind, op.orig[0], op.orig[1], op.canon[0], op.canon[1]
+
+class CueTable:
+    """
+    Timed cues of a subtitle document as parallel int arrays: start/end in ms and
+    the cue's [c0, c1) span in canonical text. Cues are stored in file order;
+    when starts are non-decreasing (the normal case) time queries are O(log n).
+    """
+    __slots__ = ("start_ms", "end_ms", "c0", "c1", "_maxend")
+
+    def __init__(self):
+        self.start_ms = array("q"); self.end_ms = array("q")
+        self.c0 = array("q"); self.c1 = array("q")
+        self._maxend: Optional[array] = None
+
+    def append(self, start_ms: int, end_ms: int, c0: int, c1: int) -> None:
+        self.start_ms.append(start_ms); self.end_ms.append(end_ms)
+        self.c0.append(c0); self.c1.append(c1)
+        self._maxend = None
+
+    def __len__(self) -> int:
+        return len(self.start_ms)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CueTable):
+            return self.to_list() == other.to_list()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CueTable(n={len(self)})"
+
+    def _ordered(self) -> bool:
+        s = self.start_ms
+        return all(s[i] <= s[i + 1] for i in range(len(s) - 1))
+
+    def cues_in_range(self, t0: int, t1: int) -> List[int]:
+        """Indices of cues overlapping [t0, t1) ms."""
+        if self._maxend is None:
+            self._maxend = array("q", accumulate(self.end_ms, max)) if self._ordered() else array("q")
+        if len(self._maxend) != len(self):
+            return [i for i in range(len(self)) if self.start_ms[i] < t1 and self.end_ms[i] > t0]
+        lo = bisect_right(self._maxend, t0)
+        hi = bisect_left(self.start_ms, t1, lo)
+        return [i for i in range(lo, hi) if self.end_ms[i] > t0]
+
+    def canon_span(self, t0: int, t1: int) -> Optional[Tuple[int, int]]:
+        """Canonical [start, end) covering every cue in [t0, t1) ms, or None."""
+        idx = self.cues_in_range(t0, t1)
+        if not idx:
+            return None
+        return min(self.c0[i] for i in idx), max(self.c1[i] for i in idx)
+
+    def times_for_span(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """(start_ms, end_ms) of the cues whose text overlaps canonical [start, end)."""
+        lo = bisect_right(self.c1, start)
+        hi = bisect_left(self.c0, end, lo)
+        if lo >= hi:
+            return None
+        return min(self.start_ms[lo:hi]), max(self.end_ms[lo:hi])
+
+    def statements_in_range(self, statements: Sequence[Any], t0: int, t1: int) -> Sequence[Any]:
+        """Slice of `statements` (sorted, with .start/.end) overlapping cues in [t0, t1) ms."""
+        span = self.canon_span(t0, t1)
+        if span is None:
+            return statements[:0]
+        lo = bisect_right(statements, span[0], key=lambda st: st.end)
+        hi = bisect_left(statements, span[1], lo, key=lambda st: st.start)
+        return statements[lo:hi]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [{"start_ms": a, "end_ms": b, "canon": (c, d)}
+                for a, b, c, d in zip(self.start_ms, self.end_ms, self.c0, self.c1)]
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any):
+        def _check(v: Any) -> "CueTable":
+            if isinstance(v, cls):
+                return v
+            raise ValueError("expected CueTable")
+        return core_schema.no_info_plain_validator_function(
+            _check,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda v: v.to_list()),
+        )
+
+# Block types that carry no prose statements (skipped when segmenting prose only).
+NON_PROSE_BLOCKS = frozenset({"code", "table", "html", "hr", "front_matter", "reference"})
+
 class Alignment(BaseModel):
     """Char-index level alignment between original-decoded text and canonical text."""
     version: str = "v1"
-    ops: List[SpanOp]
+    ops: Union[CompactOps, List[SpanOp]] = Field(union_mode="left_to_right")
     encoding: str = "utf-8"
     orig_len: int
     canon_len: int
@@ -31,3 +205,7 @@ class CanonicalDocument(BaseModel):
     # Optional: simple language blocks; v1 we keep one block until detection is added.
     lang_blocks: List[Dict[str, object]] = Field(default_factory=list)
     alignment: Alignment
+    # Subtitle sources (SRT/WebVTT): cue timings aligned to canonical spans.
+    cues: Optional[CueTable] = None
+    # Structured sources (Markdown): top-level blocks as {"start", "end", "type"}.
+    blocks: List[Dict[str, object]] = Field(default_factory=list)
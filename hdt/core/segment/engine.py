@@ -0,0 +1,195 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib, json
+import regex as re
+
+DEFAULT_ABBREVIATIONS = (
+    "e.g.", "i.e.", "cf.", "vs.", "viz.", "approx.", "Dr.", "Mr.", "Mrs.", "Ms.", "Prof.", "Sr.", "Jr.",
+    "St.", "No.", "Fig.", "Art.", "Sec.", "Inc.", "Ltd.", "Co.",
+)
+DEFAULT_RULES: Dict[str, Any] = {
+    "split_on_blank": True,
+    "min_len": 8,
+    "max_len": 600,
+    "speaker_pattern": None,
+    "sentence_enders": ".?!",
+    "abbreviations": list(DEFAULT_ABBREVIATIONS),
+}
+
+# Whitespace run; the same character set as str.isspace.
+_WS = re.compile("[\t\n\x0b\x0c\r\x1c-\x20\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]*")
+
+def guide_fingerprint(guide: Optional[Dict[str, Any]]) -> str:
+    """SHA-1 over the guide's canonical JSON (key order does not matter)."""
+    blob = json.dumps(guide or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+def control_fingerprint(controls: Any, name: str) -> Optional[str]:
+    """Cache key for guide `name` from a ControlStack / registry's file fingerprints (SHA-1), if listed."""
+    # ControlStack lists the step level before the global one, the same precedence as get_guide.
+    for fp in getattr(controls, "fingerprints", None) or []:
+        if fp.get("kind") == "guide" and fp.get("name") == name and fp.get("sha1"):
+            return f"file:{fp['sha1']}"
+    return None
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation factored along a character trie: ["Mr.", "Mrs."] -> 'Mr(?:\\.|s\\.)'.
+    Words are escaped; the result is a bare group body for re and regex alike
+    (also used by the AMU splitter and the topic keyword scorer).
+    """
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + emit(sub) for ch, sub in sorted(node.items()) if ch]
+        if "" in node:
+            return f"(?:{'|'.join(alts)})?" if alts else ""
+        return alts[0] if len(alts) == 1 else f"(?:{'|'.join(alts)})"
+
+    return emit(trie)
+
+class SegmentationEngine:
+    """
+    segmentation_rules.json compiled once. One combined pattern finds, in a
+    single left-to-right pass, blank-line block breaks and sentence enders
+    (punctuation plus closing quotes/brackets, then whitespace or end) that do
+    not close a listed abbreviation; sentences() runs the enders alone. Use
+    compile_rules() / engine_for() for a shared, fingerprint-cached instance.
+    """
+    def __init__(self, guide: Optional[Dict[str, Any]] = None):
+        rules = dict(DEFAULT_RULES)
+        rules.update({k: v for k, v in (guide or {}).items() if v is not None})
+        self.guide = dict(guide or {})
+        self.fingerprint = guide_fingerprint(guide)
+        self.split_on_blank = bool(rules["split_on_blank"])
+        self.min_len = int(rules["min_len"])
+        self.max_len = int(rules["max_len"])
+        enders = re.escape(rules["sentence_enders"]) or r"\."
+        # Abbreviations become a lookbehind on the ender ("Dr." / "e.g." never end a
+        # sentence), so the scan only ever stops at punctuation and newlines.
+        stems = [a[:-1] for a in rules["abbreviations"] if len(a) > 1 and a.endswith(".")]
+        guard = rf"(?<!(?<!\w)(?:{trie_pattern(stems)})\.)" if stems else ""
+        end = rf"(?P<end>[{enders}]{guard}[\"')\]]*)(?=\s|$)"
+        self._ends = re.compile(end)
+        self._scan = re.compile(rf"(?=[{enders}\r\n])(?:{end}|(?P<blank>(?:\r?\n){{2,}}))")
+        pattern = rules["speaker_pattern"]
+        self._speaker = re.compile(pattern) if pattern else None
+
+    def events(self, text: str, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[str, int, int]]:
+        """('blank' | 'end', start, end) in text order."""
+        for m in self._scan.finditer(text, lo, len(text) if hi is None else hi):
+            yield m.lastgroup, m.start(), m.end()
+
+    def sentences(self, text: str, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Trimmed (start, end) of every sentence in text[lo:hi]; blank lines do not split."""
+        hi = len(text) if hi is None else hi
+        lead = _WS.match
+        cursor = lo
+        for m in self._ends.finditer(text, lo, hi):
+            end = m.end()
+            s = lead(text, cursor, end).end()
+            e = end
+            while e > s and text[e - 1].isspace():
+                e -= 1
+            if e > s:
+                yield s, e
+            cursor = end
+        if cursor < hi:
+            s = lead(text, cursor, hi).end()
+            e = hi
+            while e > s and text[e - 1].isspace():
+                e -= 1
+            if e > s:
+                yield s, e
+
+    def blocks(self, text: str, lo: int = 0, split_first: bool = False) -> List[Tuple[int, int, str]]:
+        """
+        Blank-line blocks (when split_on_blank) as (start, end, stripped text);
+        blocks longer than max_len are cut at sentence ends found in the same
+        pass, and pieces shorter than min_len are dropped. `lo` starts the scan
+        mid-text (a block boundary), leaving earlier text as lookbehind context.
+        split_first=True cuts the first block at its sentence ends whatever its
+        length: it continues an over-long block already cut (see last_break).
+        """
+        out: List[Tuple[int, int, str]] = []
+        ends: List[int] = []
+        cursor, force = lo, split_first
+        for kind, s, e in self.events(text, lo):
+            if kind == "end":
+                ends.append(e)
+            elif self.split_on_blank:
+                self._close_block(text, cursor, s, ends, out, force)
+                ends = []
+                cursor, force = e, False
+        self._close_block(text, cursor, len(text), ends, out, force)
+        return [t for t in out if len(t[2]) >= self.min_len]
+
+    def last_break(self, text: str, lo: int = 0) -> int:
+        """
+        End of the whitespace after the last sentence end starting in text[lo:]
+        that more text cannot move (a non-space follows); 0 if none. Cutting an
+        over-long block there and continuing with blocks(split_first=True)
+        gives the pieces blocks() cuts from the whole block.
+        """
+        cut, n = 0, len(text)
+        for m in self._ends.finditer(text, lo):
+            e = _WS.match(text, m.end()).end()
+            if e < n:
+                cut = e
+        return cut
+
+    def _close_block(self, text: str, s: int, e: int, ends: List[int], out: List[Tuple[int, int, str]],
+                     force: bool = False) -> None:
+        block = text[s:e].strip()
+        if not block:
+            return
+        if not force and not (self.max_len and len(block) > self.max_len):
+            out.append((s, e, block))
+            return
+        last = s
+        for end in ends:
+            cut = _WS.match(text, end, e).end()
+            if cut == end:
+                continue  # an ender at the very end of the block
+            seg = text[last:cut].strip()
+            if seg:
+                out.append((last, cut, seg))
+            last = cut
+        tail = text[last:e].strip()
+        if tail:
+            out.append((last, e, tail))
+
+    def speaker(self, text: str) -> Tuple[Optional[str], str]:
+        """(speaker, text without the prefix) when the speaker pattern matches, else (None, text)."""
+        m = self._speaker.match(text) if self._speaker is not None else None
+        if m is None:
+            return None, text
+        rest = text[m.end():].lstrip()
+        return m.group(1).strip(), rest if rest else text
+
+_ENGINES: Dict[str, SegmentationEngine] = {}
+_ENGINES_MAX = 64
+
+def compile_rules(guide: Optional[Dict[str, Any]] = None) -> SegmentationEngine:
+    """Compiled engine for `guide`, shared across calls with the same guide fingerprint."""
+    fp = guide_fingerprint(guide)
+    eng = _ENGINES.get(fp)
+    if eng is None:
+        if len(_ENGINES) >= _ENGINES_MAX:
+            _ENGINES.pop(next(iter(_ENGINES)))
+        eng = _ENGINES[fp] = SegmentationEngine(guide)
+    return eng
+
+def engine_for(controls: Any) -> SegmentationEngine:
+    """Engine for the segmentation_rules guide resolved from a ControlStack / registry / dict."""
+    guide = None
+    if hasattr(controls, "get_guide"):
+        guide = controls.get_guide("segmentation_rules")
+    if guide is None and hasattr(controls, "get"):
+        guide = controls.get("guides.segmentation_rules", {})
+    return compile_rules(guide or {})
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import regex as re
+
+from .engine import SegmentationEngine, compile_rules
+
+PARALLEL_THRESHOLD = 8 << 20   # chars; smaller texts always segment serially
+_CONTEXT = 256                 # chars shipped before each piece so lookbehinds see what the serial scan sees
+_BLANK = re.compile(r"(?:\r?\n){2,}")
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+def _sentence_cuts(text: str, lo: int, hi: int, n: int, rules: SegmentationEngine) -> List[int]:
+    """
+    Up to n-1 cut points in (lo, hi): the first non-space char after a blank
+    line that directly follows a sentence ender. The serial scan ends a
+    sentence there anyway, so segmenting each piece alone changes nothing.
+    """
+    cuts: List[int] = []
+    step = (hi - lo) // n
+    pos = lo
+    for k in range(1, n):
+        target = max(pos, lo + k * step)
+        while True:
+            m = _BLANK.search(text, target, hi)
+            if m is None:
+                return cuts
+            cut = m.end()
+            while cut < hi and text[cut].isspace():
+                cut += 1
+            q = m.start()
+            while q > lo and text[q - 1].isspace():
+                q -= 1
+            if cut < hi and any(e.end() == q for e in rules._ends.finditer(text, max(lo, q - 16), q + 1)):
+                break
+            target = cut
+        cuts.append(cut)
+        pos = cut
+    return cuts
+
+def _block_cuts(text: str, n: int) -> List[int]:
+    """Ends of blank-line runs: block boundaries by definition when split_on_blank is on."""
+    cuts: List[int] = []
+    step = len(text) // n
+    pos = 0
+    for k in range(1, n):
+        m = _BLANK.search(text, max(pos, k * step))
+        if m is None or m.end() >= len(text):
+            break
+        cuts.append(m.end())
+        pos = m.end()
+    return cuts
+
+def _run_sentences(job: Tuple[str, int, int, Dict[str, Any]]) -> array:
+    piece, base, start, guide = job
+    out = array("q")
+    for s, e in compile_rules(guide).sentences(piece, start):
+        out.append(s + base)
+        out.append(e + base)
+    return out
+
+def _run_blocks(job: Tuple[str, int, int, Dict[str, Any]]) -> List[Tuple[int, int, str]]:
+    piece, base, start, guide = job
+    return [(s + base, e + base, t) for s, e, t in compile_rules(guide).blocks(piece, start)]
+
+def _pieces(text: str, bounds: Sequence[Tuple[int, int]], guide: Dict[str, Any]):
+    for lo, hi in bounds:
+        base = max(0, lo - _CONTEXT)
+        yield text[base:hi], base, lo - base, guide
+
+def parallel_sentence_bounds(text: str, stretches: Sequence[Tuple[int, int]], rules: SegmentationEngine,
+                             workers: int) -> List[Tuple[int, int]]:
+    """Same (start, end) list as rules.sentences over each stretch, computed in a process pool."""
+    bounds: List[Tuple[int, int]] = []
+    total = sum(hi - lo for lo, hi in stretches) or 1
+    for lo, hi in stretches:
+        n = max(1, round(workers * 4 * (hi - lo) / total))
+        edges = [lo, *_sentence_cuts(text, lo, hi, n, rules), hi]
+        bounds.extend(zip(edges, edges[1:]))
+    out: List[Tuple[int, int]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for flat in pool.map(_run_sentences, _pieces(text, bounds, rules.guide)):
+            out.extend(zip(flat[0::2], flat[1::2]))
+    return out
+
+def parallel_blocks(text: str, rules: SegmentationEngine, workers: int) -> List[Tuple[int, int, str]]:
+    """Same list as rules.blocks(text), computed in a process pool (split_on_blank only)."""
+    if not rules.split_on_blank:
+        return rules.blocks(text)
+    edges = [0, *_block_cuts(text, workers * 4), len(text)]
+    out: List[Tuple[int, int, str]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_run_blocks, _pieces(text, list(zip(edges, edges[1:])), rules.guide)):
+            out.extend(part)
+    return out
+
+def use_parallel(text: str, workers: Optional[int], threshold: int) -> int:
+    """Worker count to use (0 = serial): opt-in via workers (-1 = default_workers()), only above threshold."""
+    if not workers or len(text) < threshold:
+        return 0
+    return workers if workers > 0 else default_workers()
@@ -1,39 +1,73 @@
 ﻿# -*- coding: utf-8 -*-
 from __future__ import annotations
-import regex as re
-from typing import List
-from .spans import Span, Statement, trim_span
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .engine import SegmentationEngine, compile_rules
+from .parallel import PARALLEL_THRESHOLD, parallel_sentence_bounds, use_parallel
+from .spans import Statement
+from .table import StatementTable
 from ..schema_ingest import CanonicalDocument  # <-- fixed
 
-# Deterministic sentence ender: ., ?, ! optionally followed by quotes/brackets, then whitespace or end
-_SENT_END = re.compile(r'([.?!])(?:["\'\)\]]+)?(?=\s+|$)')
-
 def _statement_id(doc_id: str, start: int, end: int) -> str:
     return f"{doc_id}_S{start}-{end}"
 
-def segment_document(doc: CanonicalDocument) -> List[Statement]:
-    text = doc.canonical_text
-    n = len(text)
-    out: List[Statement] = []
+def sentence_bounds(text: str, lo: int = 0, hi: Optional[int] = None, *,
+                    rules: Optional[SegmentationEngine] = None) -> Iterator[Tuple[int, int]]:
+    """Trimmed (start, end) of every sentence in text[lo:hi]; plain ints, nothing allocated per match."""
+    return (rules or compile_rules()).sentences(text, lo, hi)
+
+def _stretches(doc: CanonicalDocument, exclude: Optional[Iterable[str]]) -> List[Tuple[int, int]]:
+    """Canonical ranges left to segment once the `exclude` block types are cut out."""
+    skip = set(exclude or ())
+    out: List[Tuple[int, int]] = []
     cursor = 0
+    for b in (doc.blocks if skip else ()):
+        if b["type"] in skip and b["start"] >= cursor:
+            out.append((cursor, b["start"]))
+            cursor = b["end"]
+    out.append((cursor, len(doc.canonical_text)))
+    return out
 
-    for m in _SENT_END.finditer(text):
-        end_idx = m.end()
-        raw_span = Span(start=cursor, end=end_idx).clamp(n)
-        span = trim_span(text, raw_span)
-        if span.end > span.start:
-            out.append(Statement(
-                id=_statement_id(doc.doc_id, span.start, span.end),
-                start=span.start, end=span.end, text=text[span.start:span.end]
-            ))
-        cursor = end_idx
+def statement_bounds(doc: CanonicalDocument, *, exclude: Optional[Iterable[str]] = None,
+                     rules: Optional[SegmentationEngine] = None) -> Iterator[Tuple[int, int]]:
+    """Lazy (start, end) stream behind segment_document (same exclude semantics)."""
+    text = doc.canonical_text
+    sentences = (rules or compile_rules()).sentences
+    for lo, hi in _stretches(doc, exclude):
+        yield from sentences(text, lo, hi)
 
-    if cursor < n:
-        span = trim_span(text, Span(start=cursor, end=n))
-        if span.end > span.start:
-            out.append(Statement(
-                id=_statement_id(doc.doc_id, span.start, span.end),
-                start=span.start, end=span.end, text=text[span.start:span.end]
-            ))
+def segment_document(doc: CanonicalDocument, *, exclude: Optional[Iterable[str]] = None,
+                     rules: Optional[SegmentationEngine] = None, workers: Optional[int] = None,
+                     parallel_threshold: int = PARALLEL_THRESHOLD) -> List[Statement]:
+    """
+    Sentence statements over the canonical text. With `exclude` (block types,
+    e.g. NON_PROSE_BLOCKS) the text covered by those doc.blocks is skipped and
+    each remaining stretch is segmented on its own; offsets stay canonical.
+    `rules` is a compiled segmentation_rules guide (engine_for / compile_rules);
+    the built-in defaults apply when it is omitted.
+    workers (opt-in; -1 = cpu count - 1) segments texts of at least
+    parallel_threshold chars in a process pool, cut at paragraph breaks that
+    follow a sentence end; the result is identical to the serial one.
+    """
+    text = doc.canonical_text
+    doc_id = doc.doc_id
+    make = Statement.trusted
+    n = use_parallel(text, workers, parallel_threshold)
+    if n:
+        rules = rules or compile_rules()
+        bounds: Iterable[Tuple[int, int]] = parallel_sentence_bounds(text, _stretches(doc, exclude), rules, n)
+    else:
+        bounds = statement_bounds(doc, exclude=exclude, rules=rules)
+    return [make(_statement_id(doc_id, s, e), s, e, text[s:e]) for s, e in bounds]
 
-    return out
+def segment_table(doc: CanonicalDocument, *, exclude: Optional[Iterable[str]] = None,
+                  rules: Optional[SegmentationEngine] = None, workers: Optional[int] = None,
+                  parallel_threshold: int = PARALLEL_THRESHOLD) -> StatementTable:
+    """segment_document as a columnar StatementTable over the canonical text (same rows, same ids)."""
+    text = doc.canonical_text
+    n = use_parallel(text, workers, parallel_threshold)
+    if n:
+        bounds: Iterable[Tuple[int, int]] = parallel_sentence_bounds(text, _stretches(doc, exclude),
+                                                                     rules or compile_rules(), n)
+    else:
+        bounds = statement_bounds(doc, exclude=exclude, rules=rules)
+    return StatementTable.from_bounds(text, doc.doc_id, bounds)
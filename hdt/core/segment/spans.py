@@ -1,6 +1,8 @@
 from __future__ import annotations
 from pydantic import BaseModel, Field
 
+from ..trusted import construct_trusted
+
 class Span(BaseModel):
     start: int = Field(ge=0)
     end: int = Field(ge=0)
@@ -23,3 +25,8 @@ class Statement(BaseModel):
     start: int
     end: int
     text: str
+
+    @classmethod
+    def trusted(cls, id: str, start: int, end: int, text: str) -> "Statement":
+        """Fast construct without validation; only for values the segmenter produced itself."""
+        return construct_trusted(cls, {"id": id, "start": start, "end": end, "text": text})
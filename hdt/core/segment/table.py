@@ -0,0 +1,149 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .spans import Statement
+
+class StatementRow:
+    """
+    One row of a StatementTable, read through to the table's columns. Quacks
+    like Statement (id / start / end / text / model_dump) so the downstream
+    stages take it unchanged; `text` is sliced from the shared buffer on access.
+    """
+    __slots__ = ("table", "i")
+
+    def __init__(self, table: "StatementTable", i: int):
+        self.table = table
+        self.i = i
+
+    @property
+    def start(self) -> int:
+        return self.table.starts[self.i]
+
+    @property
+    def end(self) -> int:
+        return self.table.ends[self.i]
+
+    @property
+    def id(self) -> str:
+        t = self.table
+        return f"{t.doc_id}_S{t.starts[self.i]}-{t.ends[self.i]}"
+
+    @property
+    def text(self) -> str:
+        t = self.table
+        return t.text[t.starts[self.i]:t.ends[self.i]]
+
+    @property
+    def lower(self) -> str:
+        return self.table.lower_text(self.i)
+
+    @property
+    def flags(self) -> int:
+        return self.table.flags[self.i]
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {"id": self.id, "start": self.start, "end": self.end, "text": self.text}
+
+    def to_statement(self) -> Statement:
+        return Statement.trusted(self.id, self.start, self.end, self.text)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (StatementRow, Statement)):
+            return self.model_dump() == other.model_dump()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StatementRow(id={self.id!r}, start={self.start}, end={self.end})"
+
+class StatementTable:
+    """
+    Statements of one document as columns over its canonical text: start/end
+    offsets (uint32 unless the text needs more) and a byte of flags per row,
+    free for stages to mark rows. The text is held once; ids
+    ({doc_id}_S{start}-{end}) and texts are derived on access. Indexing and
+    iteration yield StatementRow, so it stands in for List[Statement].
+    """
+    __slots__ = ("text", "doc_id", "starts", "ends", "flags", "_lower")
+
+    def __init__(self, text: str, doc_id: str):
+        code = "I" if len(text) < 1 << 32 else "Q"
+        self.text = text
+        self.doc_id = doc_id
+        self.starts = array(code)
+        self.ends = array(code)
+        self.flags = array("B")
+        self._lower: Union[str, None, bool] = False   # False = not computed yet
+
+    @classmethod
+    def from_bounds(cls, text: str, doc_id: str, bounds: Iterable[Tuple[int, int]]) -> "StatementTable":
+        t = cls(text, doc_id)
+        for s, e in bounds:
+            t.starts.append(s)
+            t.ends.append(e)
+        t.flags = array("B", bytes(len(t.starts)))
+        return t
+
+    def append(self, start: int, end: int, flags: int = 0) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.flags.append(flags)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            out = StatementTable(self.text, self.doc_id)
+            out.starts, out.ends, out.flags = self.starts[i], self.ends[i], self.flags[i]
+            out._lower = self._lower
+            return out
+        n = len(self.starts)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("StatementTable index out of range")
+        return StatementRow(self, i)
+
+    def __iter__(self) -> Iterator[StatementRow]:
+        for i in range(len(self.starts)):
+            yield StatementRow(self, i)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, StatementTable):
+            return (self.doc_id, self.starts.tolist(), self.ends.tolist()) == \
+                   (other.doc_id, other.starts.tolist(), other.ends.tolist()) and \
+                   all(self.text[s:e] == other.text[s:e] for s, e in zip(self.starts, self.ends))
+        if isinstance(other, list):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StatementTable(n={len(self)}, doc_id={self.doc_id!r})"
+
+    def bounds(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.starts, self.ends)
+
+    def ids(self) -> List[str]:
+        d = self.doc_id
+        return [f"{d}_S{s}-{e}" for s, e in zip(self.starts, self.ends)]
+
+    def texts(self) -> List[str]:
+        t = self.text
+        return [t[s:e] for s, e in zip(self.starts, self.ends)]
+
+    def lower_text(self, i: int) -> str:
+        """Row i lowercased; the whole buffer is lowercased once when that keeps offsets valid."""
+        if self._lower is False:
+            low = self.text.lower()
+            self._lower = low if len(low) == len(self.text) else None
+        s, e = self.starts[i], self.ends[i]
+        return self._lower[s:e] if self._lower is not None else self.text[s:e].lower()
+
+    def to_statements(self) -> List[Statement]:
+        make, d, t = Statement.trusted, self.doc_id, self.text
+        return [make(f"{d}_S{s}-{e}", s, e, t[s:e]) for s, e in zip(self.starts, self.ends)]
+
+    def nbytes(self) -> int:
+        """Bytes held by the row columns (the text buffer is shared with the canonical document)."""
+        return sum(a.itemsize * len(a) for a in (self.starts, self.ends, self.flags))
@@ -1,55 +1,144 @@
 ﻿from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import json, re
 
-def _lower_in(text: str, needles: list[str], ci: bool) -> bool:
-    if not needles: return False
-    if ci: 
-        t = text.lower()
-        return any(n.lower() in t for n in needles)
-    return any(n in text for n in needles)
+from ..segment.engine import control_fingerprint, guide_fingerprint
+
+_SENTENCE_GAP = re.compile(r"(?<=[.!?])\s+")
+_CLASSES = ("phatic", "attitude", "n_prop")   # marker classes in priority order; no match -> d_prop
+
+class _Splitter:
+    """
+    Hard/soft delimiters compiled into one alternation (longest first, so the
+    leftmost-longest delimiter wins), scanned once per statement. Pieces come
+    out as (start, end) offsets into the statement, trimmed of whitespace:
+    hard delimiters are dropped, a soft delimiter stays on the left piece
+    (without its surrounding spaces), and pieces longer than max_len are cut
+    after sentence punctuation.
+    """
+    def __init__(self, max_len: int, hard: list[str], soft: list[str]):
+        self.max_len = max_len
+        hard = [d for d in hard or [] if d]
+        soft = [d for d in soft or [] if d]
+        # Left piece ends where the delimiter's stripped core ends (hard: where it starts).
+        self._keep = {d: len(d.rstrip()) for d in soft}
+        self._keep.update({d: 0 for d in hard})
+        delims = sorted(self._keep, key=len, reverse=True)
+        self._delims = re.compile("|".join(map(re.escape, delims))) if delims else None
+
+    def spans(self, t: str) -> List[Tuple[int, int]]:
+        out: List[Tuple[int, int]] = []
+        pos = 0
+        if self._delims is not None:
+            keep = self._keep
+            for m in self._delims.finditer(t):
+                s = m.start()
+                self._piece(t, pos, s + keep[m.group()], out)
+                pos = m.end()
+        self._piece(t, pos, len(t), out)
+        return out
+
+    def _piece(self, t: str, a: int, b: int, out: List[Tuple[int, int]]) -> None:
+        if b - a <= self.max_len:
+            _trimmed(t, a, b, out)
+            return
+        for m in _SENTENCE_GAP.finditer(t, a, b):
+            _trimmed(t, a, m.start(), out)
+            a = m.end()
+        _trimmed(t, a, b, out)
+
+def _trimmed(t: str, a: int, b: int, out: List[Tuple[int, int]]) -> None:
+    while a < b and t[a].isspace():
+        a += 1
+    while b > a and t[b - 1].isspace():
+        b -= 1
+    if b > a:
+        out.append((a, b))
+
+class _Classifier:
+    """
+    Phatic / attitude / normative markers (lowercased once when case-insensitive)
+    as one zero-width lookahead alternation ordered by class priority: at each
+    position the highest-priority marker starting there wins, so the minimum
+    over a single finditer is the class three separate substring scans in
+    priority order would pick; a phatic hit ends the scan early.
+    """
+    def __init__(self, markers: List[List[str]], ci: bool):
+        self.ci = ci
+        self._rank: Dict[str, int] = {}
+        self._always = len(_CLASSES)   # rank of a class listing "" (matches every span)
+        alts: List[str] = []
+        for rank, needles in enumerate(markers):
+            for n in needles or []:
+                n = n.lower() if ci else n
+                if not n:
+                    self._always = min(self._always, rank)
+                elif n not in self._rank:
+                    self._rank[n] = rank
+                    alts.append(re.escape(n))
+        self._re = re.compile(f"(?=({'|'.join(alts)}))") if alts else None
+
+    def classify(self, span: str, folded: Optional[str] = None) -> str:
+        """AMU_Type of span; `folded` is span.lower() when the caller already has it."""
+        best = self._always
+        if self._re is not None and best:
+            t = (folded if folded is not None else span.lower()) if self.ci else span
+            rank = self._rank
+            for m in self._re.finditer(t):
+                r = rank[m.group(1)]
+                if r < best:
+                    best = r
+                    if not r:
+                        break
+        return _CLASSES[best] if best < len(_CLASSES) else "d_prop"
+
+class AmuRules:
+    """
+    amu_rules guide compiled once: the delimiter splitter and the marker
+    classifier. Use compile_amu_rules() / amu_rules_for() for an instance
+    shared across calls with the same guide fingerprint.
+    """
+    def __init__(self, guide: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None):
+        rules = guide or {}
+        split = rules.get("split", {})
+        classify = rules.get("classify", {})
+        self.fingerprint = fingerprint or guide_fingerprint(rules)
+        self.splitter = _Splitter(int(split.get("max_len", 280)), split.get("hard_delims", []),
+                                  split.get("soft_delims", []))
+        self.classifier = _Classifier([classify.get("phatic_markers", []), classify.get("attitude_markers", []),
+                                       classify.get("normative_markers", [])],
+                                      bool(classify.get("case_insensitive", True)))
+
+    def classify(self, span: str, folded: Optional[str] = None) -> str:
+        return self.classifier.classify(span, folded)
+
+_RULES: Dict[str, AmuRules] = {}
+_RULES_MAX = 64
+
+def compile_amu_rules(guide: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None) -> AmuRules:
+    """Compiled rules for `guide`, cached by `fingerprint` (default: SHA-1 of the guide's canonical JSON)."""
+    fp = fingerprint or guide_fingerprint(guide or {})
+    compiled = _RULES.get(fp)
+    if compiled is None:
+        if len(_RULES) >= _RULES_MAX:
+            _RULES.pop(next(iter(_RULES)))
+        compiled = _RULES[fp] = AmuRules(guide, fp)
+    return compiled
+
+def amu_rules_for(controls: Any) -> AmuRules:
+    """Rules for the amu_rules guide of a ControlStack / registry, keyed by the guide file's SHA-1."""
+    guide = controls.get_guide("amu_rules") if hasattr(controls, "get_guide") else None
+    return compile_amu_rules(guide or {}, control_fingerprint(controls, "amu_rules") if guide else None)
+
+def _split_spans(t: str, max_len: int, hard: list[str], soft: list[str]) -> List[Tuple[int, int]]:
+    return _Splitter(max_len, hard, soft).spans(t)
 
 def _split_text(t: str, max_len: int, hard: list[str], soft: list[str]) -> List[str]:
-    # first, hard delimiters
-    parts = [t]
-    for d in hard or []:
-        tmp = []
-        for p in parts:
-            tmp.extend(p.split(d))
-        parts = tmp
-    # then, soft delimiters (keep them attached to right side)
-    out: List[str] = []
-    for p in parts:
-        chunk = p
-        for d in soft or []:
-            chunk = chunk.replace(d, d.strip() + "|||SOFT|||")
-        out.extend([x for x in chunk.split("|||SOFT|||") if x])
-    # length fallback: if too long, approximate sentence split
-    final: List[str] = []
-    for x in out:
-        if len(x) <= max_len:
-            final.append(x.strip())
-        else:
-            # split by sentences
-            for s in re.split(r"(?<=[.!?])\s+", x):
-                s = s.strip()
-                if s:
-                    final.append(s)
-    return [x for x in final if x]
+    return [t[s:e] for s, e in _split_spans(t, max_len, hard, soft)]
 
 def amuize(statements: List[Dict[str, Any]], controls: Any) -> List[Dict[str, Any]]:
-    guide = controls.get_guide("amu_rules") if hasattr(controls, "get_guide") else None
-    rules = guide or {}
-    split = rules.get("split", {})
-    classify = rules.get("classify", {})
-    max_len = int(split.get("max_len", 280))
-    hard = split.get("hard_delims", [])
-    soft = split.get("soft_delims", [])
-    ci = bool(classify.get("case_insensitive", True))
-
-    norm = classify.get("normative_markers", [])
-    att  = classify.get("attitude_markers", [])
-    ph   = classify.get("phatic_markers", [])
+    rules = amu_rules_for(controls)
+    spans, classify, ci = rules.splitter.spans, rules.classify, rules.classifier.ci
 
     rows: List[Dict[str, Any]] = []
     for st in statements:
@@ -57,31 +146,19 @@ def amuize(statements: List[Dict[str, Any]], controls: Any) -> List[Dict[str, An
         sid = st.get("Statement_Text_ID")
         base_start = int(st.get("Char_Start", 0))
         text = st.get("Statement_Text","")
-        chunks = _split_text(text, max_len, hard, soft)
-        for i, span in enumerate(chunks, start=1):
-            # find local char offsets (best-effort first occurrence; if repeated substrings, uses first)
-            # we still keep the statement's absolute Char_Start/End to derive doc-level offsets
-            rel = text.find(span)
-            amu_start = base_start + (rel if rel >= 0 else 0)
-            amu_end   = amu_start + len(span)
-
-            # classify
-            if _lower_in(span, ph, ci):
-                typ = "phatic"
-            elif _lower_in(span, att, ci):
-                typ = "attitude"
-            elif _lower_in(span, norm, ci):
-                typ = "n_prop"
-            else:
-                typ = "d_prop"
-
+        # Lowercase the statement once; spans slice it when lowercasing kept the length.
+        low = text.lower() if ci else None
+        if low is not None and len(low) != len(text):
+            low = None
+        for i, (s, e) in enumerate(spans(text), start=1):
+            span = text[s:e]
             rows.append({
                 "AMU_ID": f"{sid}_A{i}",
                 "Parent_Statement_ID": sid,
-                "Text_Span": span.strip(),
-                "Char_Start": amu_start,
-                "Char_End": amu_end,
-                "AMU_Type": typ,
+                "Text_Span": span,
+                "Char_Start": base_start + s,
+                "Char_End": base_start + e,
+                "AMU_Type": classify(span, low[s:e] if low is not None else None),
                 "Topic_Candidates": json.dumps([]),
                 "Topic_Confidence": 0.0
             })
@@ -1,8 +1,15 @@
 ﻿from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-import re
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import codecs, re
+
+from ..ingest.source import open_source
+from ..ingest.parsers.srt import format_ms, parse_srt
+from ..segment.engine import engine_for
+from ..segment.parallel import PARALLEL_THRESHOLD, parallel_blocks, use_parallel
+
+_BLANK = re.compile(r"(?:\r?\n){2,}")
 
 @dataclass
 class Segment:
@@ -13,96 +20,136 @@ class Segment:
     speaker: Optional[str] = None
 
 def _read_text(path: Path) -> str:
-    raw = path.read_bytes()
-    if raw.startswith(b"\xef\xbb\xbf"): raw = raw[3:]
-    return raw.decode("utf-8", "ignore")
-
-def _split_blocks(txt: str, min_len: int, max_len: int, split_on_blank: bool) -> List[tuple[int,int,str]]:
-    parts: List[tuple[int,int,str]] = []
-    if split_on_blank:
-        cursor = 0
-        for m in re.finditer(r"(?:\r?\n){2,}", txt):
-            start, end = cursor, m.start()
-            block = txt[start:end].strip()
-            if block:
-                parts.append((start, end, block))
-            cursor = m.end()
-        tail = txt[cursor:].strip()
-        if tail:
-            parts.append((cursor, len(txt), tail))
-    else:
-        parts = [(0, len(txt), txt.strip())]
-
-    out: List[tuple[int,int,str]] = []
-    sent_re = re.compile(r"(?<=[.!?])\s+")
-    for (s, e, block) in parts:
-        if max_len and len(block) > max_len:
-            local = txt[s:e]
-            offset = s
-            last = 0
-            for m in sent_re.finditer(local):
-                seg = local[last:m.end()].strip()
-                if seg:
-                    g_start, g_end = offset + last, offset + m.end()
-                    out.append((g_start, g_end, seg))
-                last = m.end()
-            tail = local[last:].strip()
-            if tail:
-                out.append((offset + last, offset + len(local), tail))
-        else:
-            out.append((s, e, block))
-    return [(s,e,t) for (s,e,t) in out if len(t) >= min_len]
+    with open_source(path) as src:
+        # utf-8-sig drops the BOM without slicing the (possibly mmapped) view,
+        # a live slice would keep close() from unmapping it.
+        return str(src.data, "utf-8-sig", "ignore")
 
-def _maybe_extract_speaker(text: str, pattern: Optional[str]) -> tuple[Optional[str], str]:
-    if not pattern:
-        return None, text
-    m = re.match(pattern, text)
-    if m:
-        sp = m.group(1).strip()
-        rest = text[m.end():].lstrip()
-        return (sp, rest if rest else text)
-    return None, text
-
-def segment_path(path: str | Path, controls: Any) -> List[Dict[str, Any]]:
+def segment_path(path: str | Path, controls: Any, *, workers: Optional[int] = None,
+                 parallel_threshold: int = PARALLEL_THRESHOLD) -> List[Dict[str, Any]]:
     """
+    .srt/.vtt inputs are segmented on their cue text, Timestamp_Start/End come
+    from the cues each segment overlaps (Char_* are then canonical offsets).
     Reads rules from guides: segmentation_rules.json
     {
       "split_on_blank": true, "min_len": 8, "max_len": 600,
-      "speaker_pattern": "^(?:([A-Z][a-z]+|[A-Z]):)\\s+"
+      "speaker_pattern": "^(?:([A-Z][a-z]+|[A-Z]):)\\s+",
+      "sentence_enders": ".?!", "abbreviations": ["e.g.", "Dr.", ...]
     }
+    compiled once per guide fingerprint (see segment.engine).
+    workers (opt-in, -1 = cpu count - 1) splits texts of at least
+    parallel_threshold chars at blank lines over a process pool; rows are
+    identical to the serial run.
     """
-    guide = None
-    if hasattr(controls, "get_guide"):
-        guide = controls.get_guide("segmentation_rules")
-    if guide is None and hasattr(controls, "get"):
-        guide = controls.get("guides.segmentation_rules", {})
-
-    rules = guide or {}
-    split_on_blank = bool(rules.get("split_on_blank", True))
-    min_len = int(rules.get("min_len", 8))
-    max_len = int(rules.get("max_len", 600))
-    speaker_pattern = rules.get("speaker_pattern")
+    engine = engine_for(controls)
 
     p = Path(path)
     doc_title = p.stem
-    txt = _read_text(p)
-    spans = _split_blocks(txt, min_len=min_len, max_len=max_len, split_on_blank=split_on_blank)
+    cues = None
+    if p.suffix.lower() in (".srt", ".vtt"):
+        with open_source(p) as src:
+            _, can, _ = parse_srt(src.data, media_type=f"text/{p.suffix.lower()[1:]}", doc_id=src.doc_id)
+        txt, cues = can.canonical_text, can.cues
+    else:
+        txt = _read_text(p)
+    n = use_parallel(txt, workers, parallel_threshold)
+    spans = parallel_blocks(txt, engine, n) if n else engine.blocks(txt)
 
-    rows: List[Dict[str, Any]] = []
-    for i, (s, e, t) in enumerate(spans, start=1):
-        speaker, cleaned = _maybe_extract_speaker(t, speaker_pattern)
-        rows.append({
-            # v1 structural contract fields
-            "Document_Title": doc_title,
-            "Order_Index": i,
-            "Statement_Text_ID": f"{doc_title}_S{i}",
-            "Statement_Text": cleaned,
-            "Speaker_ID": speaker or "",
-            "Timestamp_Start": "",
-            "Timestamp_End": "",
+    return [_row(doc_title, i, s, e, t, engine, cues) for i, (s, e, t) in enumerate(spans, start=1)]
 
-            # precise offsets (extra but helpful downstream)
-            "Char_Start": s,
-            "Char_End": e
-        })
-    return rows
+def _row(doc_title: str, i: int, s: int, e: int, t: str, engine, cues) -> Dict[str, Any]:
+    speaker, cleaned = engine.speaker(t)
+    times = cues.times_for_span(s, e) if cues is not None else None
+    return {
+        # v1 structural contract fields
+        "Document_Title": doc_title,
+        "Order_Index": i,
+        "Statement_Text_ID": f"{doc_title}_S{i}",
+        "Statement_Text": cleaned,
+        "Speaker_ID": speaker or "",
+        "Timestamp_Start": format_ms(times[0]) if times else "",
+        "Timestamp_End": format_ms(times[1]) if times else "",
+
+        # precise offsets (extra but helpful downstream)
+        "Char_Start": s,
+        "Char_End": e
+    }
+
+def _blank_cut(buf: str) -> int:
+    """End of the last blank-line run that more input cannot extend (0 if none)."""
+    cut, n = 0, len(buf)
+    for m in _BLANK.finditer(buf):
+        e = m.end()
+        if e < n and not (e + 1 == n and buf[e] == "\r"):
+            cut = e
+    return cut
+
+_CTX = 256   # chars of the open block kept around each new chunk for the blank-run / sentence-end scans
+
+def _stream_blocks(path: Path, engine, chunk_size: int) -> Iterator[Tuple[int, int, str]]:
+    """
+    engine.blocks over the decoded file, fed chunk by chunk. Only the open
+    block is buffered (as a list of chunks), and each chunk is scanned once,
+    with the last _CTX chars before it as context. An open block longer than
+    max_len is emitted up to its last sentence end, so without blank lines
+    memory is bounded by max_len plus the longest sentence and one chunk.
+    """
+    dec = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    parts: List[str] = []
+    size, base, tail, split, first = 0, 0, "", False, True
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            text = dec.decode(data, not data)
+            if first and text:
+                first = False
+                if text[0] == "\ufeff":
+                    text = text[1:]
+            window, woff = tail + text, size - len(tail)
+            parts.append(text)
+            size += len(text)
+            capped = False
+            if not data:
+                cut = size
+            else:
+                cut = _blank_cut(window)
+                if cut:
+                    cut += woff
+                elif engine.max_len and size > engine.max_len:
+                    # Sentence ends starting in the old context were already offered.
+                    brk = engine.last_break(window, max(0, len(tail) - _CTX // 2))
+                    if brk:
+                        buf = "".join(parts)
+                        parts = [buf]
+                        # Cut only once the whole block is certain to be split at its sentence ends.
+                        if split or len(buf.strip()) > engine.max_len:
+                            cut, capped = woff + brk, True
+            if cut:
+                buf = "".join(parts)
+                for s, e, t in engine.blocks(buf[:cut], split_first=split or capped):
+                    yield s + base, e + base, t
+                rest = buf[cut:]
+                parts = [rest] if rest else []
+                size, base, split = len(rest), base + cut, capped
+                tail = rest[-_CTX:]
+            else:
+                tail = window[-_CTX:]
+            if not data:
+                return
+
+def iter_segment_path(path: str | Path, controls: Any, *, chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """
+    segment_path as a generator: the file is read and decoded incrementally and
+    each row is yielded as soon as its blank-line block is complete, or as soon
+    as an over-long block (max_len) reaches a sentence end, so memory stays flat
+    however long the input. Rows and offsets equal segment_path's.
+    Subtitles and split_on_blank=false (one block per file) read the whole input;
+    so does a block that never ends a sentence, or any block with max_len 0.
+    """
+    engine = engine_for(controls)
+    p = Path(path)
+    if p.suffix.lower() in (".srt", ".vtt") or not engine.split_on_blank:
+        yield from segment_path(p, controls)
+        return
+    for i, (s, e, t) in enumerate(_stream_blocks(p, engine, chunk_size), start=1):
+        yield _row(p.stem, i, s, e, t, engine, None)
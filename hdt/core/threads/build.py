@@ -6,6 +6,9 @@ from ..segment.spans import Statement
 from ..amu.schema import AMU
 from ..topic.schema import TopicAssignment
 
+# Labels assign_topics gives AMUs no topic matched; a statement takes one only when all its AMUs have it.
+_UNASSIGNED = ("general", "misc")
+
 _PHATIC = (
     r"\bokay\b", r"\bok\b", r"\bum\b", r"\buh\b", r"\byou know\b", r"\blikely\b",
     r"\bi think\b", r"\bi feel\b", r"\bwell,\b", r"\bthanks\b", r"\bthank you\b"
@@ -25,11 +28,15 @@ def _eligibility(text: str) -> float:
 def _thread_id(doc_id: str, idx: int) -> str:
     return f"{doc_id}_T{idx+1}"
 
-def build_threads(statements: List[Statement], amus: List[AMU], topics: List[TopicAssignment]) -> List[ThreadRow]:
-    # map statement -> topic label (one AMU per statement in v1)
+def build_threads(statements: List[Statement], amus: List[AMU], topics: List[TopicAssignment],
+                  start_index: int = 0) -> List[ThreadRow]:
+    # start_index numbers the first thread (incremental rebuilds of a slice keep global thread ids)
+    # map statement -> topic label: its first AMU's, or the first matched one among its clause AMUs
     topic_by_stmt: Dict[str, str] = {}
     for a, t in zip(amus, topics):
-        topic_by_stmt[a.Parent_Statement_ID] = t.Topic_Label
+        cur = topic_by_stmt.get(a.Parent_Statement_ID)
+        if cur is None or (cur in _UNASSIGNED and t.Topic_Label not in _UNASSIGNED):
+            topic_by_stmt[a.Parent_Statement_ID] = t.Topic_Label
 
     rows: List[ThreadRow] = []
     if not statements:
@@ -37,7 +44,7 @@ def build_threads(statements: List[Statement], amus: List[AMU], topics: List[Top
 
     # contiguous threads by topic label
     cur_topic = None
-    cur_thread_index = -1
+    cur_thread_index = start_index - 1
     cur_members: List[Tuple[Statement, float]] = []
 
     def flush_thread():
@@ -1,6 +1,8 @@
 ﻿from __future__ import annotations
-from typing import List, Dict, Any, Optional, Tuple
-import re
+from typing import List, Dict, Any, Optional
+
+from .engine import TopicEngine, _topics_index, compile_topics
+from .memo import ScoreMemo
 
 __all__ = ["assign_topics"]
 
@@ -23,59 +25,22 @@ def _coerce_dict(obj: Any) -> Dict[str, Any]:
         if k not in d and hasattr(obj, k): d[k] = getattr(obj, k)
     return d
 
-def _score_topic(span: str, topic_def: Dict[str, Any]) -> Tuple[float, list]:
-    """Simple keyword scorer; returns (confidence, disambiguators_hit)."""
-    tl = (span or "").lower()
-    kws = [k.lower() for k in topic_def.get("keywords", [])]
-    dis = [k.lower() for k in topic_def.get("disambiguators", [])]
-    hits = [k for k in kws if re.search(rf"\b{re.escape(k)}\b", tl)]
-    dhit = [k for k in dis if re.search(rf"\b{re.escape(k)}\b", tl)]
-    if not kws:
-        return (0.0, dhit)
-    conf = min(0.95, max(0.0, len(hits) / max(1, len(kws))))
-    # small lift if disambiguators also present
-    if dhit:
-        conf = min(0.99, conf + 0.1)
-    return (conf, dhit)
-
-def _topics_index(guides: Dict[str, Any]) -> List[Dict[str, Any]]:
+def assign_topics(amus: List[Any], guides: Optional[Dict[str, Any]] = None,
+                  engine: Optional[TopicEngine] = None, memo: Optional[ScoreMemo] = None) -> List[Dict[str, Any]]:
     """
-    Accepts either:
-      - {"topics":[{"id": "...", "label": "...", "keywords":[...], "disambiguators":[...]}]}
-      - or {"topic_keywords": {"id_or_label":[kw1,kw2,...], ...}}
-    Produces a uniform list of topic dicts.
+    engine: the compiled guide (engine.compile_topics / topic_engine_for); compiled
+    from `guides` (cached per guide fingerprint) when not given.
+    memo: a ScoreMemo in front of the engine's per-span score.
     """
-    if "topics" in guides and isinstance(guides["topics"], list):
-        out = []
-        for t in guides["topics"]:
-            out.append({
-                "id": t.get("id") or t.get("topic_id") or (t.get("label","misc").lower().replace(" ","_")),
-                "label": t.get("label") or t.get("id") or "misc",
-                "keywords": t.get("keywords", []),
-                "disambiguators": t.get("disambiguators", []),
-            })
-        return out
-    tk = guides.get("topic_keywords", {})
-    out = []
-    for k, kws in tk.items():
-        out.append({
-            "id": str(k),
-            "label": str(k),
-            "keywords": list(kws or []),
-            "disambiguators": [],
-        })
-    if not out:
-        # ultra-minimal default so the step doesn't fail
-        out = [
-            {"id":"general", "label":"General", "keywords":[], "disambiguators":[]}
-        ]
-    return out
-
-def assign_topics(amus: List[Any], guides: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     g = guides or {}
-    topics = _topics_index(g)
+    eng = engine or compile_topics(g)
+    topics = eng.topics
     min_conf = float(g.get("min_confidence", 0.20))
     rows: List[Dict[str, Any]] = []
+    score = eng.score
+    if memo is not None:
+        scope = f"topics:{eng.fingerprint}"
+        score = lambda span: memo.score(scope, span, eng.score)
 
     for i, amu in enumerate(amus):
         d = _coerce_dict(amu)
@@ -83,10 +48,9 @@ def assign_topics(amus: List[Any], guides: Optional[Dict[str, Any]] = None) -> L
         span   = d.get("Text_Span") or d.get("text") or ""
 
         best = ("misc", "Misc", 0.0, [])
-        for td in topics:
-            conf, dhit = _score_topic(span, td)
-            if conf > best[2]:
-                best = (td["id"], td["label"], conf, dhit)
+        k, conf, dhit = score(span)
+        if k is not None:
+            best = (topics[k]["id"], topics[k]["label"], conf, dhit)
 
         topic_id, topic_label, conf, dhit = best
         if conf < min_conf and topics:
@@ -98,6 +62,6 @@ def assign_topics(amus: List[Any], guides: Optional[Dict[str, Any]] = None) -> L
             "Topic_ID": topic_id,
             "Topic_Label": topic_label,
             "Topic_Assign_Confidence": round(float(conf), 3),
-            "Topic_Disambiguators": dhit,
+            "Topic_Disambiguators": list(dhit),
         })
     return rows
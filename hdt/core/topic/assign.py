@@ -1,6 +1,8 @@
 ﻿from __future__ import annotations
-from typing import List, Dict, Tuple
+from typing import Any, Callable, List, Dict, Optional, Tuple
 import re
+from .engine import TopicEngine, compile_topics, np
+from .memo import ScoreMemo, span_key
 from .schema import TopicAssignment
 from ..amu.schema import AMU
 
@@ -31,10 +33,102 @@ def _score_label(text: str) -> Tuple[str, float, list]:
     conf = min(1.0, 0.5 + 0.1 * best_hits) if best_label != "general" else 0.4
     return best_label, conf, hits_list
 
-def assign_topics(amus: List[AMU]) -> List[TopicAssignment]:
+def _keyword_engine(guides: Optional[Dict[str, Any]] = None) -> TopicEngine:
+    # The buckets match as substrings (as _score_label has it); guide keywords as \b-bounded words.
+    if guides is None:
+        return compile_topics({"topic_keywords": _KEYWORDS}, word_boundary=False)
+    return compile_topics(guides)
+
+def _score_guide(eng: TopicEngine, text: str) -> Tuple[str, float, list]:
+    """_score_label over a compiled guide: the topic with the most keyword hits, first on ties."""
+    found = eng.terms(text)
+    best, best_hits = None, 0
+    for i, h in sorted(eng.counts(found).items()):
+        if h > best_hits:
+            best, best_hits = i, h
+    if best is None:
+        return "general", 0.4, []
+    return eng.topics[best]["label"], min(1.0, 0.5 + 0.1 * best_hits), eng.topic_hits(best, found)
+
+def _assign_batch(texts: List[str], eng: TopicEngine) -> List[Tuple[str, float, list]]:
+    """
+    (label, confidence, hits) for every text at once: the sparse AMU x term
+    matrix times the term x topic keyword counts, summed per (AMU, topic);
+    the argmax per AMU (lowest topic index on ties) and its confidence are
+    taken over the nonzero scores with array ops.
+    """
+    n, n_topics = len(texts), max(1, len(eng.topics))
+    docs, terms = eng.term_matrix(texts)
+    d, topic, count, term = eng.topic_matrix(docs, terms)
+    winner = np.full(n, -1, dtype=np.int64)
+    best = np.zeros(n)
+    if len(d):
+        key, inv = np.unique(d * n_topics + topic, return_inverse=True)
+        score = np.bincount(inv.ravel(), weights=count)
+        kd, kt = key // n_topics, key % n_topics
+        order = np.lexsort((kt, -score, kd))
+        top = order[np.unique(kd[order], return_index=True)[1]]
+        winner[kd[top]] = kt[top]
+        best[kd[top]] = score[top]
+    conf = np.where(winner >= 0, np.minimum(1.0, 0.5 + 0.1 * best), 0.4).tolist()
+    keep = topic == winner[d]
+    hits: List[list] = [[] for _ in range(n)]
+    words = list(eng._terms)
+    for i, t in zip(d[keep].tolist(), term[keep].tolist()):
+        hits[i].append(words[t])
+    labels = [td["label"] for td in eng.topics]
+    return [(labels[w] if w >= 0 else "general", c, h) for w, c, h in zip(winner.tolist(), conf, hits)]
+
+def _scorer(guides: Optional[Dict[str, Any]]) -> Tuple[str, Callable[[str], Tuple[str, float, list]]]:
+    # (memo scope, per-text scorer): the buckets or the compiled guide, tagged by fingerprint.
+    eng = _keyword_engine(guides)
+    if guides is None:
+        return f"keywords:{eng.fingerprint}", _score_label
+    return f"guide:{eng.fingerprint}", lambda text: _score_guide(eng, text)
+
+def _memo_batch(texts: List[str], guides: Optional[Dict[str, Any]], memo: ScoreMemo) -> List[Tuple[str, float, list]]:
+    # Look every span up, score the distinct misses as one batch, remember them.
+    # A repeat of an earlier miss counts as a hit, as it would in the per-span loop.
+    scope = _scorer(guides)[0]
+    scored: List[Any] = [None] * len(texts)
+    todo: Dict[Tuple[str, bytes], List[int]] = {}
+    for i, t in enumerate(texts):
+        k = (scope, span_key(t))
+        ix = todo.get(k)
+        if ix is not None:
+            ix.append(i)
+            memo.hits += 1
+            continue
+        s = memo.get(k)
+        if s is None:
+            todo[k] = [i]
+        else:
+            scored[i] = s
+    fresh = _assign_batch([texts[ix[0]] for ix in todo.values()], _keyword_engine(guides))
+    for (k, ix), s in zip(todo.items(), fresh):
+        memo.put(k, s)
+        for i in ix:
+            scored[i] = s
+    return scored
+
+def assign_topics(amus: List[AMU], guides: Optional[Dict[str, Any]] = None, *,
+                  batch: bool = False, memo: Optional[ScoreMemo] = None) -> List[TopicAssignment]:
+    """
+    One topic per AMU from the _KEYWORDS buckets or, given `guides`, a
+    topic_keywords guide. batch=True scores all AMUs together as sparse
+    matrices (the same rows as the per-AMU loop). It needs numpy, from the
+    "numpy" extra; without numpy batch=True falls back to the per-AMU loop.
+    memo: a ScoreMemo consulted before scoring a span, and filled with the
+    new scores.
+    """
+    texts = [a.Text_Span for a in amus]
+    if batch and np is not None:
+        scored = _memo_batch(texts, guides, memo) if memo is not None else _assign_batch(texts, _keyword_engine(guides))
+    else:
+        scope, fn = _scorer(guides)
+        scored = [memo.score(scope, t, fn) for t in texts] if memo is not None else [fn(t) for t in texts]
     out: List[TopicAssignment] = []
-    for a in amus:
-        label, conf, hits = _score_label(a.Text_Span)
+    for a, (label, conf, hits) in zip(amus, scored):
         tid = f"topic:{_slug(label)}"
         out.append(TopicAssignment(
             AMU_ID=a.AMU_ID,
@@ -0,0 +1,176 @@
+from __future__ import annotations
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+import re, zlib
+
+from .schema import TopicAssignment
+
+try:  # optional ("numpy" extra): discover_topics is a no-op without it
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+DEFAULT_UNASSIGNED = ("general", "misc")
+_TOKEN = re.compile(r"[^\W\d_]{3,}")
+_STOP = frozenset("""
+and are but can did does for from had has have her him his how its just not now our out she that the their them
+then there these they this those was were what when where which who why will with would you your yes okay yeah
+also about into over than very well really thank thanks
+""".split())
+
+class TopicDiscovery:
+    """
+    Online spherical k-means over hashed term vectors: each text becomes a
+    signed, log-scaled, L2-normalized bag of its words (3+ letters, common
+    words dropped) hashed into `dim` buckets, so nothing grows with the
+    vocabulary. partial_fit() takes one mini-batch: texts unlike every center
+    found new ones (up to k), then every vector goes to its most similar
+    center, and each center moves toward the mean of its new members by
+    1 / (members seen so far) (Sculley's mini-batch update).
+    Memory is the k x dim centers plus one batch; time is linear in the
+    number of texts. Needs numpy.
+    """
+    def __init__(self, k: int = 32, dim: int = 1 << 14, batch_size: int = 1024, min_similarity: float = 0.2,
+                 seed: int = 0):
+        if np is None:
+            raise RuntimeError("TopicDiscovery needs numpy (pip install 'hdt2[numpy]')")
+        self.k = k
+        self.dim = dim
+        self.batch_size = batch_size
+        self.min_similarity = min_similarity
+        self._rng = np.random.default_rng(seed)
+        self._centers = np.zeros((dim, k))   # feature-major, so a term's row is one gather
+        self._seen = np.zeros(k)
+        self._live = 0                       # centers seeded so far
+
+    def vectors(self, texts: Sequence[str]):
+        """Hashed term vectors of a batch as sparse (row, feature, value) arrays; rows without terms are absent."""
+        rows: List[int] = []
+        hashes: List[int] = []
+        for i, t in enumerate(texts):
+            for w in _TOKEN.findall((t or "").lower()):
+                if w not in _STOP:
+                    rows.append(i)
+                    hashes.append(zlib.crc32(w.encode("utf-8", "surrogatepass")))
+        if not rows:
+            e = np.zeros(0, dtype=np.int64)
+            return e, e, np.zeros(0)
+        h = np.array(hashes, dtype=np.int64)
+        # The low bits pick the bucket, the top bit its sign (collisions then cancel out on average).
+        key, inv = np.unique(np.array(rows, dtype=np.int64) * self.dim + h % self.dim, return_inverse=True)
+        v = np.bincount(inv.ravel(), weights=np.where(h >> 31, -1.0, 1.0))
+        v = np.sign(v) * np.log1p(np.abs(v))
+        r, f = key // self.dim, key % self.dim
+        norm = np.sqrt(np.bincount(r, weights=v * v))
+        keep = v != 0
+        r, f, v = r[keep], f[keep], v[keep]
+        return r, f, v / norm[r]
+
+    def _similarities(self, r, f, v, n: int):
+        # (n, k) cosine similarities: each nonzero adds value x its feature's center row (r is sorted).
+        sim = np.zeros((n, self.k))
+        first = np.flatnonzero(np.r_[True, r[1:] != r[:-1]])
+        sim[r[first]] = np.add.reduceat(v[:, None] * self._centers[f], first, axis=0)
+        return sim
+
+    def _spawn(self, r, f, v, n: int) -> None:
+        # Farthest first: while centers are left, the text least similar to every center
+        # founds a new one, as long as that similarity is below min_similarity.
+        rows = np.unique(r)
+        while self._live < self.k:
+            if self._live:
+                near = self._similarities(r, f, v, n)[rows, :self._live].max(axis=1)
+                j = int(near.argmin())
+                if near[j] >= self.min_similarity:
+                    break
+                row = rows[j]
+            else:
+                row = rows[self._rng.integers(len(rows))]
+            sel = r == row
+            self._centers[f[sel], self._live] = v[sel]
+            self._live += 1
+
+    def partial_fit(self, texts: Sequence[str]) -> "TopicDiscovery":
+        """One mini-batch update (texts longer than batch_size are taken batch_size at a time)."""
+        for lo in range(0, len(texts), self.batch_size):
+            batch = texts[lo:lo + self.batch_size]
+            r, f, v = self.vectors(batch)
+            if not len(r):
+                continue
+            if self._live < self.k:
+                self._spawn(r, f, v, len(batch))
+            live = self._live
+            sim = self._similarities(r, f, v, len(batch))[:, :live]
+            rows = np.unique(r)
+            best = np.full(len(batch), -1, dtype=np.int64)
+            best[rows] = sim[rows].argmax(axis=1)
+            counts = np.bincount(best[rows], minlength=self.k).astype(float)
+            sums = np.bincount(f * self.k + best[r], weights=v, minlength=self.dim * self.k).reshape(self.dim, self.k)
+            moved = counts > 0
+            self._seen += counts
+            c = self._centers[:, moved]
+            c += (sums[:, moved] - c * counts[moved]) / self._seen[moved]
+            norm = np.linalg.norm(c, axis=0)
+            c /= np.where(norm > 0, norm, 1.0)
+            self._centers[:, moved] = c
+        return self
+
+    def predict(self, texts: Sequence[str]) -> Tuple[List[int], List[float]]:
+        """(center index or -1, similarity) per text; -1 below min_similarity, without terms, or before any fit."""
+        labels: List[int] = []
+        sims: List[float] = []
+        for lo in range(0, len(texts), self.batch_size):
+            batch = texts[lo:lo + self.batch_size]
+            n = len(batch)
+            r, f, v = self.vectors(batch)
+            best = np.full(n, -1, dtype=np.int64)
+            score = np.zeros(n)
+            if len(r) and self._live:
+                sim = self._similarities(r, f, v, n)[:, :self._live]
+                best = sim.argmax(axis=1)
+                score = sim[np.arange(n), best]
+                best[score < self.min_similarity] = -1
+            labels.extend(best.tolist())
+            sims.extend(np.clip(score, 0.0, 1.0).tolist())
+        return labels, sims
+
+    def relabel(self, amus: Sequence[Any], topics: Sequence[Any], *, fit: bool = True,
+                unassigned: Iterable[str] = DEFAULT_UNASSIGNED) -> List[Any]:
+        """
+        Topic rows with the unassigned ones (Topic_Label in `unassigned`,
+        case-insensitive) moved to discovered topics auto_<n>: the model is
+        first trained on those AMUs (fit=True), then each is given its most
+        similar center. Rows may be TopicAssignment or dicts (hdt.core.topic);
+        rows left unassigned and all other rows are returned as they are.
+        """
+        skip = {u.lower() for u in unassigned}
+        idx = [i for i, t in enumerate(topics) if str(_get(t, "Topic_Label")).lower() in skip]
+        texts = [_get(amus[i], "Text_Span") or "" for i in idx]
+        if fit:
+            self.partial_fit(texts)
+        labels, sims = self.predict(texts)
+        out = list(topics)
+        for i, j, s in zip(idx, labels, sims):
+            if j >= 0:
+                out[i] = _discovered(topics[i], j, s)
+        return out
+
+def _get(row: Any, key: str) -> Any:
+    return row.get(key) if isinstance(row, dict) else getattr(row, key, None)
+
+def _discovered(row: Any, j: int, sim: float) -> Any:
+    fields = {"Topic_ID": f"topic:auto_{j + 1}", "Topic_Label": f"auto_{j + 1}",
+              "Topic_Assign_Confidence": round(sim, 3), "Topic_Disambiguators": []}
+    if isinstance(row, dict):
+        return {**row, **fields}
+    return TopicAssignment(AMU_ID=row.AMU_ID, **fields)
+
+def discover_topics(amus: Sequence[Any], topics: Sequence[Any], discovery: Optional[TopicDiscovery] = None,
+                    **kwargs: Any) -> List[Any]:
+    """
+    Optional stage after assign_topics: cluster the AMUs left in general/misc
+    and give them discovered topic ids, so contiguous threads break at topic
+    shifts. Returns the rows unchanged without numpy (the "numpy" extra).
+    """
+    if np is None:
+        return list(topics)
+    return (discovery or TopicDiscovery(**kwargs)).relabel(amus, topics)
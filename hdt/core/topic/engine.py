@@ -0,0 +1,234 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Set, Tuple
+import re
+
+from ..segment.engine import control_fingerprint, guide_fingerprint, trie_pattern
+
+try:  # optional ("numpy" extra): batch term detection as sparse (AMU, term) index arrays
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+_BOUNDARY = re.compile(r"\b")
+
+def _topics_index(guides: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Accepts either:
+      - {"topics":[{"id": "...", "label": "...", "keywords":[...], "disambiguators":[...]}]}
+      - or {"topic_keywords": {"id_or_label":[kw1,kw2,...], ...}}
+    Produces a uniform list of topic dicts.
+    """
+    if "topics" in guides and isinstance(guides["topics"], list):
+        out = []
+        for t in guides["topics"]:
+            out.append({
+                "id": t.get("id") or t.get("topic_id") or (t.get("label","misc").lower().replace(" ","_")),
+                "label": t.get("label") or t.get("id") or "misc",
+                "keywords": t.get("keywords", []),
+                "disambiguators": t.get("disambiguators", []),
+            })
+        return out
+    tk = guides.get("topic_keywords", {})
+    out = []
+    for k, kws in tk.items():
+        out.append({
+            "id": str(k),
+            "label": str(k),
+            "keywords": list(kws or []),
+            "disambiguators": [],
+        })
+    if not out:
+        # ultra-minimal default so the step doesn't fail
+        out = [
+            {"id":"general", "label":"General", "keywords":[], "disambiguators":[]}
+        ]
+    return out
+
+class TopicEngine:
+    """
+    A topic guide compiled once. Every keyword and disambiguator of every
+    topic (lowercased) goes into one trie-factored pattern, \\b-bounded and run
+    as a lookahead, so a single pass over the lowercased text finds the longest
+    term starting at each position; the shorter terms that end on a word
+    boundary inside it are precomputed. hits() turns the terms found into
+    keyword hit counts for all topics at once; score() picks the topic the
+    per-topic \\b regex scorer would. word_boundary=False matches terms as
+    plain substrings instead (the assign._KEYWORDS buckets). Use
+    compile_topics() / topic_engine_for() for a shared, fingerprint-cached
+    instance.
+    """
+    def __init__(self, guides: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None,
+                 word_boundary: bool = True):
+        self.topics = _topics_index(guides or {})
+        self.fingerprint = fingerprint or guide_fingerprint(guides)
+        self.word_boundary = word_boundary
+        self._terms: Dict[str, int] = {}
+        terms = self._terms
+        self._kw_topics: List[List[Tuple[int, int]]] = []   # term -> [(topic, times listed)]
+        self._dis_topics: List[Set[int]] = []               # term -> topics listing it as disambiguator
+        self._dis_terms: List[List[Tuple[str, int]]] = []   # topic -> [(disambiguator, term)]
+        self._n_kw: List[int] = []
+
+        def term(k: str) -> int:
+            t = terms.get(k)
+            if t is None:
+                t = terms[k] = len(terms)
+                self._kw_topics.append([])
+                self._dis_topics.append(set())
+            return t
+
+        for i, td in enumerate(self.topics):
+            kws = [k.lower() for k in td.get("keywords", [])]
+            counts: Dict[int, int] = {}
+            for k in kws:
+                t = term(k)
+                counts[t] = counts.get(t, 0) + 1
+            for t, c in counts.items():
+                self._kw_topics[t].append((i, c))
+            dis = [(k.lower(), term(k.lower())) for k in td.get("disambiguators", [])]
+            for _, t in dis:
+                self._dis_topics[t].add(i)
+            self._dis_terms.append(dis)
+            self._n_kw.append(len(kws))
+
+        # `\b\b` (an empty keyword) matches any text with a word character; "" is in every string.
+        self._empty = terms.get("")
+        words = [k for k in terms if k]
+        wb = r"\b" if word_boundary else ""
+        self._re = re.compile(rf"(?={wb}({trie_pattern(words)}){wb})") if words else None
+        # Longest match -> every term it implies: itself plus its prefixes that end on a word
+        # boundary (or all its prefixes, matching substrings).
+        self._implied: Dict[str, Tuple[int, ...]] = {}
+        for k in words:
+            if word_boundary:
+                inner = (k[:m.start()] for m in _BOUNDARY.finditer(k, 1, len(k)) if m.start() < len(k))
+            else:
+                inner = (k[:j] for j in range(1, len(k)))
+            self._implied[k] = tuple([terms[k]] + [terms[p] for p in inner if p in terms])
+        self._arrays: Optional[Tuple[Any, ...]] = None
+
+    def terms(self, text: str) -> Set[int]:
+        """Ids of the terms (keywords and disambiguators) occurring in text as \\b-bounded words."""
+        t = (text or "").lower()
+        found: Set[int] = set()
+        if self._re is not None:
+            implied = self._implied
+            for m in self._re.finditer(t):
+                found.update(implied[m.group(1)])
+        if self._empty is not None and (not self.word_boundary or _BOUNDARY.search(t)):
+            found.add(self._empty)
+        return found
+
+    def topic_hits(self, i: int, found: Set[int]) -> List[str]:
+        """Keywords of topic i among the terms found, in the topic's order."""
+        terms = self._terms
+        return [k for k in (k.lower() for k in self.topics[i].get("keywords", [])) if terms[k] in found]
+
+    def _csr(self):
+        # term -> implied terms, and term -> (topic, times listed), as CSR index arrays.
+        if self._arrays is None:
+            longest = {k: j for j, k in enumerate(self._implied)}
+            imp_ptr = np.cumsum([0] + [len(v) for v in self._implied.values()], dtype=np.int64)
+            imp = np.fromiter((t for v in self._implied.values() for t in v), dtype=np.int64, count=int(imp_ptr[-1]))
+            kw_ptr = np.cumsum([0] + [len(v) for v in self._kw_topics], dtype=np.int64)
+            kw_topic = np.fromiter((i for v in self._kw_topics for i, _ in v), dtype=np.int64, count=int(kw_ptr[-1]))
+            kw_count = np.fromiter((c for v in self._kw_topics for _, c in v), dtype=np.float64, count=int(kw_ptr[-1]))
+            self._arrays = (longest, imp_ptr, imp, kw_ptr, kw_topic, kw_count)
+        return self._arrays
+
+    def term_matrix(self, texts: List[str]):
+        """
+        Sparse AMU x term incidence of a batch as (doc, term) index arrays, sorted and
+        unique: one scan over the lowercased texts joined by NULs, matches mapped
+        to their text by offset, implied terms expanded with array ops. Needs numpy.
+        """
+        low = [(t or "").lower() for t in texts]
+        n_terms = len(self._terms)
+        docs, terms = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if self._re is not None and low:
+            longest, imp_ptr, imp = self._csr()[:3]
+            offsets = np.cumsum([0] + [len(t) + 1 for t in low[:-1]], dtype=np.int64)
+            hits = [(m.start(), longest[m.group(1)]) for m in self._re.finditer("\0".join(low))]
+            if hits:
+                pos, first = np.array(hits, dtype=np.int64).T
+                doc = np.searchsorted(offsets, pos, side="right") - 1
+                docs, terms = _expand(doc, first, imp_ptr, imp)
+        if self._empty is not None:
+            with_empty = [i for i, t in enumerate(low) if not self.word_boundary or _BOUNDARY.search(t)]
+            docs = np.concatenate([docs, np.array(with_empty, dtype=np.int64)])
+            terms = np.concatenate([terms, np.full(len(with_empty), self._empty, dtype=np.int64)])
+        key = np.unique(docs * max(1, n_terms) + terms)
+        return key // max(1, n_terms), key % max(1, n_terms)
+
+    def topic_matrix(self, docs, terms):
+        """(doc, term) pairs times the term x topic keyword counts: (doc, topic, count, term) per nonzero."""
+        kw_ptr, kw_topic, kw_count = self._csr()[3:]
+        d, idx = _expand(docs, terms, kw_ptr, None)
+        return d, kw_topic[idx], kw_count[idx], np.repeat(terms, kw_ptr[terms + 1] - kw_ptr[terms])
+
+    def hits(self, text: str) -> Dict[int, int]:
+        """Keyword hits per topic index (topics without hits are left out)."""
+        return self.counts(self.terms(text))
+
+    def counts(self, found: Set[int]) -> Dict[int, int]:
+        """Keyword hits per topic index for the term ids found."""
+        counts: Dict[int, int] = {}
+        kw_topics = self._kw_topics
+        for t in found:
+            for i, c in kw_topics[t]:
+                counts[i] = counts.get(i, 0) + c
+        return counts
+
+    def _confidence(self, i: int, hits: int, found: Set[int]) -> Tuple[float, List[str]]:
+        dhit = [k for k, t in self._dis_terms[i] if t in found]
+        n = self._n_kw[i]
+        if not n:
+            return (0.0, dhit)
+        conf = min(0.95, max(0.0, hits / max(1, n)))
+        if dhit:
+            conf = min(0.99, conf + 0.1)
+        return (conf, dhit)
+
+    def score(self, text: str) -> Tuple[Optional[int], float, List[str]]:
+        """(topic index or None, confidence, disambiguators hit) of the best-scoring topic."""
+        found = self.terms(text)
+        counts: Dict[int, int] = {}
+        dis: Set[int] = set()
+        kw_topics, dis_topics = self._kw_topics, self._dis_topics
+        for t in found:
+            for i, c in kw_topics[t]:
+                counts[i] = counts.get(i, 0) + c
+            dis |= dis_topics[t]
+        best: Tuple[Optional[int], float, List[str]] = (None, 0.0, [])
+        # Topic order decides ties, as in a scan over every topic.
+        for i in sorted(counts.keys() | dis):
+            conf, dhit = self._confidence(i, counts.get(i, 0), found)
+            if conf > best[1]:
+                best = (i, conf, dhit)
+        return best
+
+def _expand(rows, keys, ptr, values):
+    """Ragged gather: each (row, key) becomes one entry per ptr[key]:ptr[key + 1] (values[...] or the index)."""
+    lens = ptr[keys + 1] - ptr[keys]
+    total = int(lens.sum())
+    idx = np.arange(total, dtype=np.int64) + np.repeat(ptr[keys] - (np.cumsum(lens) - lens), lens)
+    return np.repeat(rows, lens), (values[idx] if values is not None else idx)
+
+_ENGINES: Dict[Tuple[str, bool], TopicEngine] = {}
+_ENGINES_MAX = 16
+
+def compile_topics(guides: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None,
+                   word_boundary: bool = True) -> TopicEngine:
+    """Compiled engine for a topic guide, cached by `fingerprint` (default: SHA-1 of the guide's JSON)."""
+    fp = fingerprint or guide_fingerprint(guides)
+    eng = _ENGINES.get((fp, word_boundary))
+    if eng is None:
+        if len(_ENGINES) >= _ENGINES_MAX:
+            _ENGINES.pop(next(iter(_ENGINES)))
+        eng = _ENGINES[(fp, word_boundary)] = TopicEngine(guides, fp, word_boundary)
+    return eng
+
+def topic_engine_for(controls: Any, name: str = "topic_keywords") -> TopicEngine:
+    """Engine for the topic guide of a ControlStack / registry, keyed by the guide file's SHA-1."""
+    guide = controls.get_guide(name) if hasattr(controls, "get_guide") else None
+    return compile_topics(guide or {}, control_fingerprint(controls, name) if guide else None)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, Union
+import hashlib, os, pickle
+
+DEFAULT_MAX_ENTRIES = 200_000
+_VERSION = 1
+
+def span_key(span: str) -> bytes:
+    """
+    Hash of a span as the topic scorers see it. Both lowercase the text
+    before matching, so case is the only thing folded: whitespace and
+    punctuation can change which keywords match.
+    """
+    return hashlib.blake2b((span or "").lower().encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+class ScoreMemo:
+    """
+    Bounded LRU of topic scores keyed by (guide fingerprint, span_key(span)),
+    for corpora where the same AMU text recurs ("Thank you.", boilerplate).
+    Scores are cached as the scorer returns them, so a hit yields the rows a
+    fresh score would. With `path`, entries are loaded from and save()d to a
+    pickle there, for reuse across runs; a missing or unreadable file starts
+    an empty memo. hits / misses count lookups since construction.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Union[str, Path, None] = None):
+        self.max_entries = max(1, max_entries)
+        self.path = Path(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[Tuple[str, bytes], Any]" = OrderedDict()
+        if self.path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get(self, key: Tuple[str, bytes]) -> Any:
+        value = self._lru.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._lru.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Tuple[str, bytes], value: Any) -> None:
+        lru = self._lru
+        lru[key] = value
+        lru.move_to_end(key)
+        while len(lru) > self.max_entries:
+            lru.popitem(last=False)
+
+    def score(self, fingerprint: str, span: str, fn: Callable[[str], Any]) -> Any:
+        """fn(span), from the memo when this guide has scored an equal span before."""
+        key = (fingerprint, span_key(span))
+        value = self.get(key)
+        if value is None:
+            value = fn(span)
+            self.put(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._lru),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+    def load(self) -> None:
+        try:
+            with self.path.open("rb") as f:
+                version, entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError, ImportError):
+            return
+        if version == _VERSION:
+            for key, value in entries[-self.max_entries:]:
+                self.put(key, value)
+
+    def save(self) -> None:
+        """Write the entries (least recently used first) to `path`; a no-op without one."""
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with tmp.open("wb") as f:
+                pickle.dump((_VERSION, list(self._lru.items())), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,35 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+import gc
+
+_new = object.__new__
+_set = object.__setattr__
+
+def construct_trusted(cls, values: Dict[str, Any]):
+    """
+    Pydantic model instance from values a stage produced itself, without
+    validation; `values` must hold every field. Each instance gets its own
+    fields-set, as a validated one would.
+    """
+    obj = _new(cls)
+    _set(obj, "__dict__", values)
+    _set(obj, "__pydantic_fields_set__", set(values))
+    _set(obj, "__pydantic_extra__", None)
+    _set(obj, "__pydantic_private__", None)
+    return obj
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Cyclic GC off while a batch of trusted rows is built: the rows hold no
+    cycles, and the collections their allocations trigger would only rescan
+    the growing batch.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+from __future__ import annotations
+from typing import Any, Dict, Tuple
+import argparse, json, re, sys, time
+
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.ingest.alignment import compute_byte_starts
+from hdt.core.ingest.parsers.html import parse_html
+from hdt.core.segment.rules import segment_document
+from hdt.core.segment.spans import Span, Statement, trim_span
+from hdt.core.structure.amu import _Splitter
+from hdt.core.amu.extract import extract_amus, extract_clause_amus
+from hdt.core.amu.schema import AMU
+from hdt.core.topic.engine import TopicEngine
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def bench_normalize(args) -> dict:
+    """Clean text (ASCII and already-NFC): fast path vs per-character walk."""
+    line = "The witness said the budget was approved on time. "
+    samples = {
+        "ascii": (line * (args.size // len(line))).encode("utf-8"),
+        "nfc": (("Café déjà vu — " + line) * (args.size // (len(line) + 15))).encode("utf-8"),
+    }
+    out = {}
+    for name, raw in samples.items():
+        slow = _best_of(lambda: normalize_bytes(raw, compact=True, fast=False), args.repeat)
+        fast = _best_of(lambda: normalize_bytes(raw, compact=True, fast=True), args.repeat)
+        out[name] = {"bytes": len(raw), "slow_s": round(slow, 4), "fast_s": round(fast, 4),
+                     "speedup": round(slow / fast, 1) if fast else None}
+    return out
+
+def bench_byte_starts(args) -> dict:
+    """Per-character encode loop vs one encode() + lead-byte scan (mixed UTF-8)."""
+    text = "Zeugin Müller sagte — ja. " * (args.size // 26)
+
+    def per_char():
+        acc, starts = 0, [0]
+        for ch in text:
+            acc += len(ch.encode("utf-8")); starts.append(acc)
+        return starts
+
+    loop = _best_of(per_char, args.repeat)
+    vec = _best_of(lambda: compute_byte_starts(text, "utf-8"), args.repeat)
+    ckpt = _best_of(lambda: compute_byte_starts(text, "utf-8", checkpoint=1024), args.repeat)
+    return {"chars": len(text), "loop_s": round(loop, 4), "vectorized_s": round(vec, 4),
+            "checkpoint_s": round(ckpt, 4), "speedup": round(loop / vec, 1) if vec else None}
+
+def _scraped_page(size: int) -> bytes:
+    head = ("<!DOCTYPE html><html><head><title>Hearing &amp; record</title>"
+            "<style>body{font:1em serif}</style><script>var x = '<p>' + 1;</script></head><body>"
+            "<nav><ul><li><a href='/'>Home</a></li><li><a href='/a'>About</a></li></ul></nav>\n")
+    para = ("<div class='c'><p>The witness&nbsp;said the <b>budget</b> was approved on time &mdash; "
+            "caf\u00e9 notes.<br/>Next line.</p><script>track(1)</script></div>\n")
+    return (head + para * max(1, (size - len(head)) // len(para)) + "</body></html>").encode("utf-8")
+
+def bench_html(args) -> dict:
+    """Streaming tokenizer + aligned canonical text vs html5lib full DOM + text walk."""
+    raw = _scraped_page(args.size)
+    out = {"bytes": len(raw)}
+    stream = _best_of(lambda: parse_html(raw, compact=True), args.repeat)
+    out["stream_s"] = round(stream, 4)
+    out["stream_MBps"] = round(len(raw) / stream / 1e6, 2) if stream else None
+    try:
+        import html5lib
+    except Exception:
+        return out
+
+    def dom():
+        root = html5lib.parse(raw, namespaceHTMLElements=False)
+        for el in root.iter():
+            if el.tag in ("script", "style", "nav"):
+                el.clear()
+        return "".join(root.itertext())
+
+    full = _best_of(dom, args.repeat)
+    out.update({"html5lib_dom_s": round(full, 4), "html5lib_MBps": round(len(raw) / full / 1e6, 2) if full else None,
+                "speedup": round(full / stream, 1) if stream else None})
+    return out
+
+_SENT_END = re.compile(r'([.?!])(?:["\'\)\]]+)?(?=\s+|$)')
+
+def _segment_models(doc):
+    # The previous segmenter: a validated Span per match, clamp + trim_span, validated Statement.
+    text, n, out, cursor = doc.canonical_text, len(doc.canonical_text), [], 0
+    for m in _SENT_END.finditer(text):
+        sp = trim_span(text, Span(start=cursor, end=m.end()).clamp(n))
+        if sp.end > sp.start:
+            out.append(Statement(id=f"{doc.doc_id}_S{sp.start}-{sp.end}", start=sp.start, end=sp.end,
+                                 text=text[sp.start:sp.end]))
+        cursor = m.end()
+    if cursor < n:
+        sp = trim_span(text, Span(start=cursor, end=n))
+        if sp.end > sp.start:
+            out.append(Statement(id=f"{doc.doc_id}_S{sp.start}-{sp.end}", start=sp.start, end=sp.end,
+                                 text=text[sp.start:sp.end]))
+    return out
+
+def bench_segment(args) -> dict:
+    """Int-offset segmenter + trusted Statement vs per-match Span models and validation."""
+    para = "The witness said the budget was approved. Was it on time? \"Yes!\" she said.\n\n"
+    _, can, _ = normalize_bytes((para * (args.size // len(para))).encode("utf-8"), compact=True)
+    n = len(segment_document(can))
+    old = _best_of(lambda: _segment_models(can), args.repeat)
+    new = _best_of(lambda: segment_document(can), args.repeat)
+    return {"chars": len(can.canonical_text), "statements": n, "models_s": round(old, 4), "offsets_s": round(new, 4),
+            "models_stmts_per_s": int(n / old) if old else None, "offsets_stmts_per_s": int(n / new) if new else None,
+            "speedup": round(old / new, 1) if new else None}
+
+def _amu_split_sentinel(t, max_len, hard, soft):
+    # The previous AMU splitter: str.split per hard delimiter, sentinel replace per soft
+    # delimiter, re.split length fallback, then text.find to recover each offset.
+    parts = [t]
+    for d in hard:
+        parts = [x for p in parts for x in p.split(d)]
+    out = []
+    for p in parts:
+        for d in soft:
+            p = p.replace(d, d.strip() + "|||SOFT|||")
+        out.extend(x for x in p.split("|||SOFT|||") if x)
+    spans = []
+    for x in out:
+        pieces = [x] if len(x) <= max_len else re.split(r"(?<=[.!?])\s+", x)
+        spans.extend(y.strip() for y in pieces if y.strip())
+    return [(t.find(y), t.find(y) + len(y)) for y in spans]
+
+def bench_amu_split(args) -> dict:
+    """Run-on statements: one delimiter scan with carried offsets vs split/replace passes + text.find."""
+    clause = "the committee reviewed the budget; it was approved, and then the vote followed — again. "
+    stmt = clause * 200
+    stmts = [stmt] * max(1, args.size // len(stmt))
+    hard, soft = [". ", "? ", "! "], [";", " — ", ", and "]
+    splitter = _Splitter(280, hard, soft)
+    n = sum(len(splitter.spans(t)) for t in stmts)
+    old = _best_of(lambda: [_amu_split_sentinel(t, 280, hard, soft) for t in stmts], args.repeat)
+    new = _best_of(lambda: [splitter.spans(t) for t in stmts], args.repeat)
+    return {"statements": len(stmts), "statement_chars": len(stmt), "amus": n,
+            "sentinel_find_s": round(old, 4), "scan_s": round(new, 4),
+            "scan_amus_per_s": int(n / new) if new else None, "speedup": round(old / new, 1) if new else None}
+
+def bench_amu_clauses(args) -> dict:
+    """Statements -> AMUs: batched clause extractor vs one validated AMU per statement."""
+    para = ("The witness said the budget was approved. Was it on time? \"Yes!\" she said. "
+            "The board met on Monday; the vote was close. The hearing ran for most of the afternoon and "
+            "covered every line item of the proposal in detail, but nobody agreed on the final numbers.\n\n")
+    _, can, _ = normalize_bytes((para * (args.size // len(para))).encode("utf-8"), compact=True)
+    stmts = segment_document(can)
+    n, amus = len(stmts), len(extract_clause_amus(stmts))
+    old = _best_of(lambda: extract_amus(stmts), args.repeat)
+    new = _best_of(lambda: extract_clause_amus(stmts), args.repeat)
+    return {"statements": n, "statement_amus": n, "clause_amus": amus,
+            "statement_s": round(old, 4), "clause_s": round(new, 4),
+            "statement_stmts_per_s": int(n / old) if old else None,
+            "clause_stmts_per_s": int(n / new) if new else None}
+
+def _topic_guide(n_topics: int, n_keywords: int, rng) -> dict:
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))) for _ in range(50_000)]
+    topics = [{"id": f"t{i}", "label": f"T{i}",
+               "keywords": [rng.choice(vocab) if rng.random() < 0.8 else f"{rng.choice(vocab)} {rng.choice(vocab)}"
+                            for _ in range(n_keywords)],
+               "disambiguators": [rng.choice(vocab) for _ in range(3)]} for i in range(n_topics)]
+    return {"topics": topics}, vocab
+
+def score_topic_reference(span: str, topic_def: Dict[str, Any]) -> Tuple[float, list]:
+    """
+    The per-topic scorer TopicEngine replaced, kept as the baseline for
+    bench_topics and the engine tests: a \\b regex per keyword, returns
+    (confidence, disambiguators_hit).
+    """
+    tl = (span or "").lower()
+    kws = [k.lower() for k in topic_def.get("keywords", [])]
+    dis = [k.lower() for k in topic_def.get("disambiguators", [])]
+    hits = [k for k in kws if re.search(rf"\b{re.escape(k)}\b", tl)]
+    dhit = [k for k in dis if re.search(rf"\b{re.escape(k)}\b", tl)]
+    if not kws:
+        return (0.0, dhit)
+    conf = min(0.95, max(0.0, len(hits) / max(1, len(kws))))
+    # small lift if disambiguators also present
+    if dhit:
+        conf = min(0.99, conf + 0.1)
+    return (conf, dhit)
+
+def bench_topics(args) -> dict:
+    """5k topics x 50 keywords: one compiled term automaton per AMU vs a \\b regex per keyword per topic."""
+    import random
+    rng = random.Random(7)
+    guide, vocab = _topic_guide(5000, 50, rng)
+    spans = [" ".join(rng.choice(vocab) for _ in range(12)) for _ in range(max(1, args.size // 100))]
+    t0 = time.perf_counter()
+    eng = TopicEngine(guide)
+    compile_s = time.perf_counter() - t0
+    # The per-keyword scorer costs a regex per keyword per topic: time a handful of AMUs and scale.
+    few = spans[:3]
+    old = _best_of(lambda: [[score_topic_reference(s, td) for td in eng.topics] for s in few], 1) / len(few)
+    new = _best_of(lambda: [eng.score(s) for s in spans], args.repeat) / len(spans)
+    return {"topics": len(eng.topics), "terms": len(eng._implied), "amus": len(spans), "compile_s": round(compile_s, 3),
+            "per_keyword_amus_per_s": round(1 / old, 2) if old else None,
+            "automaton_amus_per_s": int(1 / new) if new else None,
+            "speedup": int(old / new) if new else None}
+
+def bench_topics_batch(args) -> dict:
+    """assign.assign_topics over a 2k-topic topic_keywords guide: per-AMU loop vs sparse-matrix batch."""
+    import random
+    from hdt.core.topic.assign import assign_topics as assign_keywords
+    from hdt.core.topic.engine import np
+    rng = random.Random(7)
+    guide, vocab = _topic_guide(2000, 20, rng)
+    guide = {"topic_keywords": {td["id"]: td["keywords"] for td in guide["topics"]}}
+    amus = [AMU.trusted(f"a{i}", "s", " ".join(rng.choice(vocab) for _ in range(12)), 0, 1)
+            for i in range(max(1, args.size // 100))]
+    assign_keywords(amus[:1], guide)   # compile outside the timings
+    loop = _best_of(lambda: assign_keywords(amus, guide), args.repeat)
+    batch = _best_of(lambda: assign_keywords(amus, guide, batch=True), args.repeat)
+    # Without numpy batch=True runs the loop too.
+    return {"amus": len(amus), "numpy": np is not None, "loop_amus_per_s": int(len(amus) / loop) if loop else None,
+            "batch_amus_per_s": int(len(amus) / batch) if batch else None,
+            "speedup": round(loop / batch, 2) if batch else None}
+
+def bench_discover(args) -> dict:
+    """TopicDiscovery.relabel over general AMUs: throughput at n and 4n AMUs (flat = linear scaling)."""
+    import random
+    from hdt.core.topic.discover import TopicDiscovery
+    rng = random.Random(7)
+    _, vocab = _topic_guide(200, 20, rng)
+    n = max(1, args.size // 100)
+    out = {}
+    for m in (n, 4 * n):
+        amus = [AMU.trusted(f"a{i}", "s", " ".join(rng.choice(vocab) for _ in range(12)), 0, 1) for i in range(m)]
+        topics = [{"AMU_ID": a.AMU_ID, "Topic_Label": "general"} for a in amus]
+        best = _best_of(lambda: TopicDiscovery().relabel(amus, topics), args.repeat)
+        out[f"amus_per_s_{m}"] = int(m / best) if best else None
+    return out
+
+BENCHES = {
+    "normalize": bench_normalize,
+    "byte_starts": bench_byte_starts,
+    "html": bench_html,
+    "segment": bench_segment,
+    "amu_split": bench_amu_split,
+    "amu_clauses": bench_amu_clauses,
+    "topics": bench_topics,
+    "topics_batch": bench_topics_batch,
+    "discover": bench_discover,
+}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HDT2 micro-benchmarks")
+    ap.add_argument("bench", choices=sorted(BENCHES))
+    ap.add_argument("--size", type=int, default=1_000_000, help="Approximate input size (chars)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+    print(json.dumps({args.bench: BENCHES[args.bench](args)}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,34 @@
 from __future__ import annotations
 import argparse, pathlib, sys, json
 from hdt.core.ingest.parsers import parse_auto
+from hdt.core.ingest.normalizer import StreamNormalizer, iter_normalize
 from hdt.core.ingest.alignment import compute_byte_starts, AlignmentIndex
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("path", help="Path to a text/markdown/srt file")
     p.add_argument("--encoding", default="utf-8")
+    p.add_argument("--stream-to", metavar="OUT",
+                   help="Write the canonical text to OUT chunk by chunk (memory bounded by the chunk size, "
+                        "plain text / markdown only) instead of parsing the whole document")
     args = p.parse_args()
 
-    data = pathlib.Path(args.path).read_bytes()
-    raw, can, orig = parse_auto(data, encoding=args.encoding, path=str(args.path))
+    if args.stream_to:
+        if args.path.lower().endswith((".srt", ".vtt", ".html", ".htm")):
+            p.error("--stream-to handles plain text and markdown only")
+        sn = StreamNormalizer(encoding=args.encoding)
+        with open(args.path, "rb") as f, open(args.stream_to, "w", encoding="utf-8", newline="") as out:
+            for ch in iter_normalize(f, state=sn):
+                out.write(ch.text)
+        print(json.dumps({
+            "doc_id": sn.doc_id,
+            "orig_bytes_len": sn.bytes_len,
+            "canon_len": sn.canon_len,
+            "canonical_out": args.stream_to,
+        }, ensure_ascii=False, indent=2))
+        return 0
+
+    raw, can, orig = parse_auto(str(args.path), encoding=args.encoding)
     idx = AlignmentIndex(can.alignment, compute_byte_starts(orig, raw.encoding))
     left, right = idx.inverse_bytes((0, len(can.canonical_text)))
 
@@ -6,6 +6,8 @@ from hdt.core.control_resolver import ControlResolver
 from hdt.core.schema_ops import apply_schema  # (kept for compatibility even if unused)
 from hdt.core.schema_validate import validate_rows
 from hdt.core.pipeline.run import run_all_for_path
+from hdt.core.segment.engine import engine_for
+from hdt.core.ingest.cache import IngestCache
 from hdt.core.llm_client import LLMClient
 from hdt.core.llm_client_audit import AuditLLMClient
 from hdt.core.prompt_audit import persist_prompt_policy
@@ -176,6 +178,7 @@ def main():
     ap.add_argument("--head", type=int, default=int(os.getenv("HDT_HEAD", "5")),
                     help="Lines to preview per file at confirm gates (default: 5)")
     ap.add_argument("--no-mirror", action="store_true")
+    ap.add_argument("--no-ingest-cache", action="store_true", help="Re-normalize inputs instead of using out/.cache/ingest")
     ap.add_argument("--mirror-mode", default=os.getenv("OUT_MIRROR_MODE","copy"),
                     choices=["copy","symlink","auto"])
     args = ap.parse_args()
@@ -190,7 +193,9 @@ def main():
     # Structure pass -> statements/canon
     s1 = resolver.for_step("p01_structure","step_01_segmentation")
     print(f"[1/10] Structure pass on {inp} -> {out_dir}")
-    res = run_all_for_path(str(inp))
+    res = run_all_for_path(str(inp), cache=None if args.no_ingest_cache else IngestCache(out_root / ".cache" / "ingest"),
+                           prose_only=bool(panel.get("io", {}).get("markdown_prose_only", False)),
+                           rules=engine_for(s1))
     statements = res.get("statements", [])
     canon      = res.get("canon", {}) or {"note":"canon unavailable","counts":{"statements":len(statements)}}
     dump_jsonl(out_dir / "statements.jsonl", stamp_rows(statements, panel, inp, "p02_is.bootstrap"))
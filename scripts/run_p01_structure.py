@@ -5,14 +5,31 @@ from pathlib import Path
 from hdt.core.control_resolver import ControlResolver
 from hdt.core.schema_ops import apply_schema
 from hdt.core.schema_validate import validate_rows
-from hdt.core.structure.segmentation import segment_path
+from hdt.core.structure.segmentation import iter_segment_path, segment_path
 from hdt.core.output_router import mirror_artifacts
 
-def dump_jsonl(path: Path, rows):
+def stream_jsonl(path: Path, rows, schema, batch: int = 1024) -> dict:
+    """Schema-normalize, validate and write rows as they arrive (memory bounded by `batch`)."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "wb") as f:
-        for r in (rows or []):
+    issues, n, buf = [], 0, []
+
+    def flush():
+        nonlocal n
+        out = apply_schema(buf, schema) if schema else buf
+        for r in out:
             f.write(orjson.dumps(r)); f.write(b"\n")
+        for it in validate_rows(out, schema)["issues"]:
+            issues.append({**it, "row": it["row"] + n})
+        n += len(out)
+        buf.clear()
+
+    with open(path, "wb") as f:
+        for r in rows:
+            buf.append(r)
+            if len(buf) >= batch:
+                flush()
+        flush()
+    return {"ok": not issues, "issues": issues}
 
 def main():
     ap = argparse.ArgumentParser(description="Phase 1 / Step 01: Segmentation")
@@ -21,6 +38,8 @@ def main():
     ap.add_argument("--run-tag", default=None)
     ap.add_argument("--show", action="store_true")
     ap.add_argument("--no-mirror", action="store_true")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Segment very large inputs in N processes (-1 = all cores but one)")
     ap.add_argument("--mirror-mode", default=os.getenv("OUT_MIRROR_MODE","copy"),
                     choices=["copy","symlink","auto"])
     args = ap.parse_args()
@@ -33,13 +52,13 @@ def main():
     stack = resolver.for_step("p01_structure","step_01_segmentation")
 
     print(f"[1/1] Segmentation on {inp} \u2192 {out_dir}")
-    rows = segment_path(inp, controls=stack)
-
-    # schema normalize + validate
+    # schema normalize + validate, streamed: rows are written as their blocks complete
     sch = stack.get_schema("segments", {})
-    rows = apply_schema(rows, sch) if sch else rows
-    dump_jsonl(out_dir / "segments.jsonl", rows)
-    validation = validate_rows(rows, sch)
+    if args.workers:
+        rows = segment_path(inp, controls=stack, workers=args.workers)
+    else:
+        rows = iter_segment_path(inp, controls=stack)
+    validation = stream_jsonl(out_dir / "segments.jsonl", rows, sch)
     (out_dir / "validation_p01.json").write_text(orjson.dumps({"segments.jsonl": validation}).decode("utf-8"), encoding="utf-8")
 
     print("Done. Created:")
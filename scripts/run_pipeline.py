@@ -3,12 +3,21 @@ import argparse, sys, json, glob
 from pathlib import Path
 
 from hdt.core.pipeline.run import run_all_for_path
-from hdt.core.pipeline.batch import run_many
+from hdt.core.pipeline.batch import is_archive, run_many
+from hdt.core.ingest.cache import IngestCache
 
 def main(argv=None):
     ap = argparse.ArgumentParser(description="HDT2 pipeline runner")
-    ap.add_argument("inputs", nargs="+", help="File(s), directory(ies), or globs (*.txt, *.md)")
+    ap.add_argument("inputs", nargs="+",
+                    help="File(s), directory(ies), globs (*.txt, *.md), or .zip/.tar/.tar.gz/.tar.zst archives")
     ap.add_argument("-o", "--out-dir", default="out", help="Output directory (default: out)")
+    ap.add_argument("--byte-offsets", action="store_true", help="Also write byte_spans.jsonl per document")
+    ap.add_argument("--prose-only", action="store_true", help="Skip code/table/front-matter/... Markdown blocks")
+    ap.add_argument("--segment-workers", type=int, default=None,
+                    help="Segment each very large input in N processes (-1 = all cores but one)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Reprocess only what changed since the last run of each input (<out>/.cache/incremental)")
+    ap.add_argument("--no-ingest-cache", action="store_true", help="Re-normalize inputs instead of using <out>/.cache/ingest")
     args = ap.parse_args(argv)
 
     # Expand globs and directories
@@ -33,8 +42,10 @@ def main(argv=None):
         print("No inputs matched.", file=sys.stderr)
         return 2
 
-    if len(files) == 1 and Path(files[0]).is_file():
-        res = run_all_for_path(files[0])
+    if len(files) == 1 and Path(files[0]).is_file() and not is_archive(files[0]) and not args.incremental:
+        cache = None if args.no_ingest_cache else IngestCache(Path(args.out_dir) / ".cache" / "ingest")
+        res = run_all_for_path(files[0], byte_offsets=args.byte_offsets, cache=cache, prose_only=args.prose_only,
+                               segment_workers=args.segment_workers)
         print("Wrote outputs to:", args.out_dir)
         print(json.dumps({
             "doc_id": getattr(res["canonical"], "doc_id", "unknown"),
@@ -42,7 +53,9 @@ def main(argv=None):
         }))
         return 0
     else:
-        idx = run_many(files, out_dir=args.out_dir)
+        idx = run_many(files, out_dir=args.out_dir, byte_offsets=args.byte_offsets,
+                       ingest_cache=not args.no_ingest_cache, prose_only=args.prose_only,
+                       incremental=args.incremental, segment_workers=args.segment_workers)
         print(f"Processed {len(idx)} document(s). Index at {Path(args.out_dir,'index.json').resolve()}")
         return 0
 
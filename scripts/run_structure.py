@@ -3,12 +3,18 @@ import os, argparse, orjson, hashlib, json
 from pathlib import Path
 
 from hdt.core.pipeline.run import run_all_for_path
+from hdt.core.segment.engine import engine_for
+from hdt.core.ingest.cache import IngestCache
+from hdt.core.ingest.normalizer import normalization_form
 from hdt.core.schema_ops import apply_schema
 from hdt.core.schema_validate import validate_rows
 from hdt.core.control_resolver import ControlResolver
 from hdt.core.prompt_audit import persist_prompt_policy
 from hdt.core.amu import amuize
 from hdt.core.topic import assign_topics
+from hdt.core.topic.discover import discover_topics, np as _numpy
+from hdt.core.topic.memo import ScoreMemo
+from hdt.core.topic.engine import topic_engine_for
 from hdt.core.threads import form_threads
 from hdt.core.output_router import mirror_artifacts
 from hdt.core.provenance import stamp_rows
@@ -58,9 +64,14 @@ def main():
     ap.add_argument("--run-tag", default=None)
     ap.add_argument("--show", action="store_true")
     ap.add_argument("--no-mirror", action="store_true")
+    ap.add_argument("--no-ingest-cache", action="store_true", help="Re-normalize inputs instead of using out/.cache/ingest")
+    ap.add_argument("--no-topic-memo", action="store_true", help="Score every AMU instead of reusing out/.cache/topics")
+    ap.add_argument("--discover-topics", action="store_true", help="Cluster AMUs left in General/Misc into auto_<n> topics")
     ap.add_argument("--mirror-mode", default=os.getenv("OUT_MIRROR_MODE","copy"),
                     choices=["copy","symlink","auto"])
     args = ap.parse_args()
+    if args.discover_topics and _numpy is None:
+        ap.error("--discover-topics needs numpy (pip install 'hdt2[numpy]')")
 
     inp = Path(args.inp); out_root = Path(args.out)
     out_dir = (out_root / "runs" / args.run_tag) if args.run_tag else out_root
@@ -77,7 +88,10 @@ def main():
     s1 = resolver.for_step("p01_structure","step_01_segmentation")
     persist_prompt_policy(out_dir, "p01_structure", "step_01_segmentation", s1.get_prompt("main",""))
     print(f"[STRUCTURE/01] Segmentation on {inp} -> {out_dir}")
-    res = run_all_for_path(str(inp))
+    res = run_all_for_path(str(inp), form=normalization_form(panel),
+                           cache=None if args.no_ingest_cache else IngestCache(out_root / ".cache" / "ingest"),
+                           prose_only=bool(panel.get("io", {}).get("markdown_prose_only", False)),
+                           rules=engine_for(s1))
     statements = res.get("statements", [])
     segments   = res.get("segments",   []) or [{"Document_Title":"", "Order_Index":i+1, "Statement_Text_ID": st.get("id") or f"S{i+1}",
                  "Statement_Text": getattr(st,"text",None) or st.get("text",""), "Speaker_ID":"unknown","Timestamp_Start":"","Timestamp_End":""}
@@ -111,7 +125,12 @@ def main():
     persist_prompt_policy(out_dir, "p01_structure", "step_03_topic_map", s3.get_prompt("main",""))
     print("[STRUCTURE/03] Topic map")
     schema_topics = s3.get_schema("topics", {}) or {}
-    topics = assign_topics(amus, guides=s3.get_guide("topic_keywords", {}) or {})
+    memo = None if args.no_topic_memo else ScoreMemo(path=out_root / ".cache" / "topics" / "score_memo.pkl")
+    topics = assign_topics(amus, guides=s3.get_guide("topic_keywords", {}) or {}, engine=topic_engine_for(s3), memo=memo)
+    if memo is not None:
+        memo.save()
+    if args.discover_topics:
+        topics = discover_topics(amus, topics)
     for r in topics:
         r.setdefault("Topic_Path_Preview",""); r.setdefault("Topic_Granularity","broad")
     topics = _project_to_schema(topics, schema_topics)
@@ -190,6 +209,8 @@ def main():
         {"type":"count","key":"amus","value":str(len(amus))},
         {"type":"count","key":"links","value":str(len(lrows))}
     ]
+    if memo is not None:
+        summary_rows += [{"type":"count","key":f"topic_memo_{k}","value":str(v)} for k, v in memo.stats().items()]
     summary_rows = stamp_rows(summary_rows, panel, inp, "p01_structure.step_06_structural_validation")
     dump_jsonl(out_dir / "structural_summary.json", summary_rows)
 
@@ -20,8 +20,7 @@ def main():
     ap.add_argument("path")
     args = ap.parse_args()
 
-    data = pathlib.Path(args.path).read_bytes()
-    _, can, _ = parse_auto(data, path=args.path)
+    _, can, _ = parse_auto(str(args.path))
     stmts = segment_document(can)
     amus = extract_amus(stmts)
     topics = assign_topics(amus)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.segment.rules import segment_document, segment_table
+from hdt.core.amu.extract import compile_clause_rules, extract_amus, extract_clause_amus
+
+TEXT = ("Dr. Smith reviewed the budget; it was approved — again. The committee met for a long time "
+        "and discussed every line item of the proposal, but nobody agreed on the final numbers. Done.")
+
+def test_clauses_are_exact_slices_linked_to_their_statement():
+    _, can, _ = normalize_bytes(TEXT.encode("utf-8"))
+    stmts = segment_document(can)
+    amus = extract_clause_amus(stmts, compile_clause_rules({"and_but_split_min_len": 100}))
+    assert [a.Text_Span for a in amus] == [
+        "Dr. Smith reviewed the budget;", "it was approved —", "again.",
+        "The committee met for a long time", "and discussed every line item of the proposal,",
+        "but nobody agreed on the final numbers.", "Done.",
+    ]
+    by_id = {st.id: st for st in stmts}
+    for a in amus:
+        st = by_id[a.Parent_Statement_ID]
+        assert st.start <= a.Char_Start < a.Char_End <= st.end
+        assert can.canonical_text[a.Char_Start:a.Char_End] == a.Text_Span
+        assert a.AMU_ID == f"{st.id}@{a.Char_Start}-{a.Char_End}"
+    # Same rows from the columnar table; statements without cuts match extract_amus.
+    table_amus = extract_clause_amus(segment_table(can), compile_clause_rules({"and_but_split_min_len": 100}))
+    assert [a.model_dump() for a in table_amus] == [a.model_dump() for a in amus]
+    assert extract_clause_amus(stmts[-1:])[0].model_dump() == extract_amus(stmts[-1:])[0].model_dump()
+
+def test_and_but_split_needs_min_len():
+    _, can, _ = normalize_bytes(b"Cats purr and dogs bark but birds sing.")
+    stmts = segment_document(can)
+    assert len(extract_clause_amus(stmts)) == 1
+    assert len(extract_clause_amus(stmts, compile_clause_rules({"and_but_split_min_len": 10}))) == 3
+
+def test_trusted_amus_own_their_fields_set():
+    from hdt.core.amu.schema import AMU
+    a, b = AMU.trusted("s@0-3", "s", "abc", 0, 3), AMU.trusted("s@4-7", "s", "def", 4, 7)
+    a.model_fields_set.discard("Topic_Confidence")
+    assert "Topic_Confidence" in b.model_fields_set
+    a.AMU_Type = "phatic"
+    assert a.model_dump() == AMU(AMU_ID="s@0-3", Parent_Statement_ID="s", Text_Span="abc", Char_Start=0,
+                                 Char_End=3, AMU_Type="phatic").model_dump()
+
+def test_statement_thread_topic_is_first_matched_clause_topic():
+    from hdt.core.topic.schema import TopicAssignment
+    from hdt.core.threads.build import build_threads
+    _, can, _ = normalize_bytes(b"We met; the budget grew; the law passed. Then we left; nothing else.")
+    stmts = segment_document(can)
+    amus = extract_clause_amus(stmts)
+    labels = ["general", "finance", "policy", "general", "general"]
+    assert [a.Parent_Statement_ID for a in amus] == [stmts[0].id] * 3 + [stmts[1].id] * 2
+    topics = [TopicAssignment(AMU_ID=a.AMU_ID, Topic_ID=t, Topic_Label=t, Topic_Assign_Confidence=0.5)
+              for a, t in zip(amus, labels)]
+    rows = build_threads(stmts, amus, topics)
+    # "finance" for the first statement (not the last clause's "policy"), "general" for the second.
+    assert [r.Thread_ID for r in rows] == [f"{can.doc_id}_T1", f"{can.doc_id}_T2"]
+    labels[3] = "finance"
+    topics = [TopicAssignment(AMU_ID=a.AMU_ID, Topic_ID=t, Topic_Label=t, Topic_Assign_Confidence=0.5)
+              for a, t in zip(amus, labels)]
+    assert len({r.Thread_ID for r in build_threads(stmts, amus, topics)}) == 1
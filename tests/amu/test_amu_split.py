@@ -0,0 +1,34 @@
+from __future__ import annotations
+from hdt.core.structure.amu import _split_text, amu_rules_for, amuize
+
+class _Controls:
+    def __init__(self, guide):
+        self.guide = guide
+
+    def get_guide(self, name):
+        return self.guide if name == "amu_rules" else None
+
+def test_split_drops_hard_and_keeps_soft_delimiters():
+    t = "We met; we talked. We left"
+    assert _split_text(t, 280, ["."], [";"]) == ["We met;", "we talked", "We left"]
+
+def test_amu_offsets_are_exact_for_repeated_spans():
+    text = "It rained. It rained. It rained and the river rose past the bank."
+    controls = _Controls({"split": {"max_len": 20, "hard_delims": ["."], "soft_delims": [" and "]}})
+    rows = amuize([{"Statement_Text_ID": "d_S100-165", "Char_Start": 100, "Statement_Text": text}], controls)
+    assert [r["Text_Span"] for r in rows] == ["It rained", "It rained", "It rained and", "the river rose past the bank"]
+    assert [r["Char_Start"] for r in rows] == [100, 111, 122, 136]
+    for r in rows:
+        assert text[r["Char_Start"] - 100:r["Char_End"] - 100] == r["Text_Span"]
+
+def test_classifier_priority_and_fingerprint_cache():
+    guide = {"classify": {"phatic_markers": ["Thanks"], "attitude_markers": ["I think"],
+                          "normative_markers": ["should"]}}
+    controls = _Controls(guide)
+    controls.fingerprints = [{"kind": "guide", "name": "amu_rules", "sha1": "abc"}]
+    rules = amu_rules_for(controls)
+    assert amu_rules_for(controls) is rules
+    assert rules.classify("i think we should go") == "attitude"
+    assert rules.classify("We should go, thanks.") == "phatic"
+    assert rules.classify("We SHOULD go") == "n_prop"
+    assert rules.classify("We went") == "d_prop"
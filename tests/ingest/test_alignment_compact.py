@@ -0,0 +1,30 @@
+from __future__ import annotations
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.ingest.alignment import compute_byte_starts, AlignmentIndex, replay_ops
+from hdt.core.schema_ingest import CanonicalDocument, CompactOps
+
+def test_compact_ops_match_per_codepoint_mapping():
+    s = "﻿Café résumé\r\nline two end\rlast"
+    raw = s.encode("utf-8")
+    rd, full, orig = normalize_bytes(raw)
+    _, comp, _ = normalize_bytes(raw, compact=True)
+    assert isinstance(comp.alignment.ops, CompactOps)
+    assert comp.canonical_text == full.canonical_text
+    assert len(comp.alignment.ops) < len(full.alignment.ops)
+    assert replay_ops(orig, comp.alignment.ops) == replay_ops(orig, full.alignment.ops)
+
+    bs = compute_byte_starts(orig, rd.encoding)
+    a = AlignmentIndex(full.alignment, bs)
+    b = AlignmentIndex(comp.alignment, bs)
+    assert [a.forward_char(i) for i in range(len(orig) + 1)] == [b.forward_char(i) for i in range(len(orig) + 1)]
+    n = len(full.canonical_text)
+    assert [a.inverse_char(i) for i in range(n + 1)] == [b.inverse_char(i) for i in range(n + 1)]
+
+def test_compact_keeps_merge_and_serialize():
+    raw = ("word " * 1000).encode("utf-8")
+    _, can, _ = normalize_bytes(raw, compact=True)
+    assert len(can.alignment.ops) == 1
+    op = can.alignment.ops[0]
+    assert op.kind == "keep" and op.orig == (0, 5000) and op.canon == (0, 5000)
+    again = CanonicalDocument.model_validate_json(can.model_dump_json())
+    assert [o.model_dump() for o in again.alignment.ops] == can.alignment.ops.to_list()
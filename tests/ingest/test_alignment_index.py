@@ -0,0 +1,28 @@
+from __future__ import annotations
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.ingest.alignment import AlignmentIndex, _dense_maps
+from hdt.core.schema_ingest import Alignment, SpanOp
+
+def _tables(aln):
+    idx = AlignmentIndex(aln, [0] * (aln.orig_len + 1))
+    return ([idx.forward_char(i) for i in range(aln.orig_len + 1)],
+            [idx.inverse_char(i) for i in range(aln.canon_len + 1)])
+
+def test_sparse_index_matches_dense_tables():
+    s = "﻿Café ok\r\nnext line\r"
+    for compact in (False, True):
+        _, can, _ = normalize_bytes(s.encode("utf-8"), compact=compact)
+        assert _tables(can.alignment) == _dense_maps(can.alignment)
+
+def test_sparse_index_is_lazy_and_small():
+    _, can, _ = normalize_bytes(("word " * 10000 + "\r\n").encode("utf-8"), compact=True)
+    idx = AlignmentIndex(can.alignment, [])
+    assert idx._o2c is None
+    assert idx.forward_char(50000) == 50000
+    assert len(idx._o2c) <= 2 * len(can.alignment.ops) + 1
+
+def test_overlapping_ops_fall_back_to_dense():
+    ops = [SpanOp(kind="replace", orig=(0, 3), canon=(0, 1)),
+           SpanOp(kind="keep", orig=(1, 2), canon=(1, 2))]
+    aln = Alignment(ops=ops, orig_len=3, canon_len=2)
+    assert _tables(aln) == _dense_maps(aln)
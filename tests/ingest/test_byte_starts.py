@@ -0,0 +1,26 @@
+from __future__ import annotations
+from hdt.core.ingest.alignment import compute_byte_starts, ByteOffsets
+
+TEXT = "Zeugin Müller — ja \U0001F600 ok"
+
+def _reference(text, encoding):
+    acc, out = 0, [0]
+    for ch in text:
+        acc += len(ch.encode(encoding)); out.append(acc)
+    return out
+
+def test_byte_starts_match_per_char_encoding():
+    for enc, ref_enc in [("utf-8", "utf-8"), ("utf-16", "utf-16-le"), ("utf-16-be", "utf-16-be"),
+                         ("utf-32", "utf-32-le"), ("gb18030", "gb18030")]:
+        assert list(compute_byte_starts(TEXT, enc)) == _reference(TEXT, ref_enc)
+    assert list(compute_byte_starts("café", "latin-1")) == [0, 1, 2, 3, 4]
+
+def test_constant_width_is_a_range():
+    assert compute_byte_starts("plain ascii", "utf-8") == range(12)
+
+def test_checkpoint_mode_is_exact():
+    full = list(compute_byte_starts(TEXT * 10, "utf-8"))
+    ck = compute_byte_starts(TEXT * 10, "utf-8", checkpoint=7)
+    assert isinstance(ck, ByteOffsets) and len(ck) == len(full)
+    assert [ck[i] for i in range(len(full))] == full
+    assert len(ck.checkpoints) < len(full) // 5
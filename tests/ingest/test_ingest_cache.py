@@ -0,0 +1,47 @@
+from __future__ import annotations
+from hdt.core.ingest.cache import IngestCache
+from hdt.core.ingest.parsers import parse_auto
+
+def test_cache_roundtrip_skips_read(tmp_path, monkeypatch):
+    p = tmp_path / "doc.txt"
+    p.write_bytes("﻿Café line\r\nnext́ line\r".encode("utf-8"))
+    for compact in (False, True):
+        cache = IngestCache(tmp_path / "cache")
+        ref = parse_auto(str(p), compact=compact)
+        assert parse_auto(str(p), compact=compact, cache=cache) == ref
+        assert (cache.hits, cache.misses) == (0, 1)
+        monkeypatch.setattr("hdt.core.ingest.parsers.auto.open_source", None)
+        assert parse_auto(str(p), compact=compact, cache=cache) == ref
+        assert cache.hits == 1
+        monkeypatch.undo()
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = IngestCache(tmp_path / "cache", max_bytes=1)
+    for i in range(3):
+        parse_auto(f"document {i} text".encode("utf-8"), cache=cache)
+    assert len(list((tmp_path / "cache" / "docs").glob("*/*.bin"))) == 0
+    cache.max_bytes = 10_000
+    for i in range(3):
+        parse_auto(f"document {i} text".encode("utf-8"), cache=cache)
+    assert len(list((tmp_path / "cache" / "docs").glob("*/*.bin"))) == 3
+
+def test_cache_keeps_media_types_apart(tmp_path):
+    srt = b"1\n00:00:01,000 --> 00:00:02,000\nHello there.\n\n2\n00:00:03,000 --> 00:00:04,000\nGeneral Kenobi.\n"
+    md = b"# Title\n\nSome *prose* here.\n\n- item one\n- item two\n"
+    cache = IngestCache(tmp_path / "cache")
+    for data, names in ((srt, ("a.srt", "a.txt")), (md, ("b.txt", "b.md"))):
+        for name in names:
+            p = tmp_path / name
+            p.write_bytes(data)
+            assert parse_auto(str(p), cache=cache) == parse_auto(str(p))
+    assert (cache.hits, cache.misses) == (0, 4)
+
+def test_edits_reuse_one_path_pointer(tmp_path):
+    p = tmp_path / "doc.txt"
+    cache = IngestCache(tmp_path / "cache")
+    for i in range(3):
+        p.write_bytes(f"version {i} ".encode("utf-8") * (i + 1))
+        assert parse_auto(str(p), cache=cache) == parse_auto(str(p))
+    assert cache.misses == 3
+    assert len(list((tmp_path / "cache" / "paths").iterdir())) == 1
+    assert not list((tmp_path / "cache").rglob("*.tmp"))
@@ -0,0 +1,27 @@
+from __future__ import annotations
+import unicodedata
+from hdt.core.ingest.normalizer import normalize_bytes, normalization_form
+
+CASES = [
+    "plain ascii only.\r\nsecond line\rthird",
+    "\ufeffCafé déjà vu\u00a0— naïve",
+    "Cafe\u0301 and \u0301leading mark, \r\n\u0301after crlf",
+    "क\u093f\u093c Devanagari, emoji \U0001F600\U0001F3FB, music \U0001D15E\U0001D165",
+    "\u212b singleton and \ufb01 ligature \u2460",
+]
+
+def test_fast_path_matches_slow_path():
+    for s in CASES:
+        for form in ("NFC", "NFKC"):
+            for text in (s, unicodedata.normalize(form, s)):
+                for compact in (False, True):
+                    raw = text.encode("utf-8")
+                    _, a, _ = normalize_bytes(raw, compact=compact, form=form, fast=True)
+                    _, b, _ = normalize_bytes(raw, compact=compact, form=form, fast=False)
+                    assert a.model_dump() == b.model_dump()
+
+def test_nfkc_form_from_panel():
+    assert normalization_form({"recovery": {"unicode_normalization": "NFKC"}}) == "NFKC"
+    assert normalization_form({}) == "NFC"
+    _, can, _ = normalize_bytes("ﬁne day".encode("utf-8"), form="NFKC")
+    assert can.canonical_text == "fine day"
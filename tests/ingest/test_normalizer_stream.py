@@ -0,0 +1,32 @@
+from __future__ import annotations
+import io
+from hdt.core.ingest.normalizer import normalize_bytes, normalize_stream, iter_normalize, StreamNormalizer
+
+def _same(a, b):
+    assert a[0] == b[0]
+    assert a[1].model_dump() == b[1].model_dump()
+    assert a[2] == b[2]
+
+def test_chunk_boundaries_match_one_shot():
+    raw = "﻿Café résumé\r\nnext\rline end \U0001F600".encode("utf-8")
+    for compact in (False, True):
+        one = normalize_bytes(raw, compact=compact)
+        # every chunk size splits some UTF-8 sequence, CRLF pair or base+mark cluster
+        for size in range(1, 9):
+            _same(one, normalize_stream(raw, compact=compact, chunk_size=size))
+
+def test_cr_and_marks_held_across_chunks():
+    sn = StreamNormalizer()
+    first = sn.feed(b"ab\r")
+    assert first.text == "ab"         # "\r" may still become CRLF
+    second = sn.feed(b"\ne\xcc")       # split U+0301
+    third = sn.feed(b"\x81!")
+    last = sn.close()
+    assert first.text + second.text + third.text + last.text == "ab\né!"
+    assert sn.doc_id == normalize_bytes(b"ab\r\ne\xcc\x81!")[0].doc_id
+
+def test_file_object_and_iterable_sources():
+    raw = ("line one.\r\n" * 100).encode("utf-8")
+    chunks = list(iter_normalize(io.BytesIO(raw), chunk_size=7))
+    assert "".join(c.text for c in chunks) == "line one.\n" * 100
+    _same(normalize_bytes(raw), normalize_stream([raw[:5], raw[5:17], raw[17:]]))
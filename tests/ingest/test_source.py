@@ -0,0 +1,27 @@
+from __future__ import annotations
+import hashlib, mmap
+from hdt.core.ingest.parsers import parse_auto
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.ingest.source import open_source, cached_sha256
+from hdt.core.provenance import file_sha256
+
+def test_mmap_and_buffer_inputs_match_bytes(tmp_path):
+    data = ("﻿Café line\r\n" * 50).encode("utf-8")
+    p = tmp_path / "doc.txt"
+    p.write_bytes(data)
+    ref = normalize_bytes(data)
+    with open_source(p, mmap_threshold=1) as src:
+        assert src.doc_id == ref[0].doc_id
+        assert parse_auto(src) == ref
+    with open(p, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        assert parse_auto(mm) == ref
+    assert parse_auto(memoryview(data)) == ref
+    assert parse_auto(str(p)) == ref
+
+def test_provenance_hash_reuses_ingest_read(tmp_path, monkeypatch):
+    p = tmp_path / "doc.md"
+    p.write_bytes(b"# Title\n\nBody text.")
+    parse_auto(str(p))
+    assert cached_sha256(p) == hashlib.sha256(p.read_bytes()).hexdigest()
+    monkeypatch.setattr("builtins.open", lambda *a, **k: (_ for _ in ()).throw(AssertionError("re-read")))
+    assert file_sha256(p) == cached_sha256(p)
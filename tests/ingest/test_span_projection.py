@@ -0,0 +1,22 @@
+from __future__ import annotations
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.ingest.alignment import AlignmentIndex, compute_byte_starts
+from hdt.core.pipeline.run import run_all_for_path
+
+def test_bulk_projection_matches_per_span():
+    raw, can, orig = normalize_bytes("Café — déjà vu.\r\nNext line.".encode("utf-8"), compact=True)
+    idx = AlignmentIndex(can.alignment, compute_byte_starts(orig, raw.encoding))
+    n = can.alignment.canon_len
+    spans = [(b, a) for a in range(n + 1) for b in range(a + 1)][::-1]
+    b0, b1 = idx.inverse_bytes_many([s for s, _ in spans], [e for _, e in spans])
+    assert list(zip(b0, b1)) == [idx.inverse_bytes((s, e)) for s, e in spans]
+
+def test_run_all_for_path_byte_spans(tmp_path):
+    p = tmp_path / "doc.txt"
+    text = "Zoë said yes. Then she left."
+    p.write_bytes(text.encode("utf-8"))
+    res = run_all_for_path(str(p), byte_offsets=True)
+    data = text.encode("utf-8")
+    for row, st in zip(res["byte_spans"], res["statements"]):
+        assert row["Statement_Text_ID"] == st.id
+        assert data[row["Byte_Start"]:row["Byte_End"]].decode("utf-8") == st.text
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from pathlib import Path
+from hdt.core.ingest.alignment import AlignmentIndex, compute_byte_starts
+from hdt.core.ingest.parsers.auto import parse_auto
+from hdt.core.ingest.parsers.html import parse_html
+
+PAGE = ("<!DOCTYPE html>\r\n<html><head><title>Q&amp;A</title><style>p{}</style></head><body>"
+        "<nav><a href='/'>Home</a></nav><script>if (a < b) x();</script>"
+        "<p>The  witness\r\nsaid <b>yes</b>&nbsp;&mdash; café.</p><div title=\"a>b\">Next.</div></body></html>")
+
+def test_visible_text_and_byte_alignment(tmp_path: Path):
+    p = tmp_path / "page.html"
+    p.write_bytes(PAGE.encode("utf-8"))
+    raw, can, orig = parse_auto(str(p))
+    assert can.canonical_text == "Q&A\n\nThe witness said yes — café.\n\nNext."
+    idx = AlignmentIndex(can.alignment, compute_byte_starts(orig, raw.encoding))
+    i = can.canonical_text.index("said yes")
+    s, e = idx.inverse_bytes((i, i + len("said yes")))
+    assert PAGE.encode("utf-8")[s:e] == b"said <b>yes"
+
+def test_chunking_does_not_change_output():
+    data = PAGE.encode("utf-8")
+    ref = parse_html(data, compact=True)
+    for chunk_size in (1, 3, 64):
+        got = parse_html(data, compact=True, chunk_size=chunk_size)
+        assert got[1].canonical_text == ref[1].canonical_text
+        assert got[1].alignment.ops == ref[1].alignment.ops
+
+def test_apostrophe_in_unquoted_attribute_does_not_open_a_value():
+    data = b"<p>One</p><img alt=don't><p>Two para.</p><p>It's three.</p><a title = 'x>y' href=\"z\">Four.</a>"
+    for chunk_size in (None, 1, 7):
+        kw = {"chunk_size": chunk_size} if chunk_size else {}
+        assert parse_html(data, **kw)[1].canonical_text == "One\n\nTwo para.\n\nIt's three.\n\nFour."
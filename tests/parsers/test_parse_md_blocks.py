@@ -0,0 +1,28 @@
+from __future__ import annotations
+from pathlib import Path
+from hdt.core.ingest.alignment import AlignmentIndex, compute_byte_starts
+from hdt.core.ingest.cache import IngestCache
+from hdt.core.ingest.parsers.auto import parse_auto
+from hdt.core.schema_ingest import NON_PROSE_BLOCKS
+from hdt.core.segment.rules import segment_document
+
+MD = ("---\r\ntitle: Notes\r\n---\r\n# Budget\r\n\r\nThe budget passed. It was late.\r\n\r\n"
+      "```py\r\nx = 1.\r\n```\r\n\r\n| a | b |\r\n|---|---|\r\n| 1. | 2. |\r\n\r\n[ref]: http://x\r\n\r\nFinal word.\r\n")
+
+def test_block_types_and_offsets(tmp_path: Path):
+    p = tmp_path / "notes.md"
+    p.write_bytes(MD.encode("utf-8"))
+    raw, can, orig = parse_auto(str(p), cache=IngestCache(tmp_path / "cache"))
+    assert [b["type"] for b in can.blocks] == ["front_matter", "heading", "paragraph", "code", "table",
+                                               "reference", "paragraph"]
+    idx = AlignmentIndex(can.alignment, compute_byte_starts(orig, raw.encoding))
+    code = can.blocks[3]
+    s, e = idx.inverse_bytes((code["start"], code["end"]))
+    assert MD.encode("utf-8")[s:e] == b"```py\r\nx = 1.\r\n```"
+    assert parse_auto(str(p), cache=IngestCache(tmp_path / "cache"))[1].blocks == can.blocks
+
+def test_prose_only_segmentation():
+    _, can, _ = parse_auto(MD.encode("utf-8"), path="notes.md")
+    prose = [s.text for s in segment_document(can, exclude=NON_PROSE_BLOCKS)]
+    assert prose == ["# Budget\n\nThe budget passed.", "It was late.", "Final word."]
+    assert len(segment_document(can)) > len(prose)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from pathlib import Path
+from hdt.core.ingest.alignment import AlignmentIndex, compute_byte_starts
+from hdt.core.ingest.cache import IngestCache
+from hdt.core.ingest.parsers.auto import parse_auto
+from hdt.core.ingest.parsers.srt import parse_srt
+from hdt.core.segment.rules import segment_document
+from hdt.core.structure.segmentation import segment_path
+
+SRT = ("﻿1\r\n00:00:01,000 --> 00:00:02,500\r\nHello there.\r\nSecond line.\r\n\r\n"
+       "2\r\n00:10:03,000 --> 00:10:04,000\r\nCafé time!\r\n\r\n").encode("utf-8")
+
+def test_cue_text_and_alignment():
+    for chunk_size in (1, 5, 1 << 20):
+        raw, can, orig = parse_srt(SRT, compact=True, chunk_size=chunk_size)
+        assert can.canonical_text == "Hello there.\nSecond line.\n\nCafé time!"
+        assert list(can.cues.start_ms) == [1000, 603000]
+        idx = AlignmentIndex(can.alignment, compute_byte_starts(orig, raw.encoding))
+        s, e = idx.inverse_bytes((can.cues.c0[1], can.cues.c1[1]))
+        assert SRT[s:e] == "Café time!".encode("utf-8")
+
+def test_statements_in_time_range(tmp_path: Path):
+    p = tmp_path / "hearing.srt"
+    p.write_bytes(SRT)
+    raw, can, _ = parse_auto(str(p), cache=IngestCache(tmp_path / "cache"))
+    _, cached, _ = parse_auto(str(p), cache=IngestCache(tmp_path / "cache"))
+    assert cached.cues == can.cues
+    stmts = segment_document(can)
+    assert [s.text for s in can.cues.statements_in_range(stmts, 600000, 610000)] == ["Café time!"]
+    rows = segment_path(p, controls={})
+    assert (rows[0]["Timestamp_Start"], rows[-1]["Timestamp_End"]) == ("00:00:01.000", "00:10:04.000")
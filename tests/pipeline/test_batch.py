@@ -1,5 +1,6 @@
 ﻿from __future__ import annotations
 from pathlib import Path
+import io, tarfile, zipfile
 from hdt.core.pipeline.batch import run_many
 
 def test_run_many_creates_per_doc_outputs(tmp_path: Path):
@@ -17,3 +18,33 @@ def test_run_many_creates_per_doc_outputs(tmp_path: Path):
         assert (od / "canon.json").exists()
     # index.json exists
     assert (out / "index.json").exists()
+
+def test_run_many_streams_archive_members(tmp_path: Path):
+    docs = {"a.txt": b"Demand grew.", "sub/b.md": b"# T\n\nCosts rose.", "skip.bin": b"\x00"}
+    zp = tmp_path / "docs.zip"
+    with zipfile.ZipFile(zp, "w") as zf:
+        for name, data in docs.items():
+            zf.writestr(name, data)
+    tp = tmp_path / "docs.tar.gz"
+    with tarfile.open(tp, "w:gz") as tf:
+        for name, data in docs.items():
+            info = tarfile.TarInfo(name); info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+    idx = run_many([str(zp), str(tp)], out_dir=str(tmp_path / "out"))
+    assert [e["input"] for e in idx] == [f"{zp}!a.txt", f"{zp}!sub/b.md", f"{tp}!a.txt", f"{tp}!sub/b.md"]
+    assert idx[0]["doc_id"] == idx[2]["doc_id"]
+
+def test_segment_workers_reach_every_input(tmp_path: Path, monkeypatch):
+    from hdt.core.pipeline import run
+    from scripts.run_pipeline import main
+    seen, serial = [], run.segment_document
+    def segment(can, workers=None, **kw):
+        seen.append(workers)
+        return serial(can, **kw)
+    monkeypatch.setattr(run, "segment_document", segment)
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_bytes(b"Demand grew. Revenue rose.")
+    assert main([str(tmp_path / "a.txt"), str(tmp_path / "b.txt"), "-o", str(tmp_path / "out"),
+                 "--segment-workers", "3"]) == 0
+    assert seen == [3, 3]
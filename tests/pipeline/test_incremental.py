@@ -0,0 +1,40 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from hdt.core.pipeline.batch import run_many
+from hdt.core.pipeline.incremental import ResultStore, result_stamp, update_result
+from hdt.core.segment.engine import compile_rules
+from hdt.core.pipeline.run import run_all_for_path
+
+KEYS = ("statements", "amus", "topics", "threads", "links", "modal", "evidential", "causal")
+
+def _rows(res):
+    return {k: [r.model_dump() if hasattr(r, "model_dump") else r for r in res[k]] for k in KEYS}
+
+def test_typo_fix_matches_full_run():
+    text = ("The budget grew. However the patient said no because of data. See the law. " * 40).encode("utf-8")
+    fixed = text.replace(b"patient said", b"patients said", 1)
+    prev = run_all_for_path("t.txt", data=text)
+    res = update_result(prev, "t.txt", data=fixed)
+    assert _rows(res) == _rows(run_all_for_path("t.txt", data=fixed))
+    assert res["incremental"]["resegmented"] <= 2
+
+def test_store_baseline_matches_full_run_and_is_stamped(tmp_path: Path):
+    text = ("The budget grew. However the patient said no because of data. See the law. " * 40).encode("utf-8")
+    fixed = text.replace(b"patient said", b"patients said", 1)
+    store, stamp = ResultStore(tmp_path), result_stamp()
+    store.save("t.txt", run_all_for_path("t.txt", data=text), stamp)
+    res = update_result(store.load("t.txt", stamp), "t.txt", data=fixed)
+    assert _rows(res) == _rows(run_all_for_path("t.txt", data=fixed))
+    assert res["incremental"]["resegmented"] <= 2
+    assert store.load("t.txt", result_stamp(rules=compile_rules({"max_len": 100}))) is None
+    assert store.load("t.txt", result_stamp(form="NFKC")) is None
+
+def test_run_many_incremental_reuses_last_result(tmp_path: Path):
+    p = tmp_path / "d.txt"
+    p.write_text("First point here. Second point there.", encoding="utf-8")
+    run_many([str(p)], out_dir=str(tmp_path / "out"), incremental=True)
+    p.write_text("First point here. Second point, edited.", encoding="utf-8")
+    idx = run_many([str(p)], out_dir=str(tmp_path / "out"), incremental=True)
+    lines = (Path(idx[0]["out_dir"]) / "statements.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(x)["text"] for x in lines] == ["First point here.", "Second point, edited."]
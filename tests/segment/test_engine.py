@@ -0,0 +1,21 @@
+from __future__ import annotations
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.segment.engine import compile_rules, engine_for
+from hdt.core.segment.rules import segment_document
+
+def test_abbreviations_do_not_split_and_engine_is_cached():
+    _, can, _ = normalize_bytes("Dr. Smith arrived, e.g. at noon. She left.".encode("utf-8"))
+    assert [s.text for s in segment_document(can)] == ["Dr. Smith arrived, e.g. at noon.", "She left."]
+    guide = {"min_len": 1, "abbreviations": []}
+    assert compile_rules(guide) is compile_rules(dict(reversed(list(guide.items()))))
+    assert [s.text for s in segment_document(can, rules=compile_rules(guide))][0] == "Dr."
+
+def test_blocks_and_speaker_share_one_engine():
+    guide = {"min_len": 1, "max_len": 20, "speaker_pattern": r"^(?:([A-Z][a-z]+):)\s+"}
+    eng = engine_for({"guides.segmentation_rules": guide})
+    assert eng is compile_rules(guide)
+    text = "Anna: Hello there.\n\nBob: Mr. Jones said no. Then he left."
+    blocks = eng.blocks(text)
+    assert [t for _, _, t in blocks] == ["Anna: Hello there.", "Bob: Mr. Jones said no.", "Then he left."]
+    assert all(text[s:e].strip() == t for s, e, t in blocks)
+    assert eng.speaker(blocks[1][2]) == ("Bob", "Mr. Jones said no.")
@@ -0,0 +1,16 @@
+from __future__ import annotations
+from pathlib import Path
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.segment.rules import segment_document
+from hdt.core.structure.segmentation import segment_path
+
+TEXT = ("Dr. Lee: The budget was approved.\n\nHeading without a stop\n\nWas it on time? \"Yes!\" she said, "
+        "e.g. twice.\r\n\r\n") * 200
+
+def test_parallel_segmentation_matches_serial(tmp_path: Path):
+    _, can, _ = normalize_bytes(TEXT.encode("utf-8"))
+    serial = segment_document(can)
+    assert segment_document(can, workers=2, parallel_threshold=0) == serial
+    p = tmp_path / "big.txt"
+    p.write_text(TEXT, encoding="utf-8")
+    assert segment_path(p, {}, workers=2, parallel_threshold=0) == segment_path(p, {})
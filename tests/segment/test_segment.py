@@ -1,6 +1,7 @@
 from __future__ import annotations
 from hdt.core.ingest.normalizer import normalize_bytes
 from hdt.core.segment.rules import segment_document
+from hdt.core.segment.spans import Statement
 
 def test_segment_three_sentences_with_crlf_and_nbsp():
     s = "Hello world!\r\nThis is a test.\nNew line\u00A0with NBSP."
@@ -8,3 +9,21 @@ def test_segment_three_sentences_with_crlf_and_nbsp():
     statements = segment_document(can)
     texts = [st.text for st in statements]
     assert texts == ["Hello world!", "This is a test.", "New line with NBSP."]
+
+def test_segment_trims_unicode_space_and_matches_validated_statement():
+    s = "\u3000 One.\u2003Two?  tail\x1c "
+    _, can, _ = normalize_bytes(s.encode("utf-8"))
+    statements = segment_document(can)
+    text = can.canonical_text
+    assert [st.text for st in statements] == [text[st.start:st.end] for st in statements]
+    assert [st.text for st in statements] == ["One.", "Two?", "tail"]
+    st = statements[0]
+    assert st == Statement(id=st.id, start=st.start, end=st.end, text=st.text)
+    assert st.model_dump() == {"id": f"{can.doc_id}_S{st.start}-{st.end}", "start": st.start, "end": st.end, "text": "One."}
+
+def test_trusted_statement_fields_can_be_assigned():
+    a, b = Statement.trusted("d_S0-3", 0, 3, "abc"), Statement.trusted("d_S4-7", 4, 7, "def")
+    a.text = "xyz"
+    assert a == Statement(id="d_S0-3", start=0, end=3, text="xyz")
+    assert a.model_fields_set == b.model_fields_set == {"id", "start", "end", "text"}
+    assert a.model_fields_set is not b.model_fields_set
@@ -0,0 +1,28 @@
+from __future__ import annotations
+from pathlib import Path
+from hdt.core.structure.segmentation import iter_segment_path, segment_path
+
+def test_streamed_rows_match_segment_path(tmp_path: Path):
+    p = tmp_path / "t.txt"
+    p.write_bytes(("﻿Anna: Café notes were approved.\r\n\r\nBob: Dr. Lee said no twice.\n\n\n" * 50).encode("utf-8"))
+    guide = {"guides.segmentation_rules": {"speaker_pattern": r"^(?:([A-Z][a-z]+):)\s+"}}
+    rows = iter_segment_path(p, guide, chunk_size=7)
+    assert next(rows)["Speaker_ID"] == "Anna"
+    assert [next(iter_segment_path(p, guide, chunk_size=7))] + list(rows) == segment_path(p, guide)
+
+def test_long_block_without_blank_lines_streams_at_sentence_ends(tmp_path: Path):
+    p = tmp_path / "t.txt"
+    p.write_bytes(("Anna: Dr. Lee said no.\nBob: Was it on time? \"Yes!\" she said.\r\n" * 200).encode("utf-8"))
+    guide = {"guides.segmentation_rules": {"max_len": 50}}
+    rows = list(iter_segment_path(p, guide, chunk_size=5))
+    assert rows == segment_path(p, guide)
+    assert rows[0]["Statement_Text"] == "Anna: Dr. Lee said no." and len(rows) == 600
+
+def test_bom_file_above_mmap_threshold(tmp_path: Path):
+    from hdt.core.ingest.source import MMAP_THRESHOLD
+    p = tmp_path / "big.txt"
+    block = "Anna: Café notes were approved.\n\n"
+    p.write_bytes(("﻿" + block * (MMAP_THRESHOLD // len(block) + 1)).encode("utf-8"))
+    rows = segment_path(p, {})
+    assert rows[0]["Statement_Text"] == "Anna: Café notes were approved."
+    assert rows == list(iter_segment_path(p, {}))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from hdt.core.ingest.normalizer import normalize_bytes
+from hdt.core.pipeline.run import run_all_for_path
+from hdt.core.segment.rules import segment_document, segment_table
+
+TEXT = "The budget grew. However, the patient said no because of data! See the İstanbul law. Thus it ends"
+
+def test_table_rows_match_statements():
+    _, can, _ = normalize_bytes(TEXT.encode("utf-8"))
+    table = segment_table(can)
+    stmts = segment_document(can)
+    assert table == stmts and table.to_statements() == stmts
+    assert [r.lower for r in table] == [s.text.lower() for s in stmts]
+    assert table[1:3].ids() == [s.id for s in stmts[1:3]]
+    assert table.nbytes() <= 9 * len(table)
+
+def test_stages_consume_table_unchanged():
+    full = run_all_for_path("t.txt", data=TEXT.encode("utf-8"))
+    col = run_all_for_path("t.txt", data=TEXT.encode("utf-8"), columnar=True)
+    for key in ("amus", "topics", "threads", "links", "modal", "evidential"):
+        assert [r.model_dump() if hasattr(r, "model_dump") else r for r in col[key]] == \
+               [r.model_dump() if hasattr(r, "model_dump") else r for r in full[key]]
@@ -12,3 +12,16 @@ def test_simple_finance_detection():
     ta = assign_topics([a])[0]
     assert ta.Topic_Label in {"finance", "general"}
     assert ta.Topic_Assign_Confidence >= 0.4
+
+def test_batch_mode_matches_per_amu_loop():
+    spans = ["Revenue and profit margins rose.", "Deploy the API model.", "Thank you.", "",
+             "Carbon emissions and sustainability policy.", "The league match score."]
+    amus = [AMU(AMU_ID=f"X@{i}", Parent_Statement_ID="X", Text_Span=s, Char_Start=0, Char_End=len(s))
+            for i, s in enumerate(spans)]
+    guide = {"topic_keywords": {"Tax Policy": ["tax", "policy"], "Markets": ["revenue", "profit", "rose"]}}
+    for g in (None, guide):
+        loop = [r.model_dump() for r in assign_topics(amus, g)]
+        assert [r.model_dump() for r in assign_topics(amus, g, batch=True)] == loop
+    rows = assign_topics(amus, guide, batch=True)
+    assert [r.Topic_ID for r in rows[:3]] == ["topic:markets", "topic:general", "topic:general"]
+    assert rows[0].Topic_Disambiguators == ["profit", "revenue", "rose"]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from hdt.core.amu.schema import AMU
+from hdt.core.topic.assign import assign_topics
+from hdt.core.topic.discover import TopicDiscovery, discover_topics
+
+THEMES = [("river", "boat", "fishing", "water"), ("guitar", "concert", "band", "song"), ("garden", "flower", "soil", "seed")]
+
+def _amus():
+    spans = [f"The {w[i % 4]} and the {w[(i + 1) % 4]}, then the {w[(i + 2) % 4]}." for w in THEMES for i in range(8)]
+    spans += ["Revenue and profit margins rose.", "Okay."]
+    return [AMU(AMU_ID=f"X@{i}", Parent_Statement_ID=f"X{i}", Text_Span=s, Char_Start=0, Char_End=len(s))
+            for i, s in enumerate(spans)]
+
+def test_general_amus_get_one_discovered_topic_per_theme():
+    amus = _amus()
+    topics = assign_topics(amus)
+    out = TopicDiscovery(k=8, batch_size=7).relabel(amus, topics)
+    ids = [t.Topic_ID for t in out]
+    groups = [set(ids[k * 8:(k + 1) * 8]) for k in range(3)]
+    assert all(len(g) == 1 and next(iter(g)).startswith("topic:auto_") for g in groups)
+    assert len(set.union(*groups)) == 3
+    assert ids[-2:] == ["topic:finance", "topic:general"] and out[-2] is topics[-2]
+
+def test_discover_topics_takes_dict_rows():
+    amus = [{"AMU_ID": a.AMU_ID, "Text_Span": a.Text_Span} for a in _amus()]
+    rows = [{"AMU_ID": a["AMU_ID"], "Topic_ID": "general", "Topic_Label": "General", "Topic_Assign_Confidence": 0.0,
+             "Topic_Disambiguators": []} for a in amus]
+    out = discover_topics(amus, rows, k=4)
+    assert {r["Topic_ID"] for r in out[:24]} <= {f"topic:auto_{j}" for j in range(1, 5)}
+    assert rows[0]["Topic_ID"] == "general"
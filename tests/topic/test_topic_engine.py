@@ -0,0 +1,23 @@
+from __future__ import annotations
+from hdt.core.topic import assign_topics
+from hdt.core.topic.engine import compile_topics
+from scripts.bench import score_topic_reference
+
+GUIDE = {"topics": [
+    {"id": "econ", "label": "Economy", "keywords": ["cost", "cost of living", "prices"], "disambiguators": ["economy"]},
+    {"id": "tax", "label": "Tax", "keywords": ["tax", "tax-free"], "disambiguators": ["policy"]},
+]}
+
+def test_engine_finds_nested_terms_and_matches_per_topic_scorer():
+    eng = compile_topics(GUIDE)
+    assert compile_topics(dict(GUIDE)) is eng
+    span = "The Cost of living and tax-free prices; taxes aside, economy first."
+    assert eng.hits(span) == {0: 3, 1: 2}
+    k, conf, dhit = eng.score(span)
+    scores = [score_topic_reference(span, td) for td in eng.topics]
+    assert (conf, dhit) == max(scores, key=lambda s: s[0]) and k == 0
+
+def test_assign_topics_uses_compiled_guide():
+    rows = assign_topics([{"AMU_ID": "a1", "Text_Span": "A new tax policy."},
+                          {"AMU_ID": "a2", "Text_Span": "Nothing relevant."}], GUIDE)
+    assert [(r["Topic_ID"], r["Topic_Disambiguators"]) for r in rows] == [("tax", ["policy"]), ("general", [])]
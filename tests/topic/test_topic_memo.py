@@ -0,0 +1,42 @@
+from __future__ import annotations
+from hdt.core.amu.schema import AMU
+from hdt.core.topic import assign_topics as assign_guided
+from hdt.core.topic.assign import assign_topics
+from hdt.core.topic.memo import ScoreMemo
+
+GUIDE = {"topic_keywords": {"tax": ["tax", "policy"], "econ": ["prices", "cost of living"]}}
+SPANS = ["Thank you.", "THANK YOU.", "Tax policy again.", "Thank you.", "Prices rose.", "Okay."]
+
+def _amus(spans):
+    return [AMU(AMU_ID=f"X@{i}", Parent_Statement_ID="X", Text_Span=s, Char_Start=0, Char_End=len(s))
+            for i, s in enumerate(spans)]
+
+def test_memo_returns_fresh_rows_and_counts_repeats():
+    amus = _amus(SPANS)
+    for g in (None, GUIDE):
+        for batch in (False, True):
+            memo = ScoreMemo()
+            want = [r.model_dump() for r in assign_topics(amus, g, batch=batch)]
+            assert [r.model_dump() for r in assign_topics(amus, g, batch=batch, memo=memo)] == want
+            assert [r.model_dump() for r in assign_topics(amus, g, batch=batch, memo=memo)] == want
+            assert memo.stats()["entries"] == 4 and memo.hits >= len(SPANS)
+    memo = ScoreMemo()
+    rows = [{"AMU_ID": a.AMU_ID, "Text_Span": a.Text_Span} for a in amus]
+    assert assign_guided(rows, GUIDE, memo=memo) == assign_guided(rows, GUIDE)
+    assert (memo.hits, memo.misses) == (2, 4)
+
+def test_batch_counts_repeats_of_a_miss_as_hits():
+    for batch in (False, True):
+        memo = ScoreMemo()
+        assign_topics(_amus(["Okay."] * 1000), batch=batch, memo=memo)
+        assert (memo.hits, memo.misses) == (999, 1)
+
+def test_memo_is_bounded_and_persists(tmp_path):
+    memo = ScoreMemo(max_entries=2, path=tmp_path / "memo.pkl")
+    for s in ("a", "b", "c"):
+        memo.score("g", s, str.upper)
+    assert len(memo) == 2 and memo.score("g", "a", lambda s: "again") == "again"
+    memo.save()
+    again = ScoreMemo(path=tmp_path / "memo.pkl")
+    assert again.score("g", "C", lambda s: None) == "C" and again.hits == 1
+    assert again.score("other", "C", str.lower) == "c"